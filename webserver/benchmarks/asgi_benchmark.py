@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+# Run from the repository root: `python3 -m webserver.benchmarks.asgi_benchmark [--requests N] [--concurrency C]`.
+# The requests are sent straight to the ASGI application (no sockets, no daphne), so only the time spent in Django and in Web-Agent is measured.
+# Every HTML response is also checked: the nonce in the page must be the one in its `Content-Security-Policy` header, even under concurrency.
+# With `load_test_settings` (no rate limits), so that every report is accepted: a refused one fails the run.
+
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "webserver.benchmarks.load_test_settings")
+
+from webserver.webserver.asgi import application
+
+from django.core.handlers.asgi import ASGIHandler
+
+from argparse import ArgumentParser, Namespace
+from asyncio import Queue, gather, run, sleep
+from json import dumps
+from re import Pattern, compile as re_compile
+from time import perf_counter
+from typing import Any, Optional
+import sys
+
+
+ROUTES: list[tuple[str, str, bytes]] = [
+    ("GET", "/", b""),
+    ("GET", "/static/css/index.css", b""),
+    ("GET", "/favicon.ico", b""),
+    ("POST", "/csp-endpoint", dumps({"csp-report": {"document-uri": "https://127.0.0.1:8000/", "violated-directive": "script-src-elem", "blocked-uri": "inline", "line-number": 1}}).encode()),
+    ("GET", "/not-found", b"")
+]
+
+PAGE_NONCE_PATTERN: Pattern[bytes] = re_compile(rb"nonce=([A-Za-z0-9_-]+)")
+HEADER_NONCE_PATTERN: Pattern[bytes] = re_compile(rb"'nonce-([A-Za-z0-9_-]+)'")
+
+
+async def request(method: str, path: str, body: bytes, handler: ASGIHandler=application) -> tuple[int, dict[bytes, bytes], bytes]:
+    scope: dict[str, Any] = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"127.0.0.1"), (b"content-type", b"application/csp-report"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000)
+    }
+    messages: Queue[dict[str, Any]] = Queue()
+    status: int = 0
+    headers: dict[bytes, bytes] = {}
+    chunks: list[bytes] = []
+
+    await messages.put({"type": "http.request", "body": body, "more_body": False})
+
+    async def receive() -> dict[str, Any]:
+        if messages.empty():
+            # Nobody disconnects: just wait until Django cancels the listener.
+            await sleep(3600)
+
+        return await messages.get()
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            headers.update((name.lower(), value) for name, value in message["headers"])
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await handler(scope, receive, send)
+
+    return status, headers, b"".join(chunks)
+
+
+# The reports are all valid: anything but a 2xx (e.g., a 429) means that the POST measured something else than their ingestion.
+def is_refused_report(method: str, status: int) -> bool:
+    return method == "POST" and not 200 <= status < 300
+
+
+def has_mismatched_nonce(headers: dict[bytes, bytes], body: bytes) -> bool:
+    # The empty responses (e.g., the 204 of the reporting endpoints) have no page to check.
+    if not body or not headers.get(b"content-type", b"").startswith(b"text/html"):
+        return False
+
+    page_nonce: Optional[Any] = PAGE_NONCE_PATTERN.search(body)
+    header_nonce: Optional[Any] = HEADER_NONCE_PATTERN.search(headers.get(b"content-security-policy", b""))
+
+    return page_nonce is None or header_nonce is None or page_nonce.group(1) != header_nonce.group(1)
+
+
+async def worker(jobs: Queue[tuple[str, str, bytes]], latencies: list[float], mismatches: list[str], refusals: list[str]) -> None:
+    while not jobs.empty():
+        method, path, body = jobs.get_nowait()
+        start: float = perf_counter()
+
+        status, response_headers, response_body = await request(method, path, body)
+
+        latencies.append(perf_counter() - start)
+
+        if has_mismatched_nonce(response_headers, response_body):
+            mismatches.append(path)
+
+        if is_refused_report(method, status):
+            refusals.append(f"{path} ({status})")
+
+
+async def benchmark(requests: int, concurrency: int) -> bool:
+    # Warm-up: load the middleware chain, the URL resolver and the templates.
+    for method, path, body in ROUTES:
+        await request(method, path, body)
+
+    jobs: Queue[tuple[str, str, bytes]] = Queue()
+    latencies: list[float] = []
+    mismatches: list[str] = []
+    refusals: list[str] = []
+
+    for i in range(requests):
+        jobs.put_nowait(ROUTES[i % len(ROUTES)])
+
+    start: float = perf_counter()
+
+    await gather(*[worker(jobs, latencies, mismatches, refusals) for _ in range(concurrency)])
+
+    elapsed: float = perf_counter() - start
+
+    latencies.sort()
+
+    print(f"Requests: {requests}, concurrency: {concurrency}")
+    print(f"Throughput: {requests / elapsed:.1f} requests/s")
+    print(f"Latency p50: {latencies[len(latencies) // 2] * 1000:.2f} ms, p99: {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+    print(f"Pages whose nonce does not match their CSP: {len(mismatches)}")
+    print(f"Refused reports: {len(refusals)}")
+
+    return len(mismatches) == 0 and len(refusals) == 0
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="In-process load test of the Web-Agent ASGI application.")
+
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+
+    args: Namespace = parser.parse_args()
+
+    if not run(benchmark(requests=args.requests, concurrency=args.concurrency)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+# Run from the repository root: `python3 -m webserver.benchmarks.fast_path_benchmark`.
+# Measures the CPU time per request of each route, with and without `FastPathMiddleware`: the medians over the repeats, and the range of the savings.
+# With the settings of `asgi_benchmark` (no rate limits): the run stops at the first refused report.
+
+from webserver.benchmarks.asgi_benchmark import ROUTES, request, is_refused_report
+from webserver.webserver.asgi import WebAgentASGIHandler
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.test import override_settings
+
+from asyncio import run
+from statistics import median
+from time import process_time
+
+
+ITERATIONS: int = 2000
+REPEATS: int = 9
+
+
+# The routes that `FastPathMiddleware` answers itself. The others go through the full chain either way, so they are the control: their difference is the noise.
+def is_fast_path(path: str) -> bool:
+    return path.startswith(settings.STATIC_URL) or path in ("/favicon.ico", settings.METRICS_URL, *settings.REPORTING_ENDPOINTS.values())
+
+
+async def cpu_per_request(handler: ASGIHandler, method: str, path: str, body: bytes) -> float:
+    start: float = process_time()
+
+    for _ in range(ITERATIONS):
+        status, _, _ = await request(method, path, body, handler)
+
+        if is_refused_report(method, status):
+            raise RuntimeError(f"{method} {path}: {status}, the reports must all be accepted.")
+
+    return (process_time() - start) / ITERATIONS * 1e6
+
+
+async def benchmark() -> None:
+    # The middlewares are loaded when the handler is created, so each handler keeps the chain of its settings.
+    with override_settings(FAST_PATH_ACTIVE=False):
+        full_chain: ASGIHandler = WebAgentASGIHandler()
+
+    fast_path: ASGIHandler = WebAgentASGIHandler()
+
+    for method, path, body in ROUTES:
+        # Warm-up.
+        status, _, _ = await request(method, path, body, full_chain)
+        await request(method, path, body, fast_path)
+
+        befores: list[float] = []
+        afters: list[float] = []
+
+        # Both handlers are measured in each repeat, in turns, so that a drift of the machine (e.g., the CPU frequency) affects both alike.
+        for repeat in range(REPEATS):
+            if repeat % 2 == 0:
+                befores.append(await cpu_per_request(full_chain, method, path, body))
+                afters.append(await cpu_per_request(fast_path, method, path, body))
+            else:
+                afters.append(await cpu_per_request(fast_path, method, path, body))
+                befores.append(await cpu_per_request(full_chain, method, path, body))
+
+        savings: list[float] = sorted(before - after for before, after in zip(befores, afters))
+        kind: str = "fast path" if is_fast_path(path) else "control"
+
+        print(
+            f"{method:4} {path:24} {status} {kind:9} full chain: {median(befores):7.1f} µs/request, fast path: {median(afters):7.1f} µs/request, "
+            f"saved: {median(savings):+6.1f} µs (from {savings[0]:+.1f} to {savings[-1]:+.1f})"
+        )
+
+
+def main() -> None:
+    run(benchmark())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+
+# Run from the repository root: `python3 -m webserver.benchmarks.load_test [--mix browsing|report-storm|name=weight,...] [--duration 10] [--concurrency 50]`.
+# Starts the ASGI application under daphne on localhost (with `load_test_settings`: the in-memory store, and no rate limits), replays a traffic mix
+# over keep-alive HTTP/1.1 connections, and reports the throughput, the latency percentiles per scenario, and the memory (RSS) of every process.
+# `--url` targets a server that is already running instead (e.g., several workers), whose processes can be given with `--pid` for the RSS.
+
+from argparse import ArgumentParser, Namespace
+from asyncio import StreamReader, StreamWriter, gather, open_connection, run, sleep, wait_for
+from json import dumps
+from pathlib import Path
+from random import Random
+from subprocess import Popen
+from time import perf_counter
+from typing import Any, Callable, Optional
+from urllib.parse import urlsplit, SplitResult
+import os
+import sys
+
+
+REPOSITORY_ROOT: Path = Path(__file__).resolve().parents[2]
+STATIC_ROOT: Path = REPOSITORY_ROOT / "webserver" / "web_agent_server" / "static"
+APPLICATION_PATH: str = "webserver.webserver.asgi:application"
+SETTINGS_MODULE: str = "webserver.benchmarks.load_test_settings"
+
+MIXES: dict[str, dict[str, float]] = {
+    # A visit: the page, its bundles (mostly revalidated, since they are `no-cache`), and the occasional violation report.
+    "browsing": {"index": 2, "static": 3, "static_conditional": 6, "report": 1},
+    # A misbehaving page (or an attack) flooding the reporting endpoints, while the site is still browsed.
+    "report-storm": {"index": 1, "static_conditional": 1, "report": 6, "report_batch": 2}
+}
+BATCH_SIZE: int = 50
+BROWSER_HEADERS: dict[str, str] = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
+    "Accept-Encoding": "gzip, br",
+    "Sec-Fetch-Site": "same-origin"
+}
+
+
+class HTTPConnection():
+    # A minimal keep-alive HTTP/1.1 client: the load generator must cost as little as possible, and needs nothing outside the standard library.
+    def __init__(self, host: str, port: int) -> None:
+        self.__host: str = host
+        self.__port: int = port
+        self.__reader: Optional[StreamReader] = None
+        self.__writer: Optional[StreamWriter] = None
+
+    async def request(self, method: str, path: str, headers: dict[str, str], body: bytes=b"") -> tuple[int, dict[str, str], bytes]:
+        if self.__writer is None:
+            self.__reader, self.__writer = await open_connection(self.__host, self.__port)
+
+        assert self.__reader is not None
+
+        head: str = "".join(f"{name}: {value}\r\n" for name, value in (headers | {"Host": f"{self.__host}:{self.__port}", "Content-Length": str(len(body))}).items())
+
+        self.__writer.write(f"{method} {path} HTTP/1.1\r\n{head}\r\n".encode("latin-1") + body)
+
+        await self.__writer.drain()
+
+        status_line, *header_lines = (await self.__reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        response_headers: dict[str, str] = {}
+
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+
+        status: int = int(status_line.split(" ")[1])
+
+        if response_headers.get("transfer-encoding") == "chunked":
+            content: bytes = await self.__read_chunks()
+        else:
+            content = await self.__reader.readexactly(int(response_headers.get("content-length", "0")))
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+
+        return status, response_headers, content
+
+    async def __read_chunks(self) -> bytes:
+        assert self.__reader is not None
+
+        chunks: list[bytes] = []
+
+        while True:
+            size: int = int((await self.__reader.readuntil(b"\r\n")).split(b";")[0], 16)
+
+            if size == 0:
+                await self.__reader.readuntil(b"\r\n")
+
+                return b"".join(chunks)
+
+            chunks.append(await self.__reader.readexactly(size))
+
+            await self.__reader.readexactly(2)
+
+    async def close(self) -> None:
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+            self.__reader = None
+
+
+class TrafficMix():
+    def __init__(self, weights: dict[str, float], static_paths: list[str], etags: dict[str, str], seed: int) -> None:
+        self.__names: list[str] = list(weights)
+        self.__weights: list[float] = list(weights.values())
+        self.__static_paths: list[str] = static_paths
+        self.__etags: dict[str, str] = etags
+        self.__random: Random = Random(seed)
+        self.__scenarios: dict[str, Callable[[], tuple[str, str, dict[str, str], bytes]]] = {
+            "index": self.__index,
+            "static": self.__static,
+            "static_conditional": self.__static_conditional,
+            "report": self.__report,
+            "report_batch": self.__report_batch
+        }
+
+        for name in self.__names:
+            if name not in self.__scenarios:
+                raise ValueError(f"Unknown scenario: {name} (expected one of {', '.join(self.__scenarios)}).")
+
+    # Returns the name of the scenario, and its request.
+    def next(self) -> tuple[str, tuple[str, str, dict[str, str], bytes]]:
+        name: str = self.__random.choices(self.__names, self.__weights)[0]
+
+        return name, self.__scenarios[name]()
+
+    def __index(self) -> tuple[str, str, dict[str, str], bytes]:
+        return "GET", "/", BROWSER_HEADERS | {"Sec-Fetch-Site": "none", "Sec-Fetch-Mode": "navigate", "Sec-Fetch-Dest": "document"}, b""
+
+    def __static(self) -> tuple[str, str, dict[str, str], bytes]:
+        return "GET", self.__random.choice(self.__static_paths), BROWSER_HEADERS, b""
+
+    def __static_conditional(self) -> tuple[str, str, dict[str, str], bytes]:
+        path: str = self.__random.choice(self.__static_paths)
+
+        return "GET", path, BROWSER_HEADERS | ({"If-None-Match": self.__etags[path]} if path in self.__etags else {}), b""
+
+    def __report(self) -> tuple[str, str, dict[str, str], bytes]:
+        report_type: str = self.__random.choice(("csp", "coop", "coep"))
+
+        return "POST", f"/{report_type}-endpoint", BROWSER_HEADERS | {"Content-Type": "application/csp-report"}, dumps({f"{report_type}-report": self.__legacy_report(report_type)}).encode("utf-8")
+
+    def __report_batch(self) -> tuple[str, str, dict[str, str], bytes]:
+        batch: list[dict[str, Any]] = [
+            {"type": "csp-violation", "age": 0, "url": "http://127.0.0.1/", "user_agent": BROWSER_HEADERS["User-Agent"], "body": {
+                "documentURL": "http://127.0.0.1/",
+                "effectiveDirective": "script-src-elem",
+                "blockedURL": f"https://cdn.example.com/{self.__random.randrange(200)}.js",
+                "disposition": "enforce",
+                "statusCode": 200,
+                "sourceFile": "http://127.0.0.1/static/js/index.js",
+                "lineNumber": self.__random.randrange(500),
+                "columnNumber": 1
+            }} for _ in range(BATCH_SIZE)
+        ]
+
+        return "POST", "/csp-endpoint", BROWSER_HEADERS | {"Content-Type": "application/reports+json"}, dumps(batch).encode("utf-8")
+
+    def __legacy_report(self, report_type: str) -> dict[str, Any]:
+        if report_type == "csp":
+            return {
+                "document-uri": "http://127.0.0.1/",
+                "violated-directive": "script-src-elem",
+                "blocked-uri": f"https://cdn.example.com/{self.__random.randrange(200)}.js",
+                "source-file": "http://127.0.0.1/static/js/index.js",
+                "line-number": self.__random.randrange(500)
+            }
+        else:
+            return {"document-uri": "http://127.0.0.1/", "disposition": "enforce", "blocked-window-url": f"https://popup.example.com/{self.__random.randrange(200)}"}
+
+
+async def worker(host: str, port: int, mix: TrafficMix, warm_up_end: float, end: float, latencies: dict[str, list[float]], statuses: dict[str, dict[int, int]]) -> None:
+    connection: HTTPConnection = HTTPConnection(host, port)
+
+    try:
+        while perf_counter() < end:
+            name, (method, path, headers, body) = mix.next()
+            start: float = perf_counter()
+
+            try:
+                status, _, _ = await connection.request(method, path, headers, body)
+            except (OSError, ValueError, EOFError) as exception:
+                status = 0
+
+                print(f"{name}: {type(exception).__name__}: {exception}", file=sys.stderr)
+
+                await connection.close()
+
+            if start >= warm_up_end:
+                latencies.setdefault(name, []).append(perf_counter() - start)
+                statuses.setdefault(name, {})
+                statuses[name][status] = statuses[name].get(status, 0) + 1
+    finally:
+        await connection.close()
+
+
+async def prepare(host: str, port: int) -> tuple[list[str], dict[str, str]]:
+    connection: HTTPConnection = HTTPConnection(host, port)
+    static_paths: list[str] = [f"/static/{path.relative_to(STATIC_ROOT).as_posix()}" for path in sorted(STATIC_ROOT.rglob("*")) if path.is_file()]
+    etags: dict[str, str] = {}
+
+    # The current validators, for the conditional requests.
+    for path in static_paths:
+        status, headers, _ = await connection.request("GET", path, BROWSER_HEADERS)
+
+        if status == 200 and "etag" in headers:
+            etags[path] = headers["etag"]
+
+    await connection.close()
+
+    if not static_paths:
+        raise RuntimeError(f"No static files in {STATIC_ROOT}: build the front-end first.")
+
+    return static_paths, etags
+
+
+async def wait_until_ready(host: str, port: int, timeout: float) -> None:
+    deadline: float = perf_counter() + timeout
+
+    while True:
+        try:
+            connection: HTTPConnection = HTTPConnection(host, port)
+
+            await wait_for(connection.request("GET", "/", BROWSER_HEADERS), timeout=1.0)
+            await connection.close()
+
+            return
+        except (OSError, TimeoutError, ValueError):
+            if perf_counter() > deadline:
+                raise RuntimeError(f"The server did not answer on {host}:{port} within {timeout} s.")
+
+            await sleep(0.1)
+
+
+# The processes of the server (e.g., a supervisor and its workers), and their resident memory, from `/proc` (Linux only).
+def get_process_tree(pid: int) -> list[int]:
+    parents: dict[int, list[int]] = {}
+
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields: list[str] = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+
+        parents.setdefault(int(fields[1]), []).append(int(stat.parent.name))
+
+    tree: list[int] = [pid]
+
+    for process in tree:
+        tree.extend(parents.get(process, []))
+
+    return tree
+
+
+def get_rss(pid: int) -> Optional[dict[str, int]]:
+    try:
+        status: str = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+
+    # In kB.
+    values: dict[str, int] = {line.split(":")[0]: int(line.split()[1]) for line in status.splitlines() if line.startswith(("VmRSS:", "VmHWM:"))}
+
+    return {"rss_kb": values.get("VmRSS", 0), "peak_rss_kb": values.get("VmHWM", 0)}
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    if mix in MIXES:
+        return MIXES[mix]
+
+    return {name: float(weight) for name, _, weight in (item.partition("=") for item in mix.split(","))}
+
+
+async def load_test(args: Namespace, host: str, port: int, pids: list[int]) -> dict[str, Any]:
+    await wait_until_ready(host, port, timeout=30.0)
+
+    static_paths, etags = await prepare(host, port)
+    latencies: dict[str, list[float]] = {}
+    statuses: dict[str, dict[int, int]] = {}
+    start: float = perf_counter()
+    warm_up_end: float = start + args.warm_up
+    end: float = warm_up_end + args.duration
+    rss_before: dict[int, Optional[dict[str, int]]] = {pid: get_rss(pid) for pid in pids}
+
+    await gather(*[worker(host, port, TrafficMix(parse_mix(args.mix), static_paths, etags, seed=args.seed + i), warm_up_end, end, latencies, statuses) for i in range(args.concurrency)])
+
+    elapsed: float = perf_counter() - warm_up_end
+    total: int = sum(len(values) for values in latencies.values())
+    results: dict[str, Any] = {
+        "mix": parse_mix(args.mix),
+        "concurrency": args.concurrency,
+        "duration": elapsed,
+        "requests": total,
+        "throughput": total / elapsed,
+        "scenarios": {},
+        "processes": {str(pid): {"before": rss_before[pid], "after": get_rss(pid)} for pid in pids} | {"load_generator": {"after": get_rss(os.getpid())}}
+    }
+
+    print(f"Mix: {args.mix}, concurrency: {args.concurrency}, duration: {elapsed:.1f} s")
+    print(f"Throughput: {total / elapsed:.1f} requests/s ({total} requests)\n")
+    print(f"{'scenario':20} {'requests':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+
+    for name, values in sorted(latencies.items()):
+        values.sort()
+
+        results["scenarios"][name] = {
+            "requests": len(values),
+            "p50_ms": percentile(values, 0.50) * 1e3,
+            "p95_ms": percentile(values, 0.95) * 1e3,
+            "p99_ms": percentile(values, 0.99) * 1e3,
+            "statuses": {str(status): count for status, count in sorted(statuses[name].items())}
+        }
+
+        scenario: dict[str, Any] = results["scenarios"][name]
+
+        print(f"{name:20} {len(values):9} {scenario['p50_ms']:9.2f} {scenario['p95_ms']:9.2f} {scenario['p99_ms']:9.2f}  {scenario['statuses']}")
+
+    print()
+
+    for name, process in results["processes"].items():
+        after: Optional[dict[str, int]] = process["after"]
+
+        if after is not None:
+            print(f"RSS of {'process ' + name if name.isdigit() else 'the ' + name.replace('_', ' ')}: {after['rss_kb'] / 1024:.1f} MiB (peak {after['peak_rss_kb'] / 1024:.1f} MiB)")
+
+    return results
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="End-to-end load test of the Web-Agent ASGI application under daphne.")
+
+    parser.add_argument("--mix", default="browsing", help=f"One of {', '.join(MIXES)}, or weighted scenarios (e.g., index=1,static=2,static_conditional=4,report=2,report_batch=1).")
+    parser.add_argument("--duration", type=float, default=10.0, help="How long to measure, in seconds.")
+    parser.add_argument("--warm-up", type=float, default=2.0, help="How long to send traffic before measuring, in seconds.")
+    parser.add_argument("--concurrency", type=int, default=50, help="How many connections send requests at once.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="The base URL of a running server to load, instead of starting daphne.")
+    parser.add_argument("--pid", type=int, action="append", default=[], help="A process of the running server, for the RSS (repeatable).")
+    parser.add_argument("--output", type=Path, help="Where to write the results, as JSON.")
+
+    args: Namespace = parser.parse_args()
+    server: Optional[Popen[bytes]] = None
+
+    if args.url is not None:
+        parts: SplitResult = urlsplit(args.url)
+        host: str = parts.hostname or "127.0.0.1"
+        port: int = parts.port or 80
+        pids: list[int] = [pid for root in args.pid for pid in get_process_tree(root)]
+    else:
+        host, port = "127.0.0.1", args.port
+        server = Popen(
+            [sys.executable, "-m", "daphne", "-v", "0", "-b", host, "-p", str(port), APPLICATION_PATH],
+            cwd=REPOSITORY_ROOT,
+            env=os.environ | {"DJANGO_SETTINGS_MODULE": SETTINGS_MODULE}
+        )
+        pids = [server.pid]
+
+    try:
+        results: dict[str, Any] = run(load_test(args, host, port, pids))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    if args.output is not None:
+        args.output.write_text(dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
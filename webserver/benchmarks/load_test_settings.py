@@ -0,0 +1,11 @@
+# The settings of `load_test`, `asgi_benchmark` and `fast_path_benchmark`: the production ones, with the in-memory store, and without the rate limits
+# of the reporting endpoints, since all the traffic comes from a single address.
+
+from webserver.webserver.settings import *  # noqa: F401, F403
+
+
+REPORTS_STORE = "memory"
+REPORTS_RATE_LIMIT_IP_RATE = 1e9
+REPORTS_RATE_LIMIT_IP_BURST = 10 ** 9
+REPORTS_RATE_LIMIT_ORIGIN_RATE = 1e9
+REPORTS_RATE_LIMIT_ORIGIN_BURST = 10 ** 9
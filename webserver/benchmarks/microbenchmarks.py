@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+# Run from the repository root: `python3 -m webserver.benchmarks.microbenchmarks [--output results.json] [--baseline baseline.json] [--tolerance 0.1] [--filter csp]`.
+# Times the per-request hot paths (headers, CSP, report parsing and storage) offline, in this process, and optionally compares them with a stored baseline:
+# the exit status is 1 when a benchmark is slower than its baseline by more than the tolerance.
+
+import os
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "webserver.webserver.settings")
+
+django.setup()
+
+from django.http import HttpRequest, HttpResponse
+from django.test import RequestFactory
+
+from webserver.web_agent_server.headers.headers import Headers
+from webserver.web_agent_server.headers.document_headers import DocumentHeaders
+from webserver.web_agent_server.headers.static_subresources_headers import StaticSubResourcesHeaders
+from webserver.web_agent_server.csp.csp import CSP
+from webserver.web_agent_server.csp.xss_mitigating_csp import XSSMitigatingCSP
+from webserver.web_agent_server.csp.dom_xss_mitigating_csp import DOMXSSMitigatingCSP
+from webserver.web_agent_server.csp.exfiltration_mitigating_csp import ExfiltrationMitigatingCSP
+from webserver.web_agent_server.csp.isolation_based_csp import IsolationBasedCSP
+from webserver.web_agent_server.csp.secure_context_csp import SecureContextCSP
+from webserver.web_agent_server.csp.report_parser import ReportParser
+from webserver.web_agent_server.csp.report_filter import ReportFilter
+from webserver.web_agent_server.csp.reports import ReportsLogs
+from webserver.web_agent_server.csp.report_ring_buffer import ReportRingBuffer
+from webserver.middleware.csp_manager import CSPMiddleware
+from django.conf import settings
+
+from argparse import ArgumentParser, Namespace
+from json import dumps, loads
+from pathlib import Path
+from platform import platform, python_version
+from secrets import token_urlsafe
+from timeit import repeat
+from typing import Any, Callable, Optional
+import sys
+
+
+REPEATS: int = 5
+LARGE_BATCH_SIZE: int = 1000
+
+
+def get_benchmarks() -> list[tuple[str, Callable[[], Any], int]]:
+    request: HttpRequest = RequestFactory().get("/", HTTP_USER_AGENT="Mozilla/5.0 (X11; Linux x86_64) Chrome/126.0")
+    safari_request: HttpRequest = RequestFactory().get("/", HTTP_USER_AGENT="Mozilla/5.0 (Macintosh) Version/17.5 Safari/605.1.15")
+    nonce: str = token_urlsafe(32)
+    csps: list[CSP] = [
+        XSSMitigatingCSP(report_to=True),
+        DOMXSSMitigatingCSP(report_to=True),
+        ExfiltrationMitigatingCSP(report_to=True),
+        IsolationBasedCSP(report_to=True),
+        SecureContextCSP()
+    ]
+    csp_middleware: CSPMiddleware = CSPMiddleware(get_response=lambda request: HttpResponse())
+    # `__generate_csp` is private: it is reached through its mangled name, on a request that already has its nonce.
+    generate_csp: Callable[[HttpRequest], str] = getattr(csp_middleware, "_CSPMiddleware__generate_csp")
+    noise_filter: ReportFilter = ReportFilter(rules=settings.REPORTS_NOISE_RULES, field_aliases=ReportParser.FIELD_ALIASES)
+    small_body: bytes = dumps({"csp-report": __legacy_csp_report(0)}).encode("utf-8")
+    large_body: bytes = dumps([{"type": "csp-violation", "age": 0, "url": "https://127.0.0.1:8000/", "user_agent": "Mozilla/5.0", "body": __reporting_api_csp_body(i)} for i in range(LARGE_BATCH_SIZE)]).encode("utf-8")
+    batch: list[dict[str, Any]] = [{"csp-report": __legacy_csp_report(i)} for i in range(LARGE_BATCH_SIZE)]
+
+    setattr(request, CSPMiddleware.NONCE_ATTRIBUTE, nonce)
+
+    return [
+        ("headers.common", lambda: Headers.get_common_headers(request=request), 20000),
+        ("headers.common.safari", lambda: Headers.get_common_headers(request=safari_request), 20000),
+        ("headers.document", lambda: DocumentHeaders.get_headers(request=request, report_to=settings.REPORT_TO_ACTIVE, report_uri=not settings.REPORT_TO_ACTIVE), 20000),
+        ("headers.static_subresources", lambda: StaticSubResourcesHeaders.get_headers(request=request), 20000),
+        ("csp.middleware.generate_csp", lambda: generate_csp(request), 50000)
+    ] + [
+        (f"csp.generate.{type(csp).__name__}", lambda csp=csp: csp.generate(nonce=nonce), 20000) for csp in csps
+    ] + [
+        ("reports.parse.small", lambda: ReportParser.parse("csp", small_body), 20000),
+        ("reports.parse.small.noise_filter", lambda: ReportParser.parse("csp", small_body, noise_filter), 20000),
+        (f"reports.parse.large_{LARGE_BATCH_SIZE}", lambda: ReportParser.parse("csp", large_body), 20),
+        (f"reports.parse.large_{LARGE_BATCH_SIZE}.noise_filter", lambda: ReportParser.parse("csp", large_body, noise_filter), 20)
+    ] + [
+        (f"reports_logs.add_{report_type}_report.at_capacity", __at_capacity(report_type, lambda add=add: add(batch[0])), 50000)
+        for report_type, add in (("csp", ReportsLogs.add_csp_report), ("coop", ReportsLogs.add_coop_report), ("coep", ReportsLogs.add_coep_report))
+    ] + [
+        (f"reports_logs.add_csp_reports_{LARGE_BATCH_SIZE}.at_capacity", __at_capacity("csp", lambda: ReportsLogs.add_csp_reports(batch)), 50)
+    ]
+
+
+# The ring buffer is filled up first, so that every new report overwrites the oldest one.
+def __at_capacity(report_type: str, function: Callable[[], Any]) -> Callable[[], Any]:
+    def fill_then_run() -> Any:
+        buffer: ReportRingBuffer = getattr(ReportsLogs, f"{report_type}_reports")
+
+        if len(buffer) < buffer.get_capacity():
+            buffer.extend([{f"{report_type}-report": {}}] * (buffer.get_capacity() - len(buffer)))
+
+        return function()
+
+    return fill_then_run
+
+
+def run(name_filter: Optional[str]) -> dict[str, dict[str, Any]]:
+    results: dict[str, dict[str, Any]] = {}
+
+    for name, function, iterations in get_benchmarks():
+        if name_filter is not None and name_filter not in name:
+            continue
+
+        # Warm-up (and the filling of the ring buffers).
+        function()
+
+        results[name] = {"us_per_call": min(repeat(function, number=iterations, repeat=REPEATS)) / iterations * 1e6, "iterations": iterations, "repeats": REPEATS}
+
+        print(f"{name:55} {results[name]['us_per_call']:12.3f} us/call")
+
+    return results
+
+
+# Returns the names of the benchmarks slower than their baseline by more than `tolerance` (e.g., 0.1 for 10%).
+def compare(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]], tolerance: float) -> list[str]:
+    regressions: list[str] = []
+
+    print(f"\n{'benchmark':55} {'baseline':>12} {'current':>12} {'change':>8}")
+
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:55} {'-':>12} {result['us_per_call']:12.3f} {'new':>8}")
+
+            continue
+
+        before: float = baseline[name]["us_per_call"]
+        change: float = result["us_per_call"] / before - 1.0
+        regressed: bool = change > tolerance
+
+        if regressed:
+            regressions.append(name)
+
+        print(f"{name:55} {before:12.3f} {result['us_per_call']:12.3f} {change:+8.1%}{' REGRESSION' if regressed else ''}")
+
+    return regressions
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="Microbenchmarks of the Web-Agent hot paths.")
+
+    parser.add_argument("--output", type=Path, help="Where to write the results, as JSON (e.g., to be used later as a baseline).")
+    parser.add_argument("--baseline", type=Path, help="The JSON results of an earlier run, to compare with.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="How much slower than the baseline a benchmark may be (0.1 is 10%%).")
+    parser.add_argument("--filter", help="Only run the benchmarks whose name contains this.")
+
+    args: Namespace = parser.parse_args()
+    results: dict[str, dict[str, Any]] = run(args.filter)
+
+    if args.output is not None:
+        args.output.write_text(dumps({"environment": {"python": python_version(), "django": django.get_version(), "platform": platform()}, "results": results}, indent=2))
+
+    if args.baseline is not None:
+        regressions: list[str] = compare(results, loads(args.baseline.read_text())["results"], args.tolerance)
+
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.tolerance:.0%}: {', '.join(regressions)}")
+
+            sys.exit(1)
+
+
+def __legacy_csp_report(i: int) -> dict[str, Any]:
+    return {
+        "document-uri": "https://127.0.0.1:8000/",
+        "referrer": "",
+        "violated-directive": "script-src-elem",
+        "effective-directive": "script-src-elem",
+        "original-policy": "script-src 'nonce-abc' 'strict-dynamic'; object-src 'none'; base-uri 'none'; report-to csp",
+        "disposition": "enforce",
+        "blocked-uri": f"https://cdn.example.com/{i % 50}.js",
+        "status-code": 200,
+        "script-sample": "",
+        "source-file": "https://127.0.0.1:8000/static/js/index.js",
+        "line-number": i % 100,
+        "column-number": 1
+    }
+
+
+def __reporting_api_csp_body(i: int) -> dict[str, Any]:
+    return {
+        "documentURL": "https://127.0.0.1:8000/",
+        "referrer": "",
+        "effectiveDirective": "script-src-elem",
+        "originalPolicy": "script-src 'nonce-abc' 'strict-dynamic'; object-src 'none'; base-uri 'none'; report-to csp",
+        "disposition": "enforce",
+        "blockedURL": f"https://cdn.example.com/{i % 50}.js",
+        "statusCode": 200,
+        "sample": "",
+        "sourceFile": "https://127.0.0.1:8000/static/js/index.js",
+        "lineNumber": i % 100,
+        "columnNumber": 1
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+# Run from the repository root: `python3 -m webserver.benchmarks.reports_benchmark`.
+
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "webserver.webserver.settings")
+
+from webserver.web_agent_server.csp.report_parser import ReportParser
+from webserver.web_agent_server.csp.report_ingestion import ReportIngestionQueue
+
+from json import dumps, loads
+from timeit import repeat
+from typing import Any, Callable, Type
+
+
+BATCH_SIZE: int = 1000
+ITERATIONS: int = 20
+REPEATS: int = 5
+
+
+def main() -> None:
+    queue: ReportIngestionQueue = ReportIngestionQueue(sink=lambda report_type, reports, received: None, max_size=10 ** 9, batch_size=10 ** 9, flush_interval=3600.0)
+    legacy_bodies: list[bytes] = [dumps({"csp-report": __legacy_csp_report(i)}).encode("utf-8") for i in range(BATCH_SIZE)]
+    batch_body: bytes = dumps([{"type": "csp-violation", "age": 0, "url": "https://127.0.0.1:8000/", "user_agent": "Mozilla/5.0", "body": __reporting_api_csp_body(i)} for i in range(BATCH_SIZE)]).encode("utf-8")
+
+    # What the reporting endpoint used to do: one request per report, each one parsed twice, and enqueued on its own.
+    def ingest_legacy() -> None:
+        for body in legacy_bodies:
+            if __validate_report(body, "csp-report"):
+                queue.enqueue("csp", loads(body))
+
+    def ingest_batch() -> None:
+        reports: Any = ReportParser.parse("csp", batch_body)
+
+        assert reports is not None and len(reports) == BATCH_SIZE
+
+        queue.enqueue_many("csp", reports)
+
+    before: float = __best_per_call(ingest_legacy)
+    after: float = __best_per_call(ingest_batch)
+
+    queue.close()
+
+    print(f"{BATCH_SIZE} reports, one legacy body each:    {before:.3f} ms/batch")
+    print(f"{BATCH_SIZE} reports, one reports+json batch: {after:.3f} ms/batch ({before / after:.1f}x faster)")
+
+
+# The former `views.__validate_report`.
+def __validate_report(request_body: bytes, mandatory_report_key: str, allowed_inner_dict_values_types: list[Type[Any]]=[str, int]) -> bool:
+    try:
+        report: dict[Any, Any] = {**loads(request_body)}
+
+        if mandatory_report_key not in report:
+            return False
+
+        if not isinstance(report[mandatory_report_key], dict):
+            return False
+
+        inner_report: dict[Any, Any] = report[mandatory_report_key]
+
+        if any(not isinstance(key, str) for key in inner_report.keys()):
+            return False
+
+        if any(not isinstance(value, tuple(allowed_inner_dict_values_types)) for value in inner_report.values()):
+            return False
+
+        return True
+    except Exception:
+        return False
+
+
+def __legacy_csp_report(i: int) -> dict[str, Any]:
+    return {
+        "document-uri": "https://127.0.0.1:8000/",
+        "referrer": "",
+        "violated-directive": "script-src-elem",
+        "effective-directive": "script-src-elem",
+        "original-policy": "script-src 'nonce-abc' 'strict-dynamic'; object-src 'none'; base-uri 'none'; report-to csp",
+        "disposition": "enforce",
+        "blocked-uri": f"https://cdn.example.com/{i % 50}.js",
+        "status-code": 200,
+        "script-sample": "",
+        "source-file": "https://127.0.0.1:8000/static/js/index.js",
+        "line-number": i % 100,
+        "column-number": 1
+    }
+
+
+def __reporting_api_csp_body(i: int) -> dict[str, Any]:
+    return {
+        "documentURL": "https://127.0.0.1:8000/",
+        "referrer": "",
+        "effectiveDirective": "script-src-elem",
+        "originalPolicy": "script-src 'nonce-abc' 'strict-dynamic'; object-src 'none'; base-uri 'none'; report-to csp",
+        "disposition": "enforce",
+        "blockedURL": f"https://cdn.example.com/{i % 50}.js",
+        "statusCode": 200,
+        "sample": "",
+        "sourceFile": "https://127.0.0.1:8000/static/js/index.js",
+        "lineNumber": i % 100,
+        "columnNumber": 1
+    }
+
+
+def __best_per_call(function: Callable[[], None]) -> float:
+    return min(repeat(function, number=ITERATIONS, repeat=REPEATS)) / ITERATIONS * 1e3
+
+
+if __name__ == "__main__":
+    main()
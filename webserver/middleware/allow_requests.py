@@ -2,25 +2,51 @@ from django.http import HttpRequest, HttpResponse
 from django.http.request import HttpHeaders
 
 from webserver.web_agent_server.views import handler403
+from webserver.web_agent_server.metrics.metrics_registry import MetricsRegistry
 
-from typing import Optional, Callable
+from typing import Optional, Callable, Awaitable
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 
 
 class AllowRequestsMiddleware():
-    def __init__(self, get_response: Callable[..., HttpResponse]) -> None:
+    sync_capable: bool = True
+    async_capable: bool = True
+
+    def __init__(self, get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]]) -> None:
         self.__sec_fetch_site: str = "sec-fetch-site"
         self.__sec_fetch_mode: str = "sec-fetch-mode"
         self.__sec_fetch_dest: str = "sec-fetch-dest"
-        self.__get_response: Callable[..., HttpResponse] = get_response
+        self.__get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]] = get_response
+        self.__is_async: bool = iscoroutinefunction(get_response)
 
-    def __call__(self, request: HttpRequest) -> Optional[HttpResponse]:
-        if request.method is None or not self.__allow_request(request.method, request.headers, request.path):
-            print(f"Request blocked: {request.method} {request.path} {request.headers}")
+        # Native coroutine when the rest of the chain is async, so that requests are not moved to a thread.
+        if self.__is_async:
+            markcoroutinefunction(self)
 
-            return handler403(request=request)
+    def __call__(self, request: HttpRequest) -> Optional[HttpResponse] | Awaitable[Optional[HttpResponse]]:
+        if self.__is_async:
+            return self.__acall__(request)
+        elif self.__is_blocked(request):
+            return self.__block(request)
         else:
             return self.__get_response(request)
 
+    async def __acall__(self, request: HttpRequest) -> Optional[HttpResponse]:
+        if self.__is_blocked(request):
+            return self.__block(request)
+        else:
+            return await self.__get_response(request)
+
+    def __is_blocked(self, request: HttpRequest) -> bool:
+        return request.method is None or not self.__allow_request(request.method, request.headers, request.path)
+
+    def __block(self, request: HttpRequest) -> HttpResponse:
+        print(f"Request blocked: {request.method} {request.path} {request.headers}")
+
+        MetricsRegistry.increment("blocked_requests")
+
+        return handler403(request=request)
+
     def __allow_request(self, method: Optional[str], headers: HttpHeaders, path: str) -> bool:
         assert method is not None
 
@@ -1,15 +1,30 @@
 from django.http import HttpRequest, HttpResponse
 
-from typing import Optional, Callable
+from typing import Optional, Callable, Awaitable
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 
 
 class CookieFlagsMiddleware():
-    def __init__(self, get_response: Callable[..., HttpResponse]) -> None:
-        self.__get_response: Callable[..., HttpResponse] = get_response
+    sync_capable: bool = True
+    async_capable: bool = True
 
-    def __call__(self, request: HttpRequest) -> Optional[HttpResponse]:
-        response: HttpResponse = self.__get_response(request)
+    def __init__(self, get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]]) -> None:
+        self.__get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]] = get_response
+        self.__is_async: bool = iscoroutinefunction(get_response)
 
+        if self.__is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Optional[HttpResponse] | Awaitable[Optional[HttpResponse]]:
+        if self.__is_async:
+            return self.__acall__(request)
+        else:
+            return self.__set_cookie_flags(self.__get_response(request))
+
+    async def __acall__(self, request: HttpRequest) -> Optional[HttpResponse]:
+        return self.__set_cookie_flags(await self.__get_response(request))
+
+    def __set_cookie_flags(self, response: HttpResponse) -> HttpResponse:
         for cookie in response.cookies.values():
             cookie["httponly"] = True
             cookie["samesite"] = "Strict"
@@ -1,22 +1,31 @@
-from django.http import HttpRequest, HttpResponse, FileResponse, JsonResponse
+from django.http import HttpRequest, HttpResponse, FileResponse, JsonResponse, StreamingHttpResponse
 from django.template.response import TemplateResponse
 from django.conf import settings
 
-from webserver.web_agent_server.csp.csp import CSP
+from webserver.web_agent_server.csp.csp import CSP, CompiledCSP
 from webserver.web_agent_server.csp.xss_mitigating_csp import XSSMitigatingCSP
 from webserver.web_agent_server.csp.dom_xss_mitigating_csp import DOMXSSMitigatingCSP
 from webserver.web_agent_server.csp.exfiltration_mitigating_csp import ExfiltrationMitigatingCSP
 from webserver.web_agent_server.csp.isolation_based_csp import IsolationBasedCSP
 from webserver.web_agent_server.csp.secure_context_csp import SecureContextCSP
 from webserver.web_agent_server.headers.static_subresources_headers import StaticSubResourcesHeaders
+from webserver.web_agent_server.assets.static_responses import StaticAssetResponse
 
-from typing import Optional, Callable
+from typing import Optional, Callable, Awaitable
 from secrets import token_urlsafe
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 
 
 class CSPMiddleware():
-    def __init__(self, get_response: Callable[..., HttpResponse | TemplateResponse | FileResponse]) -> None:
-        self.__get_response: Callable[..., HttpResponse | TemplateResponse | FileResponse] = get_response
+    sync_capable: bool = True
+    async_capable: bool = True
+
+    # There is a single instance of the middleware per process, and requests are served concurrently, so the nonce belongs to the request.
+    NONCE_ATTRIBUTE: str = "csp_nonce"
+
+    def __init__(self, get_response: Callable[..., HttpResponse | TemplateResponse | FileResponse | Awaitable[HttpResponse | TemplateResponse | FileResponse]]) -> None:
+        self.__get_response: Callable[..., HttpResponse | TemplateResponse | FileResponse | Awaitable[HttpResponse | TemplateResponse | FileResponse]] = get_response
+        self.__is_async: bool = iscoroutinefunction(get_response)
         self.__csps: list[CSP] = [
             XSSMitigatingCSP(report_to=settings.REPORT_TO_ACTIVE),
             DOMXSSMitigatingCSP(report_to=settings.REPORT_TO_ACTIVE),
@@ -24,30 +33,58 @@ class CSPMiddleware():
             IsolationBasedCSP(report_to=settings.REPORT_TO_ACTIVE),
             SecureContextCSP()
         ]
+        self.__compiled_csp: CompiledCSP = CompiledCSP(csps=self.__csps)
+        self.__sandbox_csp: str = f"sandbox;{StaticSubResourcesHeaders.get_csp_report_directive(report_to=settings.REPORT_TO_ACTIVE, report_uri=not settings.REPORT_TO_ACTIVE)}"
+
+        if self.__is_async:
+            markcoroutinefunction(self)
+
+            # Django looks this hook up on the instance: when the chain is async, the coroutine flavour spares a thread hop for each template response.
+            self.process_template_response = self.__aprocess_template_response  # type: ignore[method-assign]
+
+    def __call__(self, request: HttpRequest) -> Optional[HttpResponse | TemplateResponse | FileResponse] | Awaitable[Optional[HttpResponse | TemplateResponse | FileResponse]]:
+        if self.__is_async:
+            return self.__acall__(request)
 
-    def __call__(self, request: HttpRequest) -> Optional[HttpResponse | TemplateResponse | FileResponse]:
-        self.__nonce: str = f"{token_urlsafe(32)}"
+        CSPMiddleware.__set_nonce(request)
 
-        response: HttpResponse | TemplateResponse | FileResponse = self.__get_response(request)
+        return self.__set_csp(request, self.__get_response(request))
 
+    async def __acall__(self, request: HttpRequest) -> Optional[HttpResponse | TemplateResponse | FileResponse]:
+        CSPMiddleware.__set_nonce(request)
+
+        return self.__set_csp(request, await self.__get_response(request))
+
+    @staticmethod
+    def __set_nonce(request: HttpRequest) -> None:
+        setattr(request, CSPMiddleware.NONCE_ATTRIBUTE, f"{token_urlsafe(32)}")
+
+    @staticmethod
+    def get_nonce(request: HttpRequest) -> str:
+        return getattr(request, CSPMiddleware.NONCE_ATTRIBUTE)
+
+    def __set_csp(self, request: HttpRequest, response: HttpResponse | TemplateResponse | FileResponse) -> HttpResponse | TemplateResponse | FileResponse:
         if isinstance(response, TemplateResponse) and response.context_data:
-            response.context_data["nonce_value"] = self.__nonce
+            response.context_data["nonce_value"] = CSPMiddleware.get_nonce(request)
 
-        if isinstance(response, (FileResponse, JsonResponse)):
-            response["Content-Security-Policy"] = f"sandbox;{StaticSubResourcesHeaders.get_csp_report_directive(report_to=settings.REPORT_TO_ACTIVE, report_uri=not settings.REPORT_TO_ACTIVE)}"
+        if isinstance(response, (StreamingHttpResponse, JsonResponse, StaticAssetResponse)):
+            response["Content-Security-Policy"] = self.__sandbox_csp
         else:
-            response["Content-Security-Policy"] = self.__generate_csp()
+            response["Content-Security-Policy"] = self.__generate_csp(request)
 
         return response
 
-    def process_template_response(self, _: HttpRequest, response: TemplateResponse) -> HttpResponse:
+    def process_template_response(self, request: HttpRequest, response: TemplateResponse) -> HttpResponse:
         if response.context_data:
-            response.context_data["nonce_value"] = self.__nonce
+            response.context_data["nonce_value"] = CSPMiddleware.get_nonce(request)
 
-        response["Content-Security-Policy"] = self.__generate_csp()
+        response["Content-Security-Policy"] = self.__generate_csp(request)
 
         return response
 
-    def __generate_csp(self) -> str:
-        # Multiple indpendently enforced CSPs are separated by a comma.
-        return ", ".join([f"{csp_.generate(nonce=self.__nonce)}" for csp_ in self.__csps])
+    async def __aprocess_template_response(self, request: HttpRequest, response: TemplateResponse) -> HttpResponse:
+        # The class attribute, as the instance one is this very method.
+        return CSPMiddleware.process_template_response(self, request, response)
+
+    def __generate_csp(self, request: HttpRequest) -> str:
+        return self.__compiled_csp.render(nonce=CSPMiddleware.get_nonce(request))
@@ -0,0 +1,56 @@
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponse
+from django.conf import settings
+
+from webserver.web_agent_server import views
+from webserver.web_agent_server.headers.security_headers_policy import SecurityHeadersPolicy
+from webserver.web_agent_server.metrics.stage_timer import StageTimer
+
+from typing import Callable, Awaitable, Optional
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+class FastPathMiddleware():
+    sync_capable: bool = True
+    async_capable: bool = True
+
+    # The static files, the favicon, the metrics and the reporting endpoints need neither the sessions, nor the CSRF protection (the endpoints are exempt), nor the users, nor the messages.
+    # Placed after `AllowRequestsMiddleware` and `CSPMiddleware`, this middleware calls their views directly, without the rest of the chain nor the URL resolver,
+    # and only does what the skipped middlewares would have done to their responses.
+    def __init__(self, get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]]) -> None:
+        # The views are coroutines: in a sync chain (i.e., under WSGI), the full chain serves them.
+        if not settings.FAST_PATH_ACTIVE or not iscoroutinefunction(get_response):
+            raise MiddlewareNotUsed()
+
+        self.__get_response: Callable[..., Awaitable[HttpResponse]] = get_response
+        self.__static_url: str = settings.STATIC_URL
+        self.__routes: dict[str, Callable[[HttpRequest], Awaitable[HttpResponse]]] = {"/favicon.ico": views.favicon, settings.METRICS_URL: views.metrics} | {
+            reporting_endpoint: getattr(views, reporting_endpoint[1:].replace("-", "_")) for reporting_endpoint in settings.REPORTING_ENDPOINTS.values()
+        }
+        self.__policy: SecurityHeadersPolicy = SecurityHeadersPolicy()
+
+        markcoroutinefunction(self)
+
+    async def __call__(self, request: HttpRequest) -> HttpResponse:
+        path: str = request.path_info
+        view: Optional[Callable[[HttpRequest], Awaitable[HttpResponse]]] = views.static_files if path.startswith(self.__static_url) else self.__routes.get(path)
+
+        if view is None:
+            return await self.__get_response(request)
+
+        # As `CommonMiddleware` would: a disallowed `Host` raises `DisallowedHost`, which Django turns into a 400.
+        request.get_host()
+
+        try:
+            with StageTimer.stage("view"):
+                response: HttpResponse = await view(request)
+        except Exception:
+            # As `InternalServerErrorMiddleware` would.
+            response = views.handler500(request=request)
+
+        # As `CommonMiddleware` would.
+        if not response.streaming and not response.has_header("Content-Length"):
+            response["Content-Length"] = str(len(response.content))
+
+        # The same headers as `SecurityHeadersMiddleware`'s.
+        return SecurityHeadersPolicy.apply_headers(response, self.__policy.get_header_items(request))
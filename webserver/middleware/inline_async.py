@@ -0,0 +1,89 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpRequest, HttpResponse
+from django.middleware.security import SecurityMiddleware
+from django.middleware.common import CommonMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+
+from typing import Any, Callable, Awaitable, Optional
+
+
+# When the chain is async, Django's `MiddlewareMixin` moves `process_request` and `process_response` to a thread, and so does Django itself with `process_view`.
+# That is two or three thread hops per middleware and per request.
+# In Web-Agent, the hooks of the middlewares below never block (the sessions are never modified, the messages are never used, and the user is never loaded),
+# so they are run on the event loop instead.
+class InlineAsyncMiddlewareMixin():
+    INLINED_HOOKS: tuple[str, ...] = ("process_request", "process_view", "process_response")
+    # The only hooks that may be run on the event loop, by the class that defines them: any other one (e.g., of a subclass, or added by a new Django) is refused.
+    NON_BLOCKING_HOOKS: dict[type, frozenset[str]] = {
+        SecurityMiddleware: frozenset(["process_request", "process_response"]),
+        SessionMiddleware: frozenset(["process_request", "process_response"]),
+        CommonMiddleware: frozenset(["process_request", "process_response"]),
+        CsrfViewMiddleware: frozenset(["process_request", "process_view", "process_response"]),
+        AuthenticationMiddleware: frozenset(["process_request"]),
+        MessageMiddleware: frozenset(["process_request", "process_response"])
+    }
+
+    def __init__(self, get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]]) -> None:
+        super(InlineAsyncMiddlewareMixin, self).__init__(get_response)  # type: ignore[call-arg]
+
+        if not getattr(self, "async_mode", False):
+            return
+
+        for hook in InlineAsyncMiddlewareMixin.INLINED_HOOKS:
+            if not hasattr(self, hook):
+                continue
+
+            owner: type = next(cls for cls in type(self).__mro__ if hook in cls.__dict__)
+
+            if hook not in InlineAsyncMiddlewareMixin.NON_BLOCKING_HOOKS.get(owner, frozenset()):
+                raise ImproperlyConfigured(f"{owner.__name__}.{hook} is not known to be non-blocking, so {type(self).__name__} cannot run it on the event loop.")
+
+        if hasattr(self, "process_view"):
+            self.process_view = InlineAsyncMiddlewareMixin.__make_async_process_view(self.process_view)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        response: Optional[HttpResponse] = None
+
+        if hasattr(self, "process_request"):
+            response = self.process_request(request)
+
+        response = response or await self.get_response(request)  # type: ignore[attr-defined]
+
+        if hasattr(self, "process_response"):
+            response = self.process_response(request, response)
+
+        return response
+
+    @staticmethod
+    def __make_async_process_view(process_view: Callable[..., Optional[HttpResponse]]) -> Callable[..., Awaitable[Optional[HttpResponse]]]:
+        async def async_process_view(request: HttpRequest, view_func: Callable[..., Any], view_args: tuple[Any, ...], view_kwargs: dict[str, Any]) -> Optional[HttpResponse]:
+            return process_view(request, view_func, view_args, view_kwargs)
+
+        return async_process_view
+
+
+class InlineSecurityMiddleware(InlineAsyncMiddlewareMixin, SecurityMiddleware):
+    pass
+
+
+class InlineSessionMiddleware(InlineAsyncMiddlewareMixin, SessionMiddleware):
+    pass
+
+
+class InlineCommonMiddleware(InlineAsyncMiddlewareMixin, CommonMiddleware):
+    pass
+
+
+class InlineCsrfViewMiddleware(InlineAsyncMiddlewareMixin, CsrfViewMiddleware):
+    pass
+
+
+class InlineAuthenticationMiddleware(InlineAsyncMiddlewareMixin, AuthenticationMiddleware):
+    pass
+
+
+class InlineMessageMiddleware(InlineAsyncMiddlewareMixin, MessageMiddleware):
+    pass
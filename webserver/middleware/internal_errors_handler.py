@@ -1,20 +1,40 @@
 from django.http import HttpRequest, HttpResponse
-from django.template.response import TemplateResponse
 
 from webserver.web_agent_server.views import handler500
 
-from typing import Callable
+from typing import Callable, Awaitable
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 
 
 class InternalServerErrorMiddleware():
-    def __init__(self, get_response: Callable[..., HttpResponse]) -> None:
-        self.__get_response: Callable[..., HttpResponse] = get_response
+    sync_capable: bool = True
+    async_capable: bool = True
+
+    def __init__(self, get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]]) -> None:
+        self.__get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]] = get_response
+        self.__is_async: bool = iscoroutinefunction(get_response)
+
+        if self.__is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse | Awaitable[HttpResponse]:
+        if self.__is_async:
+            return self.__acall__(request)
 
-    def __call__(self, request: HttpRequest) -> HttpResponse:
         try:
             return self.__get_response(request)
         except Exception:
-            return handler500(request=request)
+            return InternalServerErrorMiddleware.__internal_server_error(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        try:
+            return await self.__get_response(request)
+        except Exception:
+            return InternalServerErrorMiddleware.__internal_server_error(request)
+
+    def process_exception(self, request: HttpRequest, _: Exception) -> HttpResponse:
+        return handler500(request=request)
 
-    def process_exception(self, request: HttpRequest, _: Exception) -> TemplateResponse:
-        return handler500(request=request)
\ No newline at end of file
+    @staticmethod
+    def __internal_server_error(request: HttpRequest) -> HttpResponse:
+        return handler500(request=request)
@@ -1,27 +1,32 @@
 from django.http import HttpRequest, HttpResponse
-from django.conf import settings
 
-from webserver.web_agent_server.headers.document_headers import DocumentHeaders
-from webserver.web_agent_server.headers.static_subresources_headers import StaticSubResourcesHeaders
+from webserver.web_agent_server.headers.security_headers_policy import SecurityHeadersPolicy
 
-from typing import Callable, Any
+from typing import Callable, Awaitable
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 
 
 class SecurityHeadersMiddleware():
-    def __init__(self, get_response: Callable[..., HttpResponse]) -> None:
-        self.__get_response: Callable[..., HttpResponse] = get_response
+    sync_capable: bool = True
+    async_capable: bool = True
 
-    def __call__(self, request: HttpRequest) -> HttpResponse:
-        headers: dict[str, Any] = self.__load_headers(request)
-        response: HttpResponse = self.__get_response(request)
+    def __init__(self, get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]]) -> None:
+        self.__get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]] = get_response
+        self.__is_async: bool = iscoroutinefunction(get_response)
+        self.__policy: SecurityHeadersPolicy = SecurityHeadersPolicy()
 
-        for header, value in headers.items():
-            response[header] = value
+        if self.__is_async:
+            markcoroutinefunction(self)
 
-        return response
+    def __call__(self, request: HttpRequest) -> HttpResponse | Awaitable[HttpResponse]:
+        if self.__is_async:
+            return self.__acall__(request)
 
-    def __load_headers(self, request: HttpRequest) -> dict[str, Any]:
-        if request.path.startswith(settings.STATIC_URL) or request.path == "/favicon.ico":
-            return StaticSubResourcesHeaders.get_headers(request=request)
-        else:
-            return DocumentHeaders.get_headers(request=request, report_to=settings.REPORT_TO_ACTIVE, report_uri=not settings.REPORT_TO_ACTIVE)
+        headers: tuple[tuple[str, str], ...] = self.__policy.get_header_items(request)
+
+        return SecurityHeadersPolicy.apply_headers(self.__get_response(request), headers)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        headers: tuple[tuple[str, str], ...] = self.__policy.get_header_items(request)
+
+        return SecurityHeadersPolicy.apply_headers(await self.__get_response(request), headers)
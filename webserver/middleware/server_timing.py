@@ -0,0 +1,94 @@
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponse
+from django.conf import settings
+
+from webserver.web_agent_server.metrics.stage_timer import StageTimer, StageTimings
+from webserver.web_agent_server.metrics.metrics_registry import MetricsRegistry
+
+from typing import Callable, Awaitable, Optional
+from contextvars import Token
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+class ServerTimingMiddleware():
+    sync_capable: bool = True
+    async_capable: bool = True
+    # Set in the ASGI scope of the requests that are not traffic (e.g., those of `worker.warm_up`): they are neither timed into the histograms nor counted.
+    WARM_UP_SCOPE_KEY: str = "web_agent.warm_up"
+
+    # The outermost middleware: it times (and counts, per route) the whole request, while `WebAgentASGIHandler` times each of the other middlewares and the view as a stage.
+    def __init__(self, get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]]) -> None:
+        if not settings.REQUEST_TIMING_ACTIVE:
+            raise MiddlewareNotUsed()
+
+        self.__get_response: Callable[..., HttpResponse | Awaitable[HttpResponse]] = get_response
+        self.__is_async: bool = iscoroutinefunction(get_response)
+        self.__header_active: bool = settings.SERVER_TIMING_HEADER_ACTIVE
+        self.__slow_threshold: Optional[float] = settings.REQUEST_TIMING_SLOW_THRESHOLD
+        self.__static_url: str = settings.STATIC_URL
+        # The requests are counted per route, rather than per path, so that the metrics stay bounded whatever the clients ask for.
+        self.__routes: dict[str, str] = {"/": "index", "/favicon.ico": "favicon", settings.METRICS_URL: "metrics"} | {
+            reporting_endpoint: reporting_endpoint[1:] for reporting_endpoint in settings.REPORTING_ENDPOINTS.values()
+        }
+
+        if self.__is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse | Awaitable[HttpResponse]:
+        if self.__is_async:
+            return self.__acall__(request)
+
+        token: Token[Optional[StageTimings]] = StageTimer.start()
+
+        try:
+            response: HttpResponse = self.__get_response(request)
+        finally:
+            timings: StageTimings = StageTimer.finish(token, record=not ServerTimingMiddleware.__is_warm_up(request))
+
+        return self.__report(request, response, timings)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        token: Token[Optional[StageTimings]] = StageTimer.start()
+
+        try:
+            response: HttpResponse = await self.__get_response(request)
+        finally:
+            timings: StageTimings = StageTimer.finish(token, record=not ServerTimingMiddleware.__is_warm_up(request))
+
+        return self.__report(request, response, timings)
+
+    def __report(self, request: HttpRequest, response: HttpResponse, timings: StageTimings) -> HttpResponse:
+        total: float = timings.get_total()
+
+        if not ServerTimingMiddleware.__is_warm_up(request):
+            route: str = self.__get_route(request.path_info)
+
+            MetricsRegistry.increment("requests", (("route", route), ("status", str(response.status_code))))
+            MetricsRegistry.observe("request_duration", (("route", route),), total)
+
+        if self.__header_active or (self.__slow_threshold is not None and total >= self.__slow_threshold):
+            server_timing: str = ServerTimingMiddleware.__get_server_timing(timings, total)
+
+            if self.__header_active:
+                response["Server-Timing"] = server_timing
+
+            if self.__slow_threshold is not None and total >= self.__slow_threshold:
+                print(f"Slow request: {request.method} {request.path} {response.status_code} {server_timing}")
+
+        return response
+
+    # Only the ASGI requests have a scope.
+    @staticmethod
+    def __is_warm_up(request: HttpRequest) -> bool:
+        return getattr(request, "scope", {}).get(ServerTimingMiddleware.WARM_UP_SCOPE_KEY, False)
+
+    def __get_route(self, path: str) -> str:
+        if path.startswith(self.__static_url):
+            return "static"
+        else:
+            return self.__routes.get(path, "other")
+
+    # E.g., `CSPMiddleware;dur=0.052, view;dur=0.231, total;dur=0.493` (in milliseconds).
+    @staticmethod
+    def __get_server_timing(timings: StageTimings, total: float) -> str:
+        return ", ".join(f"{name};dur={duration * 1e3:.3f}" for name, duration in (*timings.get_durations().items(), (StageTimer.TOTAL_STAGE, total)))
@@ -0,0 +1,32 @@
+from django.core.handlers.asgi import ASGIHandler
+
+from webserver.webserver.asgi import application
+
+from typing import Any
+from asyncio import get_running_loop
+
+
+# Drives the ASGI application as a server would: the body is sent in `chunks`, and no `content-length` is added.
+async def asgi_request(method: str, path: str, headers: list[tuple[bytes, bytes]]=[], chunks: list[bytes]=[], handler: ASGIHandler=application) -> tuple[int, dict[bytes, bytes], bytes]:
+    scope: dict[str, Any] = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"localhost"), *headers], "client": ("127.0.0.1", 50000), "server": ("localhost", 8000)
+    }
+    messages: list[dict[str, Any]] = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks] + [{"type": "http.request", "body": b"", "more_body": False}]
+    sent: list[dict[str, Any]] = []
+
+    # Django listens for a disconnect while the response is computed: the client never leaves.
+    async def receive() -> dict[str, Any]:
+        if messages:
+            return messages.pop(0)
+
+        return await get_running_loop().create_future()
+
+    async def send(message: dict[str, Any]) -> None:
+        sent.append(message)
+
+    await handler(scope, receive, send)
+
+    start: dict[str, Any] = next(message for message in sent if message["type"] == "http.response.start")
+
+    return start["status"], {name.lower(): value for name, value in start["headers"]}, b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
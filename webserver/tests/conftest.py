@@ -0,0 +1,37 @@
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "webserver.webserver.settings")
+
+import django
+
+django.setup()
+
+from django.test import AsyncClient
+from django.test.utils import setup_test_environment
+
+from webserver.web_agent_server.csp.reports import ReportsLogs
+from webserver.web_agent_server.views import REPORTS_QUEUE
+
+from typing import Iterator
+import pytest
+
+
+# E.g., `testserver` is then an allowed host.
+setup_test_environment()
+
+
+@pytest.fixture(autouse=True)
+def empty_reports_logs() -> Iterator[None]:
+    # The reports a previous test left in the queue would be written during this one.
+    REPORTS_QUEUE.flush()
+
+    for name in ("csp", "coop", "coep"):
+        getattr(ReportsLogs, f"{name}_reports").clear()
+        getattr(ReportsLogs, f"{name}_aggregates").clear()
+
+    yield
+
+
+@pytest.fixture
+def client() -> AsyncClient:
+    return AsyncClient()
@@ -0,0 +1,27 @@
+from .asgi_client import asgi_request
+
+from asyncio import gather, run
+from re import Pattern, compile as re_compile
+
+
+PAGE_NONCES_PATTERN: Pattern[bytes] = re_compile(rb'nonce="?([A-Za-z0-9_+/=-]+)')
+HEADER_NONCE_PATTERN: Pattern[bytes] = re_compile(rb"'nonce-([A-Za-z0-9_+/=-]+)'")
+
+
+# Each page is rendered while the others are: every nonce in a page must be the one in its own `Content-Security-Policy` header.
+def test_concurrent_pages_get_their_own_nonce() -> None:
+    async def get_pages() -> list[tuple[int, dict[bytes, bytes], bytes]]:
+        return await gather(*[asgi_request("GET", path) for path in ["/", "/not-found"] * 100])
+
+    header_nonces: set[bytes] = set()
+
+    for status, headers, body in run(get_pages()):
+        header_nonce: list[bytes] = HEADER_NONCE_PATTERN.findall(headers[b"content-security-policy"])
+        page_nonces: set[bytes] = set(PAGE_NONCES_PATTERN.findall(body))
+
+        assert status in (200, 404)
+        assert len(header_nonce) > 0 and page_nonces == {header_nonce[0]}
+
+        header_nonces.add(header_nonce[0])
+
+    assert len(header_nonces) == 200
@@ -0,0 +1,24 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpRequest, HttpResponse
+
+from webserver.middleware.inline_async import InlineCommonMiddleware, InlineCsrfViewMiddleware
+
+from typing import Optional
+import pytest
+
+
+async def get_response(request: HttpRequest) -> HttpResponse:
+    return HttpResponse()
+
+
+def test_known_hooks_are_inlined() -> None:
+    InlineCsrfViewMiddleware(get_response)
+
+
+def test_unknown_hook_is_refused() -> None:
+    class BlockingMiddleware(InlineCommonMiddleware):
+        def process_request(self, request: HttpRequest) -> Optional[HttpResponse]:
+            return None
+
+    with pytest.raises(ImproperlyConfigured):
+        BlockingMiddleware(get_response)
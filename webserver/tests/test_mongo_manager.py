@@ -0,0 +1,97 @@
+from django.test import override_settings
+
+from webserver.web_agent_server.database.mongo_manager import MongoManager
+from webserver.web_agent_server.database.mongo_reports_documents import MongoReportsDocuments
+from webserver.web_agent_server.csp.report_aggregation import ReportAggregator
+from webserver.web_agent_server.csp.reports_query import ReportsQuery
+from webserver.web_agent_server.csp.reports_store import ReportsStore
+
+from typing import Any, Iterator
+from time import time_ns
+import mongomock
+import pytest
+
+
+DB_DATA: dict[str, str|int] = {
+    "db_name": "web_agent", "retention": "ttl", "reports_ttl": 60, "aggregates_ttl": 3600, "max_reports": 100, "max_reports_size": 1 << 20,
+    **{f"{report_type}_{kind}_collection": f"{report_type}_{kind}" for report_type in ("csp", "coop", "coep") for kind in ("reports", "aggregates")}
+}
+
+
+@pytest.fixture
+def manager(monkeypatch: pytest.MonkeyPatch) -> Iterator[MongoManager]:
+    add_update: Any = mongomock.collection.BulkOperationBuilder.add_update
+
+    # pymongo 4.9+ passes a `sort` to the bulk builders, which mongomock does not know yet.
+    def add_update_without_sort(self: Any, *args: Any, sort: Any=None, **kwargs: Any) -> Any:
+        return add_update(self, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection.BulkOperationBuilder, "add_update", add_update_without_sort)
+
+    yield MongoManager(client=mongomock.MongoClient(), db_data=DB_DATA)
+
+
+def csp_report(line: int) -> dict[str, Any]:
+    return {"csp-report": {"violated-directive": "script-src", "blocked-uri": "inline", "document-uri": "https://example.com/", "line-number": line}}
+
+
+def test_aggregates_are_upserted(manager: MongoManager) -> None:
+    # Recent times: mongomock expires the aggregates too.
+    now: int = time_ns()
+    first: list[dict[str, Any]] = ReportAggregator.aggregate("csp", [csp_report(1), csp_report(1), csp_report(2)], [now + 10, now + 30, now + 20])
+    second: list[dict[str, Any]] = ReportAggregator.aggregate("csp", [csp_report(1), csp_report(3)], [now + 5, now + 40])
+
+    assert manager.add_csp_aggregates(first) == {first[0]["fingerprint"], first[1]["fingerprint"]}
+    assert manager.add_csp_aggregates(second) == {second[1]["fingerprint"]}
+
+    aggregates: list[dict[str, Any]] = manager.get_csp_aggregates()
+
+    assert [(aggregate["count"], aggregate["first_seen"], aggregate["last_seen"]) for aggregate in aggregates] == [(3, now + 5, now + 30), (1, now + 20, now + 20), (1, now + 40, now + 40)]
+    assert aggregates[0]["sample"] == csp_report(1) and "last_seen_at" not in aggregates[0]
+
+
+def test_aggregates_expire(manager: MongoManager) -> None:
+    manager.add_csp_aggregates(ReportAggregator.aggregate("csp", [csp_report(1)]))
+
+    indexes: dict[str, Any] = manager.get_csp_aggregates_collection().index_information()
+
+    assert [index.get("expireAfterSeconds") for index in indexes.values() if list(index["key"]) == [("last_seen_at", 1)]] == [3600]
+
+
+def test_reports_are_stamped_and_read_newest_first(manager: MongoManager) -> None:
+    assert manager.add_csp_reports([csp_report(line) for line in range(3)]) == 3
+    manager.add_csp_report(csp_report(3))
+
+    reports: list[dict[str, Any]] = manager.get_csp_reports()
+    timestamps: list[int] = [report[ReportsQuery.TIMESTAMP_KEY] for report in reports]
+
+    assert [report["csp-report"]["line-number"] for report in reports] == [3, 2, 1, 0]
+    assert timestamps == sorted(set(timestamps), reverse=True)
+    assert all("_id" not in report and "created_at" not in report for report in reports)
+
+
+def test_ttl_retention_expires_the_reports(manager: MongoManager) -> None:
+    manager.add_csp_reports([csp_report(0)])
+
+    indexes: dict[str, Any] = manager.get_csp_reports_collection().index_information()
+
+    assert [index.get("expireAfterSeconds") for index in indexes.values() if list(index["key"]) == [("created_at", 1)]] == [60]
+
+
+def test_unknown_retention_is_refused() -> None:
+    with pytest.raises(ValueError):
+        MongoReportsDocuments.get_retention({**DB_DATA, "retention": "forever"})
+
+    assert MongoReportsDocuments.get_capped_options({**DB_DATA, "retention": "capped"}) == {"capped": True, "size": 1 << 20, "max": 100}
+
+
+@pytest.mark.parametrize("duplicates, stored", [(True, [0, 0, 1]), (False, [0, 1])])
+def test_store_adds_the_reports_and_their_aggregates(manager: MongoManager, monkeypatch: pytest.MonkeyPatch, duplicates: bool, stored: list[int]) -> None:
+    monkeypatch.setattr(ReportsStore, "_ReportsStore__backend", manager)
+    monkeypatch.setattr(ReportsStore, "_ReportsStore__backend_is_async", False)
+
+    with override_settings(REPORTS_STORE_DUPLICATES=duplicates):
+        assert ReportsStore.add_reports("csp", [csp_report(0), csp_report(0), csp_report(1)]) == len(stored)
+
+    assert sorted(report["csp-report"]["line-number"] for report in manager.get_csp_reports()) == stored
+    assert [aggregate["count"] for aggregate in manager.get_csp_aggregates()] == [2, 1]
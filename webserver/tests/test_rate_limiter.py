@@ -0,0 +1,29 @@
+from django.core.cache import caches
+
+from webserver.web_agent_server.csp.rate_limiter import TokenBucketRateLimiter, CacheTokenBucketRateLimiter
+
+import asyncio
+import pytest
+
+
+@pytest.fixture(params=["memory", "cache"])
+def limiter(request: pytest.FixtureRequest) -> TokenBucketRateLimiter:
+    if request.param == "memory":
+        return TokenBucketRateLimiter(rate=0.001, burst=10, max_keys=100)
+    else:
+        caches["default"].clear()
+
+        return CacheTokenBucketRateLimiter(rate=0.001, burst=10, max_keys=100, cache_alias="default")
+
+def test_refused_batch_takes_no_tokens(limiter: TokenBucketRateLimiter) -> None:
+    assert limiter.allow("b", 8)
+    # `b` has 2 tokens left: the batch is refused, and `a` keeps its 10 tokens.
+    assert not limiter.allow_all({"a": 6, "b": 3})
+    assert limiter.allow_all({"a": 10, "b": 2})
+    assert not limiter.allow("a")
+    assert not limiter.allow("b")
+
+def test_refused_batch_takes_no_tokens_asynchronously(limiter: TokenBucketRateLimiter) -> None:
+    assert asyncio.run(limiter.aallow("b", 8))
+    assert not asyncio.run(limiter.aallow_all({"a": 6, "b": 3}))
+    assert asyncio.run(limiter.aallow_all({"a": 10, "b": 2}))
@@ -0,0 +1,24 @@
+from webserver.web_agent_server.csp.report_aggregation import ReportAggregator
+from webserver.web_agent_server.csp.reports_store import ReportsStore
+from webserver.web_agent_server.views import REPORTS_QUEUE
+
+from typing import Any
+from time import time_ns
+
+
+def test_reports_are_seen_when_enqueued() -> None:
+    REPORTS_QUEUE.enqueue("csp", {"csp-report": {"violated-directive": "script-src", "blocked-uri": "inline"}})
+    flushed: int = time_ns()
+    REPORTS_QUEUE.flush()
+
+    aggregate: dict[str, Any] = ReportsStore.get_aggregates("csp")[0]
+
+    assert aggregate["first_seen"] == aggregate["last_seen"] < flushed
+
+def test_coop_fingerprint_ignores_the_documents() -> None:
+    report: dict[str, Any] = {"type": "navigation-to-response", "disposition": "enforce", "effective-policy": "same-origin"}
+    first: dict[str, Any] = {"coop-report": {**report, "document-uri": "https://example.com/a", "previous-response-url": "https://example.org/"}}
+    second: dict[str, Any] = {"coop-report": {**report, "document-uri": "https://example.com/b", "previous-response-url": "https://example.net/"}}
+
+    assert ReportAggregator.get_fingerprint("coop", first) == ReportAggregator.get_fingerprint("coop", second)
+    assert ReportAggregator.get_fingerprint("coop", first) != ReportAggregator.get_fingerprint("coop", {"coop-report": {**report, "disposition": "reporting"}})
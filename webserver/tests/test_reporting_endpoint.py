@@ -0,0 +1,22 @@
+from .asgi_client import asgi_request
+
+from django.conf import settings
+
+from asyncio import run
+from json import dumps
+
+
+def test_chunked_body_over_the_limit_is_rejected() -> None:
+    chunk: bytes = b" " * (64 * 1024)
+    count: int = settings.REPORTS_MAX_BODY_SIZE // len(chunk) + 1
+
+    status, _, _ = run(asgi_request("POST", "/csp-endpoint", [(b"content-type", b"application/csp-report")], [chunk] * count))
+
+    assert status == 413
+
+def test_chunked_body_under_the_limit_is_accepted() -> None:
+    report: bytes = dumps({"csp-report": {"violated-directive": "script-src", "blocked-uri": "inline", "document-uri": "https://example.com/"}}).encode()
+
+    status, _, _ = run(asgi_request("POST", "/csp-endpoint", [(b"content-type", b"application/csp-report")], [report[:10], report[10:]]))
+
+    assert status == 204
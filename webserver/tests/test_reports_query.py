@@ -0,0 +1,66 @@
+from webserver.web_agent_server.views import REPORTS_QUEUE
+
+from django.test import AsyncClient
+
+from typing import Any, Optional
+from asyncio import run
+from json import loads
+
+
+def add_reports(count: int, first: int=0) -> None:
+    for line in range(first, first + count):
+        REPORTS_QUEUE.enqueue("csp", {"csp-report": {"violated-directive": "script-src", "blocked-uri": "inline", "document-uri": f"https://example.com/{line}", "line-number": line}})
+
+    REPORTS_QUEUE.flush()
+
+
+async def get_page(client: AsyncClient, parameters: dict[str, Any]) -> tuple[int, Optional[dict[str, Any]]]:
+    response: Any = await client.get("/csp-endpoint", parameters)
+
+    return response.status_code, loads(response.content) if response.status_code == 200 else None
+
+
+def test_following_next_reads_every_report_once(client: AsyncClient) -> None:
+    add_reports(250)
+
+    async def read_all() -> list[int]:
+        lines: list[int] = []
+        status, page = await get_page(client, {"order": "asc", "limit": 100})
+
+        while page is not None and page["reports"]:
+            lines += [report["csp-report"]["line-number"] for report in page["reports"]]
+            status, page = await get_page(client, {"after": page["next"], "limit": 100})
+
+        assert status == 200
+
+        return lines
+
+    assert run(read_all()) == list(range(250))
+
+
+def test_newest_reports_first_without_cursor(client: AsyncClient) -> None:
+    add_reports(10)
+
+    status, page = run(get_page(client, {"limit": 3}))
+
+    assert status == 200 and page is not None
+    assert [report["csp-report"]["line-number"] for report in page["reports"]] == [9, 8, 7]
+    assert page["next"] == str(page["reports"][0]["timestamp"])
+
+
+def test_polling_from_newest_page_sees_new_reports(client: AsyncClient) -> None:
+    add_reports(10)
+
+    _, page = run(get_page(client, {"limit": 3}))
+    add_reports(2, first=10)
+    _, newer = run(get_page(client, {"after": page["next"]}))  # type: ignore[index]
+
+    assert newer is not None and [report["csp-report"]["line-number"] for report in newer["reports"]] == [10, 11]
+
+
+def test_descending_order_after_cursor_is_refused(client: AsyncClient) -> None:
+    add_reports(10)
+
+    status, _ = run(get_page(client, {"order": "desc", "after": "0"}))
+
+    assert status != 200
@@ -0,0 +1,29 @@
+from .asgi_client import asgi_request
+
+from django.conf import settings
+from django.test import override_settings
+
+from webserver.webserver.asgi import WebAgentASGIHandler
+from webserver.web_agent_server.headers.document_headers import DocumentHeaders
+from webserver.web_agent_server.headers.static_subresources_headers import StaticSubResourcesHeaders
+
+from asyncio import run
+import pytest
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/static/css/index.css", StaticSubResourcesHeaders.build_headers(safari=False)),
+    ("/favicon.ico", StaticSubResourcesHeaders.build_headers(safari=False)),
+    ("/csp-endpoint", DocumentHeaders.build_headers(safari=False, report_to=settings.REPORT_TO_ACTIVE, report_uri=not settings.REPORT_TO_ACTIVE)),
+    ("/", DocumentHeaders.build_headers(safari=False, report_to=settings.REPORT_TO_ACTIVE, report_uri=not settings.REPORT_TO_ACTIVE))
+])
+def test_fast_path_and_full_chain_send_the_same_security_headers(path: str, expected: dict[str, str]) -> None:
+    with override_settings(FAST_PATH_ACTIVE=False):
+        full_chain: WebAgentASGIHandler = WebAgentASGIHandler()
+
+    fast_path: WebAgentASGIHandler = WebAgentASGIHandler()
+
+    for handler in (full_chain, fast_path):
+        _, headers, _ = run(asgi_request("GET", path, handler=handler))
+
+        assert {header: headers.get(header.lower().encode(), b"").decode() for header in expected} == {header: str(value) for header, value in expected.items()}
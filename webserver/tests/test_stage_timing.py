@@ -0,0 +1,29 @@
+from .asgi_client import asgi_request
+
+from django.test import override_settings
+
+from webserver.webserver.asgi import WebAgentASGIHandler
+
+from unittest.mock import patch
+from asyncio import run
+import django
+
+
+def get_stages(handler: WebAgentASGIHandler) -> set[str]:
+    _, headers, _ = run(asgi_request("GET", "/not-found", handler=handler))
+
+    return {metric.split(";")[0].strip() for metric in headers[b"server-timing"].decode().split(",")}
+
+
+def test_middlewares_and_view_are_timed() -> None:
+    with override_settings(SERVER_TIMING_HEADER_ACTIVE=True):
+        handler: WebAgentASGIHandler = WebAgentASGIHandler()
+
+    assert {"CSPMiddleware", "SecurityHeadersMiddleware", "view"} <= get_stages(handler)
+
+
+def test_unknown_django_version_is_not_timed_per_stage() -> None:
+    with override_settings(SERVER_TIMING_HEADER_ACTIVE=True), patch.object(django, "VERSION", (9, 0, 0, "final", 0)):
+        handler: WebAgentASGIHandler = WebAgentASGIHandler()
+
+    assert not {"CSPMiddleware", "SecurityHeadersMiddleware", "view"} & get_stages(handler)
@@ -0,0 +1,31 @@
+from webserver.web_agent_server.assets.static_assets import StaticAssetsStore
+
+from pathlib import Path
+from os import utime
+
+
+def create_store(root: Path) -> StaticAssetsStore:
+    return StaticAssetsStore(mounts=[("/static/", root)], max_in_memory_size=1 << 20, max_compressible_size=1 << 20)
+
+
+def test_symlink_loop_is_scanned_once(tmp_path: Path) -> None:
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "index.css").write_text("body {}")
+    (tmp_path / "css" / "loop").symlink_to(tmp_path)
+
+    assert create_store(tmp_path).get_urls() == ["/static/css/index.css"]
+
+
+def test_stale_precompressed_variant_is_ignored(tmp_path: Path) -> None:
+    source: Path = tmp_path / "index.css"
+    precompressed: Path = tmp_path / "index.css.br"
+
+    source.write_text("body { color: red; }" * 100)
+    precompressed.write_bytes(b"precompressed")
+    utime(precompressed, ns=(source.stat().st_mtime_ns - 10 ** 9, source.stat().st_mtime_ns - 10 ** 9))
+
+    assert create_store(tmp_path).get("/static/index.css").get_variant("br") != b"precompressed"
+
+    utime(precompressed, ns=(source.stat().st_mtime_ns + 10 ** 9, source.stat().st_mtime_ns + 10 ** 9))
+
+    assert create_store(tmp_path).get("/static/index.css").get_variant("br") == b"precompressed"
@@ -0,0 +1,300 @@
+from django.utils.http import http_date
+
+from pathlib import Path
+from mimetypes import guess_type
+from gzip import compress as gzip_compress
+from functools import lru_cache
+from hashlib import blake2b, file_digest
+from re import Pattern, compile as re_compile
+from threading import Thread, Event
+from os import scandir, stat_result
+from stat import S_ISDIR, S_ISREG
+from typing import Optional, Callable
+
+try:
+    from brotli import compress as brotli_compress
+except ImportError:
+    brotli_compress = None
+
+
+class StaticAsset():
+    COMPRESSIBLE_CONTENT_TYPES: tuple[str, ...] = ("application/javascript", "application/json", "application/xml", "application/manifest+json", "image/svg+xml", "image/x-icon", "image/vnd.microsoft.icon")
+
+    # Preferred first, when the client accepts more than one of them with the same quality.
+    ENCODINGS: tuple[str, ...] = ("br", "gzip")
+    PRECOMPRESSED_SUFFIXES: dict[str, str] = {"br": ".br", "gzip": ".gz"}
+    IMMUTABLE_CACHE_CONTROL: str = "public, max-age=31536000, immutable"
+    ETAG_DIGEST_SIZE: int = 16
+    # The variants are built when the server starts (and rescans): quality 11 is for the precompressed files (e.g., `bundle.js.br`), built ahead of time.
+    BROTLI_QUALITY: int = 5
+
+    def __init__(self, path: Path, statobj: stat_result, max_in_memory_size: int, max_compressible_size: int, cache_control: str) -> None:
+        self.__path: Path = path
+        self.__mtime: float = statobj.st_mtime
+        self.__mtime_ns: int = statobj.st_mtime_ns
+        self.__size: int = statobj.st_size
+        self.__last_modified: str = http_date(statobj.st_mtime)
+        self.__cache_control: str = cache_control
+
+        content_type, mime_encoding = guess_type(str(path))
+
+        self.__content_type: str = content_type or "application/octet-stream"
+        self.__mime_encoding: Optional[str] = mime_encoding
+        self.__content: Optional[bytes] = None
+        self.__variants: dict[str, bytes] = {}
+        self.__variants_paths: dict[str, Path] = {}
+
+        if self.__size <= max_in_memory_size or (self.__is_compressible() and self.__size <= max_compressible_size):
+            content: bytes = path.read_bytes()
+
+            if self.__size <= max_in_memory_size:
+                self.__content = content
+
+            if self.__is_compressible():
+                self.__build_variants(content=content, max_in_memory_size=max_in_memory_size)
+
+            digest: str = blake2b(content, digest_size=StaticAsset.ETAG_DIGEST_SIZE).hexdigest()
+        else:
+            with path.open("rb") as f:
+                digest = file_digest(f, lambda: blake2b(digest_size=StaticAsset.ETAG_DIGEST_SIZE)).hexdigest()
+
+        self.__load_precompressed_variants(max_in_memory_size=max_in_memory_size)
+
+        # Strong ETags: each encoding of the same content is a different representation, so it gets its own tag.
+        self.__etag: str = f'"{digest}"'
+        self.__variants_etags: dict[str, str] = {encoding: f'"{digest}-{encoding}"' for encoding in StaticAsset.ENCODINGS}
+        self.__all_etags: frozenset[str] = frozenset([self.__etag, *self.__variants_etags.values()])
+
+    def __is_compressible(self) -> bool:
+        if self.__mime_encoding is not None:
+            return False
+        else:
+            return self.__content_type.startswith("text/") or self.__content_type in StaticAsset.COMPRESSIBLE_CONTENT_TYPES
+
+    def __build_variants(self, content: bytes, max_in_memory_size: int) -> None:
+        compressors: dict[str, Optional[Callable[[bytes], bytes]]] = {
+            "br": (lambda data: brotli_compress(data, quality=StaticAsset.BROTLI_QUALITY)) if brotli_compress is not None else None,
+            "gzip": lambda data: gzip_compress(data, compresslevel=9, mtime=0)
+        }
+
+        for encoding, compressor in compressors.items():
+            if compressor is None:
+                continue
+
+            compressed: bytes = compressor(content)
+
+            # Only keep the variants that are actually worth sending.
+            if len(compressed) < len(content) and len(compressed) <= max_in_memory_size:
+                self.__variants[encoding] = compressed
+
+    def __load_precompressed_variants(self, max_in_memory_size: int) -> None:
+        # Variants built ahead of time (e.g., `bundle.js.br` next to `bundle.js`) take precedence over the ones built here, unless they are older than it.
+        for encoding, suffix in StaticAsset.PRECOMPRESSED_SUFFIXES.items():
+            candidate: Path = self.__path.with_name(self.__path.name + suffix)
+
+            try:
+                candidate_stat: stat_result = candidate.stat()
+            except OSError:
+                continue
+
+            if not S_ISREG(candidate_stat.st_mode) or candidate_stat.st_mtime_ns < self.__mtime_ns:
+                continue
+
+            if candidate_stat.st_size <= max_in_memory_size:
+                self.__variants[encoding] = candidate.read_bytes()
+            else:
+                self.__variants.pop(encoding, None)
+                self.__variants_paths[encoding] = candidate
+
+    def get_path(self) -> Path:
+        return self.__path
+
+    def get_mtime(self) -> float:
+        return self.__mtime
+
+    def get_mtime_ns(self) -> int:
+        return self.__mtime_ns
+
+    def get_size(self) -> int:
+        return self.__size
+
+    def get_last_modified(self) -> str:
+        return self.__last_modified
+
+    def get_cache_control(self) -> str:
+        return self.__cache_control
+
+    def get_etag(self, encoding: Optional[str]=None) -> str:
+        if encoding is None:
+            return self.__etag
+        else:
+            return self.__variants_etags[encoding]
+
+    def matches_if_none_match(self, if_none_match: str) -> bool:
+        # Weak comparison, as mandated for `If-None-Match` (RFC 9110, section 13.1.2).
+        if if_none_match.strip() == "*":
+            return True
+
+        return any(tag.strip().removeprefix("W/") in self.__all_etags for tag in if_none_match.split(","))
+
+    def get_content_type(self) -> str:
+        return self.__content_type
+
+    def get_mime_encoding(self) -> Optional[str]:
+        return self.__mime_encoding
+
+    def get_content(self) -> Optional[bytes]:
+        return self.__content
+
+    def get_variant(self, encoding: str) -> Optional[bytes]:
+        return self.__variants.get(encoding)
+
+    def get_variant_path(self, encoding: str) -> Optional[Path]:
+        return self.__variants_paths.get(encoding)
+
+    def has_variants(self) -> bool:
+        return len(self.__variants) > 0 or len(self.__variants_paths) > 0
+
+    def select_encoding(self, accept_encoding: str) -> Optional[str]:
+        if not self.has_variants():
+            return None
+
+        accepted: dict[str, float] = StaticAsset.parse_accept_encoding(accept_encoding)
+        best: Optional[str] = None
+        best_quality: float = 0.0
+
+        for encoding in StaticAsset.ENCODINGS:
+            if encoding not in self.__variants and encoding not in self.__variants_paths:
+                continue
+
+            quality: float = accepted.get(encoding, accepted.get("*", 0.0))
+
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+
+        return best
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def parse_accept_encoding(accept_encoding: str) -> dict[str, float]:
+        # There are only a handful of distinct `Accept-Encoding` values in the wild, so the parsed result is cached.
+        accepted: dict[str, float] = {}
+
+        for token in accept_encoding.split(","):
+            name, _, params = token.partition(";")
+            name = name.strip().lower()
+
+            if name == "":
+                continue
+
+            quality: float = 1.0
+            params = params.strip().replace(" ", "")
+
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+
+            accepted[name] = quality
+
+        return accepted
+
+
+class StaticAssetsStore():
+    def __init__(self, mounts: list[tuple[str, Path]], max_in_memory_size: int, max_compressible_size: int, rescan_interval: float=0.0, cache_control: str="no-cache", immutable_name_pattern: Optional[str]=None) -> None:
+        # Each mount maps either a URL prefix (ending with "/") to a directory, or a URL to a single file.
+        self.__mounts: list[tuple[str, Path]] = mounts
+        self.__max_in_memory_size: int = max_in_memory_size
+        self.__max_compressible_size: int = max_compressible_size
+        self.__rescan_interval: float = rescan_interval
+        self.__cache_control: str = cache_control
+        self.__immutable_name_pattern: Optional[Pattern[str]] = re_compile(immutable_name_pattern) if immutable_name_pattern else None
+        self.__assets: dict[str, StaticAsset] = {}
+        self.__directories: frozenset[str] = frozenset()
+        self.__stop_event: Event = Event()
+        self.__watcher: Optional[Thread] = None
+
+        self.scan()
+
+        if self.__rescan_interval > 0:
+            self.__start_watching()
+
+    def get(self, url: str) -> Optional[StaticAsset]:
+        return self.__assets.get(url)
+
+    def is_directory(self, url: str) -> bool:
+        return url in self.__directories
+
+    def get_urls(self) -> list[str]:
+        return list(self.__assets.keys())
+
+    def scan(self) -> None:
+        assets: dict[str, StaticAsset] = {}
+        directories: set[str] = set()
+
+        for url, root in self.__mounts:
+            if url.endswith("/"):
+                self.__scan_directory(url=url.rstrip("/"), directory=root, assets=assets, directories=directories, visited=set())
+            elif root.is_file():
+                self.__add_asset(url=url, path=root, statobj=root.stat(), assets=assets)
+
+        # Swapping the references is atomic, so the request handlers never need a lock.
+        self.__assets = assets
+        self.__directories = frozenset(directories)
+
+    # The symbolic links are followed, but each directory is scanned once per mount (by device and inode), so that a link loop ends.
+    def __scan_directory(self, url: str, directory: Path, assets: dict[str, StaticAsset], directories: set[str], visited: set[tuple[int, int]]) -> None:
+        try:
+            statobj: stat_result = directory.stat()
+        except OSError:
+            return
+
+        if not S_ISDIR(statobj.st_mode) or (statobj.st_dev, statobj.st_ino) in visited:
+            return
+
+        visited.add((statobj.st_dev, statobj.st_ino))
+        directories.add(url)
+
+        with scandir(directory) as entries:
+            for entry in entries:
+                entry_url: str = f"{url}/{entry.name}"
+
+                if entry.is_dir():
+                    self.__scan_directory(url=entry_url, directory=Path(entry.path), assets=assets, directories=directories, visited=visited)
+                elif entry.is_file():
+                    self.__add_asset(url=entry_url, path=Path(entry.path), statobj=entry.stat(), assets=assets)
+
+    def __add_asset(self, url: str, path: Path, statobj: stat_result, assets: dict[str, StaticAsset]) -> None:
+        previous: Optional[StaticAsset] = self.__assets.get(url)
+
+        # Unchanged files are not read (nor compressed) again.
+        if previous is not None and previous.get_mtime_ns() == statobj.st_mtime_ns and previous.get_size() == statobj.st_size:
+            assets[url] = previous
+        else:
+            try:
+                assets[url] = StaticAsset(path=path, statobj=statobj, max_in_memory_size=self.__max_in_memory_size, max_compressible_size=self.__max_compressible_size, cache_control=self.__get_cache_control(path))
+            except OSError:
+                # The file vanished (or became unreadable) between the listing and the read.
+                pass
+
+    def __get_cache_control(self, path: Path) -> str:
+        # Content-hashed file names (e.g., `main.1a2b3c4d.js`) change whenever the content does, so they can be cached forever.
+        if self.__immutable_name_pattern is not None and self.__immutable_name_pattern.search(path.name):
+            return StaticAsset.IMMUTABLE_CACHE_CONTROL
+        else:
+            return self.__cache_control
+
+    def __start_watching(self) -> None:
+        self.__watcher = Thread(target=self.__watch, name="static-assets-watcher", daemon=True)
+        self.__watcher.start()
+
+    def __watch(self) -> None:
+        while not self.__stop_event.wait(self.__rescan_interval):
+            try:
+                self.scan()
+            except OSError as e:
+                print(f"Could not rescan the static assets: {e}")
+
+    def stop_watching(self) -> None:
+        self.__stop_event.set()
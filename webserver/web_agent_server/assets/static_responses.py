@@ -0,0 +1,147 @@
+from django.http import HttpResponse, StreamingHttpResponse
+
+from pathlib import Path
+from os import open as os_open, close as os_close, pread, O_RDONLY
+from asyncio import to_thread
+from secrets import token_hex
+from typing import AsyncIterator, Optional
+
+
+class StaticAssetResponse(HttpResponse):
+    # Marker class, so that the middlewares can tell a static asset served from memory apart from a document.
+    pass
+
+
+class PathSendResponse(StaticAssetResponse):
+    # The body is not read by Django: `webserver.webserver.asgi` hands the path over to the server with the ASGI `http.response.pathsend` extension,
+    # so that the server can send the file with a zero-copy `sendfile`.
+    PATHSEND_EXTENSION: str = "http.response.pathsend"
+
+    def __init__(self, path: Path, size: int, content_type: str) -> None:
+        super(PathSendResponse, self).__init__(content_type=content_type)
+
+        self.__path: Path = path
+        self["Content-Length"] = str(size)
+
+    def get_path(self) -> Path:
+        return self.__path
+
+
+class StaticFileStreamingResponse(StreamingHttpResponse):
+    BLOCK_SIZE: int = 256 * 1024
+
+    # Each segment is either some bytes to be sent as they are (e.g., the multipart boundaries), or an `(offset, length)` slice of the file.
+    def __init__(self, path: Path, segments: list[bytes | tuple[int, int]], content_type: str, status: int=200) -> None:
+        super(StaticFileStreamingResponse, self).__init__(streaming_content=StaticFileStreamingResponse.__read_segments(path, segments), content_type=content_type, status=status)
+
+        self["Content-Length"] = str(sum(len(segment) if isinstance(segment, bytes) else segment[1] for segment in segments))
+
+    @staticmethod
+    async def __read_segments(path: Path, segments: list[bytes | tuple[int, int]]) -> AsyncIterator[bytes]:
+        # The blocking reads happen in a worker thread, one block at a time, so the event loop is never stuck on the disk,
+        # and the file is never loaded in memory as a whole.
+        fd: int = await to_thread(os_open, path, O_RDONLY)
+
+        try:
+            for segment in segments:
+                if isinstance(segment, bytes):
+                    yield segment
+
+                    continue
+
+                offset, length = segment
+
+                while length > 0:
+                    chunk: bytes = await to_thread(pread, fd, min(length, StaticFileStreamingResponse.BLOCK_SIZE), offset)
+
+                    if not chunk:
+                        break
+
+                    offset += len(chunk)
+                    length -= len(chunk)
+
+                    yield chunk
+        finally:
+            os_close(fd)
+
+
+class ByteRanges():
+    MAX_RANGES: int = 16
+
+    # Returns `None` when the `Range` header must be ignored (i.e., the whole content is sent), and an empty list when no range can be satisfied.
+    # The returned ranges are inclusive, sorted, and coalesced.
+    @staticmethod
+    def parse(header: str, size: int) -> Optional[list[tuple[int, int]]]:
+        unit, _, specs = header.partition("=")
+
+        if unit.strip().lower() != "bytes" or specs.strip() == "":
+            return None
+
+        ranges: list[tuple[int, int]] = []
+
+        for spec in specs.split(","):
+            first, separator, last = spec.strip().partition("-")
+
+            if separator == "":
+                return None
+
+            try:
+                if first == "":
+                    suffix_length: int = int(last)
+
+                    if suffix_length <= 0 or size == 0:
+                        continue
+
+                    ranges.append((max(size - suffix_length, 0), size - 1))
+                else:
+                    start: int = int(first)
+                    end: int = int(last) if last != "" else start
+
+                    if start < 0 or end < start:
+                        return None
+
+                    if start < size:
+                        ranges.append((start, min(end, size - 1) if last != "" else size - 1))
+            except ValueError:
+                return None
+
+        # Many small ranges are a known amplification vector (CVE-2011-3192): ignore the header altogether.
+        if len(ranges) > ByteRanges.MAX_RANGES:
+            return None
+
+        return ByteRanges.__coalesce(ranges)
+
+    @staticmethod
+    def __coalesce(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        coalesced: list[tuple[int, int]] = []
+
+        for start, end in sorted(ranges):
+            if coalesced and start <= coalesced[-1][1] + 1:
+                coalesced[-1] = (coalesced[-1][0], max(coalesced[-1][1], end))
+            else:
+                coalesced.append((start, end))
+
+        return coalesced
+
+    @staticmethod
+    def get_content_range(start: int, end: int, size: int) -> str:
+        return f"bytes {start}-{end}/{size}"
+
+    @staticmethod
+    def get_unsatisfied_content_range(size: int) -> str:
+        return f"bytes */{size}"
+
+    # Builds the `multipart/byteranges` layout: the boundaries and the part headers as bytes, and the ranges as `(offset, length)` slices.
+    @staticmethod
+    def build_multipart(ranges: list[tuple[int, int]], size: int, content_type: str) -> tuple[str, list[bytes | tuple[int, int]]]:
+        boundary: str = token_hex(16)
+        segments: list[bytes | tuple[int, int]] = []
+
+        for start, end in ranges:
+            segments.append(f"--{boundary}\r\nContent-Type: {content_type}\r\nContent-Range: {ByteRanges.get_content_range(start, end, size)}\r\n\r\n".encode("latin1"))
+            segments.append((start, end - start + 1))
+            segments.append(b"\r\n")
+
+        segments.append(f"--{boundary}--\r\n".encode("latin1"))
+
+        return f"multipart/byteranges; boundary={boundary}", segments
@@ -14,6 +14,9 @@ class CSP():
     def generate(self, nonce: str) -> str:
         raise NotImplementedError(f"Abstract method. FYI, the provided nonce is: {nonce}.")
 
+    def compile(self) -> "CompiledCSP":
+        return CompiledCSP(csps=[self])
+
     def get_report_directive_name(self) -> str:
         return self.__report_directive
 
@@ -24,3 +27,17 @@ class CSP():
             return settings.REPORTING_ENDPOINTS["csp"]
         else:
             raise NotImplementedError(f"Unknown report directive: {self.__report_directive}.")
+
+
+class CompiledCSP():
+    # Cannot appear in a header value, so it cannot clash with the policies.
+    NONCE_PLACEHOLDER: str = "\x00"
+
+    # The policies are generated once, with a placeholder instead of the nonce, and split around it.
+    # Rendering the header for a response is then a single `str.join`.
+    def __init__(self, csps: list[CSP]) -> None:
+        # Multiple independently enforced CSPs are separated by a comma.
+        self.__parts: list[str] = ", ".join([csp_.generate(nonce=CompiledCSP.NONCE_PLACEHOLDER) for csp_ in csps]).split(CompiledCSP.NONCE_PLACEHOLDER)
+
+    def render(self, nonce: str) -> str:
+        return nonce.join(self.__parts)
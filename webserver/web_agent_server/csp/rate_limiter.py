@@ -0,0 +1,156 @@
+from django.core.cache import caches, BaseCache
+
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from time import monotonic, time
+from typing import Optional
+
+
+class TokenBucketRateLimiter():
+    # Each key gets a bucket of `burst` tokens, refilled at `rate` tokens per second, in the memory of the process (only the `max_keys` most recently used).
+    def __init__(self, rate: float, burst: int, max_keys: int) -> None:
+        if rate <= 0 or burst <= 0 or max_keys <= 0:
+            raise ValueError(f"The rate ({rate}), burst ({burst}) and maximum number of keys ({max_keys}) must be positive.")
+
+        self.__rate: float = rate
+        self.__burst: int = burst
+        self.__max_keys: int = max_keys
+        self.__buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self.__lock: Lock = Lock()
+
+    # Uses `settings`-like values: a `cache_alias` (one of `settings.CACHES`) makes the buckets shared by all the processes using that cache.
+    @staticmethod
+    def create(rate: float, burst: int, max_keys: int, cache_alias: Optional[str]=None) -> "TokenBucketRateLimiter":
+        if cache_alias is None:
+            return TokenBucketRateLimiter(rate=rate, burst=burst, max_keys=max_keys)
+        else:
+            return CacheTokenBucketRateLimiter(rate=rate, burst=burst, max_keys=max_keys, cache_alias=cache_alias)
+
+    def get_rate(self) -> float:
+        return self.__rate
+
+    def get_burst(self) -> int:
+        return self.__burst
+
+    # A cost above the burst would never be allowed: it is capped, so that a big batch is accepted when the bucket is full.
+    def allow(self, key: str, cost: int=1) -> bool:
+        now: float = monotonic()
+
+        with self.__lock:
+            tokens, last = self.__buckets.pop(key, (float(self.__burst), now))
+            tokens, allowed = self.refill_and_take(tokens, now - last, cost)
+            self.__buckets[key] = (tokens, now)
+
+            if len(self.__buckets) > self.__max_keys:
+                self.__buckets.popitem(last=False)
+
+        return allowed
+
+    async def aallow(self, key: str, cost: int=1) -> bool:
+        return self.allow(key, cost)
+
+    # The tokens are taken from every bucket, or from none: a key over its limit does not cost the others theirs.
+    def allow_all(self, costs: dict[str, int]) -> bool:
+        now: float = monotonic()
+
+        with self.__lock:
+            buckets: dict[str, tuple[float, float]] = {key: self.__buckets.pop(key, (float(self.__burst), now)) for key in costs}
+            taken: dict[str, tuple[float, bool]] = {key: self.refill_and_take(tokens, now - last, costs[key]) for key, (tokens, last) in buckets.items()}
+            allowed: bool = all(key_allowed for _, key_allowed in taken.values())
+
+            for key, bucket in buckets.items():
+                self.__buckets[key] = (taken[key][0], now) if allowed else bucket
+
+            while len(self.__buckets) > self.__max_keys:
+                self.__buckets.popitem(last=False)
+
+        return allowed
+
+    async def aallow_all(self, costs: dict[str, int]) -> bool:
+        return self.allow_all(costs)
+
+    def refill_and_take(self, tokens: float, elapsed: float, cost: int) -> tuple[float, bool]:
+        tokens = min(float(self.__burst), tokens + max(elapsed, 0.0) * self.__rate)
+        cost = min(cost, self.__burst)
+
+        if tokens >= cost:
+            return tokens - cost, True
+        else:
+            return tokens, False
+
+
+class CacheTokenBucketRateLimiter(TokenBucketRateLimiter):
+    # The buckets live in a Django cache shared by the workers. The read and the write are not atomic, which is fine for flood control.
+    KEY_PREFIX: str = "reports-rate-limit:"
+
+    def __init__(self, rate: float, burst: int, max_keys: int, cache_alias: str) -> None:
+        super(CacheTokenBucketRateLimiter, self).__init__(rate=rate, burst=burst, max_keys=max_keys)
+
+        self.__cache: BaseCache = caches[cache_alias]
+        # An idle bucket is full again after `burst / rate` seconds, and can then be forgotten.
+        self.__timeout: int = int(burst / rate) + 1
+
+    def allow(self, key: str, cost: int=1) -> bool:
+        now: float = time()
+        cache_key: str = CacheTokenBucketRateLimiter.__get_cache_key(key)
+        tokens, last = self.__cache.get(cache_key, (float(self.get_burst()), now))
+        tokens, allowed = self.refill_and_take(tokens, now - last, cost)
+
+        self.__cache.set(cache_key, (tokens, now), timeout=self.__timeout)
+
+        return allowed
+
+    async def aallow(self, key: str, cost: int=1) -> bool:
+        now: float = time()
+        cache_key: str = CacheTokenBucketRateLimiter.__get_cache_key(key)
+        tokens, last = await self.__cache.aget(cache_key, (float(self.get_burst()), now))
+        tokens, allowed = self.refill_and_take(tokens, now - last, cost)
+
+        await self.__cache.aset(cache_key, (tokens, now), timeout=self.__timeout)
+
+        return allowed
+
+    def allow_all(self, costs: dict[str, int]) -> bool:
+        now: float = time()
+        cache_keys: dict[str, str] = {key: CacheTokenBucketRateLimiter.__get_cache_key(key) for key in costs}
+        buckets: Optional[dict[str, tuple[float, float]]] = self.__take_all(costs, cache_keys, self.__cache.get_many(list(cache_keys.values())), now)
+
+        if buckets is None:
+            return False
+
+        self.__cache.set_many(buckets, timeout=self.__timeout)
+
+        return True
+
+    async def aallow_all(self, costs: dict[str, int]) -> bool:
+        now: float = time()
+        cache_keys: dict[str, str] = {key: CacheTokenBucketRateLimiter.__get_cache_key(key) for key in costs}
+        buckets: Optional[dict[str, tuple[float, float]]] = self.__take_all(costs, cache_keys, await self.__cache.aget_many(list(cache_keys.values())), now)
+
+        if buckets is None:
+            return False
+
+        await self.__cache.aset_many(buckets, timeout=self.__timeout)
+
+        return True
+
+    # The buckets to write back (by cache key), or `None` when one of the keys is over its limit (nothing is written then).
+    def __take_all(self, costs: dict[str, int], cache_keys: dict[str, str], stored: dict[str, tuple[float, float]], now: float) -> Optional[dict[str, tuple[float, float]]]:
+        buckets: dict[str, tuple[float, float]] = {}
+
+        for key, cost in costs.items():
+            tokens, last = stored.get(cache_keys[key], (float(self.get_burst()), now))
+            tokens, allowed = self.refill_and_take(tokens, now - last, cost)
+
+            if not allowed:
+                return None
+
+            buckets[cache_keys[key]] = (tokens, now)
+
+        return buckets
+
+    @staticmethod
+    def __get_cache_key(key: str) -> str:
+        # The keys come from the clients (e.g., an origin): they are hashed, so that they are always valid (and short) cache keys.
+        return f"{CacheTokenBucketRateLimiter.KEY_PREFIX}{blake2b(key.encode('utf-8'), digest_size=16).hexdigest()}"
@@ -0,0 +1,97 @@
+from json import dumps
+from hashlib import blake2b
+from collections import OrderedDict
+from threading import Lock
+from time import time_ns
+from typing import Any, Optional
+
+
+class ReportAggregator():
+    # The fields of the inner report that identify a violation: the same violation, reported again on every page view, gets the same fingerprint.
+    FINGERPRINT_FIELDS: dict[str, tuple[str, ...]] = {
+        "csp": ("violated-directive", "blocked-uri", "source-file", "line-number"),
+        "coop": ("type", "effective-policy", "disposition", "property", "source-file", "line-number", "column-number"),
+        "coep": ("type", "blocked-url", "destination", "disposition")
+    }
+    FINGERPRINT_DIGEST_SIZE: int = 16
+
+    @staticmethod
+    def get_fingerprint(report_type: str, report: dict[str, Any]) -> str:
+        inner_report: Any = report.get(f"{report_type}-report")
+
+        if not isinstance(inner_report, dict):
+            inner_report = {}
+
+        values: list[Any] = [inner_report.get(field) for field in ReportAggregator.FINGERPRINT_FIELDS[report_type]]
+
+        return blake2b(dumps([report_type, values], separators=(",", ":")).encode("utf-8"), digest_size=ReportAggregator.FINGERPRINT_DIGEST_SIZE).hexdigest()
+
+    # Collapses a batch into one aggregate per fingerprint, in order of first appearance, keeping the first report as the sample.
+    # `received` holds the time (in nanoseconds) each report was received at, the time of the call by default.
+    @staticmethod
+    def aggregate(report_type: str, reports: list[dict[str, Any]], received: Optional[list[int]]=None) -> list[dict[str, Any]]:
+        times: list[int] = received if received is not None else [time_ns()] * len(reports)
+        aggregates: dict[str, dict[str, Any]] = {}
+
+        for report, time in zip(reports, times):
+            fingerprint: str = ReportAggregator.get_fingerprint(report_type, report)
+            aggregate: Optional[dict[str, Any]] = aggregates.get(fingerprint)
+
+            if aggregate is None:
+                aggregates[fingerprint] = {"fingerprint": fingerprint, "count": 1, "first_seen": time, "last_seen": time, "sample": report}
+            else:
+                aggregate["count"] += 1
+                aggregate["first_seen"] = min(aggregate["first_seen"], time)
+                aggregate["last_seen"] = max(aggregate["last_seen"], time)
+
+        return list(aggregates.values())
+
+
+class ReportAggregates():
+    # The in-memory counterpart of the aggregates collections: at most `capacity` fingerprints, the least recently seen being evicted first.
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError(f"The capacity must be positive, not {capacity}.")
+
+        self.__capacity: int = capacity
+        self.__aggregates: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self.__lock: Lock = Lock()
+
+    # Returns the fingerprints that were not known yet.
+    def merge(self, aggregates: list[dict[str, Any]]) -> set[str]:
+        new_fingerprints: set[str] = set()
+
+        with self.__lock:
+            for aggregate in aggregates:
+                fingerprint: str = aggregate["fingerprint"]
+                current: Optional[dict[str, Any]] = self.__aggregates.get(fingerprint)
+
+                if current is None:
+                    self.__aggregates[fingerprint] = dict(aggregate)
+                    new_fingerprints.add(fingerprint)
+                else:
+                    current["count"] += aggregate["count"]
+                    current["first_seen"] = min(current["first_seen"], aggregate["first_seen"])
+                    current["last_seen"] = max(current["last_seen"], aggregate["last_seen"])
+                    self.__aggregates.move_to_end(fingerprint)
+
+            while len(self.__aggregates) > self.__capacity:
+                self.__aggregates.popitem(last=False)
+
+        return new_fingerprints
+
+    # The most frequent first. Copies, since the counters keep changing.
+    def snapshot(self, limit: Optional[int]=None) -> list[dict[str, Any]]:
+        with self.__lock:
+            aggregates: list[dict[str, Any]] = [dict(aggregate) for aggregate in self.__aggregates.values()]
+
+        aggregates.sort(key=lambda aggregate: aggregate["count"], reverse=True)
+
+        return aggregates[:limit] if limit is not None else aggregates
+
+    def __len__(self) -> int:
+        return len(self.__aggregates)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__aggregates.clear()
@@ -0,0 +1,51 @@
+from re import compile as re_compile, Pattern
+from threading import Lock
+from typing import Any, Optional
+
+
+class ReportFilter():
+    # Each rule discards the reports of some `types` whose `fields` (of the inner report) start with one of its `prefixes`, or match one of its `patterns`.
+    # The rules are compiled once: the prefixes of each field into a tuple for a single `str.startswith`, and the patterns into a single alternation.
+    def __init__(self, rules: list[dict[str, Any]], field_aliases: Optional[dict[str, dict[str, str]]]=None) -> None:
+        prefixes: dict[str, dict[str, list[str]]] = {}
+        patterns: dict[str, dict[str, list[str]]] = {}
+
+        for rule in rules:
+            for report_type in rule["types"]:
+                aliases: dict[str, str] = (field_aliases or {}).get(report_type, {})
+
+                for field in rule["fields"]:
+                    # The same rule also applies to the other name of the field (e.g., `sourceFile` in the Reporting API bodies).
+                    for name in (field, aliases.get(field)):
+                        if name is None:
+                            continue
+
+                        prefixes.setdefault(report_type, {}).setdefault(name, []).extend(rule.get("prefixes", []))
+                        patterns.setdefault(report_type, {}).setdefault(name, []).extend(rule.get("patterns", []))
+
+        self.__rules: dict[str, tuple[tuple[str, tuple[str, ...], Optional[Pattern[str]]], ...]] = {
+            report_type: tuple(
+                (field, tuple(field_prefixes), re_compile("|".join(f"(?:{pattern})" for pattern in patterns[report_type][field])) if patterns[report_type][field] else None)
+                for field, field_prefixes in fields.items()
+            ) for report_type, fields in prefixes.items()
+        }
+        self.__lock: Lock = Lock()
+        self.__discarded: dict[str, int] = {}
+
+    def is_noise(self, report_type: str, inner_report: dict[str, Any]) -> bool:
+        for field, prefixes, pattern in self.__rules.get(report_type, ()):
+            value: Any = inner_report.get(field)
+
+            if value.__class__ is str and ((prefixes and value.startswith(prefixes)) or (pattern is not None and pattern.search(value) is not None)):
+                return True
+
+        return False
+
+    def count(self, report_type: str, discarded: int) -> None:
+        if discarded > 0:
+            with self.__lock:
+                self.__discarded[report_type] = self.__discarded.get(report_type, 0) + discarded
+
+    def get_stats(self, report_type: str) -> dict[str, int]:
+        with self.__lock:
+            return {"discarded": self.__discarded.get(report_type, 0)}
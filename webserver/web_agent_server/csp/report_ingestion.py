@@ -0,0 +1,123 @@
+from threading import Thread, Condition
+from collections import deque
+from os import getpid
+from time import monotonic, time_ns
+from typing import Any, Callable, Optional
+
+import atexit
+
+
+class ReportIngestionQueue():
+    # The reporting endpoints only validate and enqueue: a background thread writes the reports to the store in batches,
+    # either when `batch_size` reports are waiting, or every `flush_interval` seconds.
+    # The `sink` gets the reports of one type, and the time (in nanoseconds) each one was enqueued at.
+    def __init__(self, sink: Callable[[str, list[dict[str, Any]], list[int]], Any], max_size: int, batch_size: int, flush_interval: float) -> None:
+        self.__sink: Callable[[str, list[dict[str, Any]], list[int]], Any] = sink
+        self.__max_size: int = max_size
+        self.__batch_size: int = batch_size
+        self.__flush_interval: float = flush_interval
+        self.__buffer: deque[tuple[str, dict[str, Any], int]] = deque()
+        self.__condition: Condition = Condition()
+        self.__writer: Optional[Thread] = None
+        self.__writer_pid: int = -1
+        self.__closed: bool = False
+        self.__stats: dict[str, int] = {"enqueued": 0, "dropped": 0, "flushed": 0, "failed": 0, "batches": 0}
+
+    def enqueue(self, report_type: str, report: dict[str, Any]) -> bool:
+        return self.enqueue_many(report_type, [report])
+
+    # All or nothing, so that a batch is never half ingested.
+    def enqueue_many(self, report_type: str, reports: list[dict[str, Any]]) -> bool:
+        with self.__condition:
+            # Bounded memory: when the writer cannot keep up, the new reports are dropped, and the caller is told so.
+            if self.__closed or len(self.__buffer) + len(reports) > self.__max_size:
+                self.__stats["dropped"] += len(reports)
+
+                return False
+
+            now: int = time_ns()
+
+            self.__ensure_writer()
+            self.__buffer.extend((report_type, report, now) for report in reports)
+            self.__stats["enqueued"] += len(reports)
+
+            if len(self.__buffer) >= self.__batch_size:
+                self.__condition.notify()
+
+            return True
+
+    def get_stats(self) -> dict[str, int]:
+        with self.__condition:
+            return self.__stats | {"pending": len(self.__buffer)}
+
+    def flush(self) -> None:
+        with self.__condition:
+            batch: list[tuple[str, dict[str, Any], int]] = self.__take_batch(len(self.__buffer))
+
+        self.__write(batch)
+
+    def close(self) -> None:
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify()
+
+        if self.__writer is not None and self.__writer_pid == getpid():
+            self.__writer.join()
+
+        self.flush()
+
+    def __ensure_writer(self) -> None:
+        # The thread is started lazily, and again in a forked worker (threads do not survive a fork).
+        if self.__writer is not None and self.__writer_pid == getpid() and self.__writer.is_alive():
+            return
+
+        if self.__writer is None:
+            atexit.register(self.close)
+
+        self.__writer_pid = getpid()
+        self.__writer = Thread(target=self.__run, name="report-ingestion-writer", daemon=True)
+        self.__writer.start()
+
+    def __run(self) -> None:
+        deadline: float = monotonic() + self.__flush_interval
+
+        while True:
+            with self.__condition:
+                while not self.__closed and len(self.__buffer) < self.__batch_size and monotonic() < deadline:
+                    self.__condition.wait(timeout=max(deadline - monotonic(), 0))
+
+                if self.__closed:
+                    return
+
+                batch: list[tuple[str, dict[str, Any], int]] = self.__take_batch(self.__batch_size)
+
+            deadline = monotonic() + self.__flush_interval
+
+            self.__write(batch)
+
+    def __take_batch(self, size: int) -> list[tuple[str, dict[str, Any], int]]:
+        return [self.__buffer.popleft() for _ in range(min(size, len(self.__buffer)))]
+
+    def __write(self, batch: list[tuple[str, dict[str, Any], int]]) -> None:
+        if len(batch) == 0:
+            return
+
+        reports_by_type: dict[str, tuple[list[dict[str, Any]], list[int]]] = {}
+
+        for report_type, report, enqueued in batch:
+            reports, times = reports_by_type.setdefault(report_type, ([], []))
+            reports.append(report)
+            times.append(enqueued)
+
+        for report_type, (reports, times) in reports_by_type.items():
+            try:
+                self.__sink(report_type, reports, times)
+
+                with self.__condition:
+                    self.__stats["flushed"] += len(reports)
+                    self.__stats["batches"] += 1
+            except Exception as e:
+                print(f"Could not write {len(reports)} {report_type} reports: {e}")
+
+                with self.__condition:
+                    self.__stats["failed"] += len(reports)
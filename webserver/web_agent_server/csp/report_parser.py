@@ -0,0 +1,127 @@
+from .report_filter import ReportFilter
+
+from json import loads
+from re import compile as re_compile, Pattern
+from typing import Any, Callable, Optional
+
+
+class ReportParser():
+    # The `type` of each report type in the Reporting API (`application/reports+json`) batches.
+    REPORTING_API_TYPES: dict[str, str] = {"csp": "csp-violation", "coop": "coop", "coep": "coep"}
+
+    # The Reporting API names the CSP fields differently: they are renamed to the legacy (`application/csp-report`) names, so that the stored reports,
+    # their fingerprints and the query filters are the same whatever the format.
+    CSP_BODY_FIELDS: dict[str, str] = {
+        "documentURL": "document-uri",
+        "referrer": "referrer",
+        "blockedURL": "blocked-uri",
+        "effectiveDirective": "violated-directive",
+        "originalPolicy": "original-policy",
+        "sourceFile": "source-file",
+        "sample": "script-sample",
+        "disposition": "disposition",
+        "statusCode": "status-code",
+        "lineNumber": "line-number",
+        "columnNumber": "column-number"
+    }
+
+    # The Reporting API name of each legacy field, for the rules of `ReportFilter`.
+    FIELD_ALIASES: dict[str, dict[str, str]] = {"csp": {legacy_name: name for name, legacy_name in CSP_BODY_FIELDS.items()}}
+
+    # `bool` is accepted because it is an `int` for `isinstance`, which the legacy validation used.
+    LEGACY_VALUE_TYPES: frozenset[type] = frozenset([str, int, bool])
+    # The Reporting API sends `null` for the missing fields.
+    REPORTING_API_VALUE_TYPES: frozenset[type] = frozenset([str, int, bool, float, type(None)])
+
+    __CAMEL_CASE_BOUNDARY: Pattern[str] = re_compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+    # Returns the reports of the body (either a legacy report, or a Reporting API batch), normalized to the legacy layout, or `None` when the body is invalid.
+    # The body is parsed once, the values are type-checked in C with `frozenset.issuperset`, and the noise is discarded before any report is normalized.
+    @staticmethod
+    def parse(report_type: str, body: bytes, noise_filter: Optional[ReportFilter]=None) -> Optional[list[dict[str, Any]]]:
+        try:
+            payload: Any = loads(body)
+        # A deeply nested body (e.g., `[[[[...]]]]`) exhausts the recursion of the decoder.
+        except (ValueError, RecursionError):
+            return None
+
+        if isinstance(payload, dict):
+            return ReportParser.__parse_legacy_report(report_type, payload, noise_filter)
+        elif isinstance(payload, list):
+            return ReportParser.__parse_batch(report_type, payload, noise_filter)
+        else:
+            return None
+
+    @staticmethod
+    def __parse_legacy_report(report_type: str, payload: dict[str, Any], noise_filter: Optional[ReportFilter]) -> Optional[list[dict[str, Any]]]:
+        report_key: str = f"{report_type}-report"
+        inner_report: Any = payload.get(report_key)
+
+        # The keys of a JSON object are always strings, so only the values need checking.
+        if not isinstance(inner_report, dict) or not ReportParser.LEGACY_VALUE_TYPES.issuperset(map(type, inner_report.values())):
+            return None
+
+        if noise_filter is not None and noise_filter.is_noise(report_type, inner_report):
+            noise_filter.count(report_type, 1)
+
+            return []
+
+        return [{report_key: inner_report}]
+
+    # The reports of other types (e.g., `deprecation`), which are not ours to store, are skipped, so the result may be empty.
+    @staticmethod
+    def __parse_batch(report_type: str, payload: list[Any], noise_filter: Optional[ReportFilter]) -> Optional[list[dict[str, Any]]]:
+        reporting_api_type: str = ReportParser.REPORTING_API_TYPES[report_type]
+        report_key: str = f"{report_type}-report"
+        normalize: Callable[[dict[str, Any]], dict[str, Any]] = ReportParser.__NORMALIZERS[report_type]
+        reports: list[dict[str, Any]] = []
+        noise: int = 0
+
+        for item in payload:
+            if not isinstance(item, dict):
+                return None
+
+            if item.get("type") != reporting_api_type:
+                continue
+
+            body: Any = item.get("body")
+
+            if not isinstance(body, dict) or not ReportParser.REPORTING_API_VALUE_TYPES.issuperset(map(type, body.values())):
+                return None
+
+            if noise_filter is not None and noise_filter.is_noise(report_type, body):
+                noise += 1
+
+                continue
+
+            inner_report: dict[str, Any] = normalize(body)
+
+            # The COOP and COEP bodies do not say which document they are about: the envelope does.
+            if "document-uri" not in inner_report and isinstance(item.get("url"), str):
+                inner_report["document-uri"] = item["url"]
+
+            reports.append({report_key: inner_report})
+
+        if noise_filter is not None:
+            noise_filter.count(report_type, noise)
+
+        return reports
+
+    @staticmethod
+    def __normalize_csp_body(body: dict[str, Any]) -> dict[str, Any]:
+        fields: dict[str, str] = ReportParser.CSP_BODY_FIELDS
+
+        return {fields.get(key, key): value for key, value in body.items() if value is not None}
+
+    @staticmethod
+    def __normalize_body(body: dict[str, Any]) -> dict[str, Any]:
+        # E.g., `previousResponseURL` becomes `previous-response-url`.
+        boundary: Pattern[str] = ReportParser.__CAMEL_CASE_BOUNDARY
+
+        return {boundary.sub("-", key).lower(): value for key, value in body.items() if value is not None}
+
+    __NORMALIZERS: dict[str, Callable[[dict[str, Any]], dict[str, Any]]] = {
+        "csp": __normalize_csp_body,
+        "coop": __normalize_body,
+        "coep": __normalize_body
+    }
@@ -0,0 +1,94 @@
+from threading import Lock
+from time import time_ns
+from typing import Any, Callable, Optional
+
+
+class ReportRingBuffer():
+    # Fixed-capacity buffer: once full, each new report overwrites the oldest one in O(1).
+    # Each report is stamped with a strictly increasing timestamp (in nanoseconds), which doubles as its pagination cursor.
+    TIMESTAMP_KEY: str = "timestamp"
+
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError(f"The capacity must be positive, not {capacity}.")
+
+        self.__capacity: int = capacity
+        self.__slots: list[Optional[dict[str, Any]]] = [None] * capacity
+        self.__next: int = 0
+        self.__size: int = 0
+        self.__last_timestamp: int = 0
+        self.__lock: Lock = Lock()
+
+    def append(self, report: dict[str, Any]) -> None:
+        with self.__lock:
+            self.__append(report)
+
+    def extend(self, reports: list[dict[str, Any]]) -> None:
+        with self.__lock:
+            for report in reports:
+                self.__append(report)
+
+    def __append(self, report: dict[str, Any]) -> None:
+        self.__last_timestamp = max(time_ns(), self.__last_timestamp + 1)
+        report[ReportRingBuffer.TIMESTAMP_KEY] = self.__last_timestamp
+        self.__slots[self.__next] = report
+        self.__next = (self.__next + 1) % self.__capacity
+
+        if self.__size < self.__capacity:
+            self.__size += 1
+
+    # A copy, from the oldest to the newest report: the caller can never see (nor alter) the buffer while it is being written.
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self.__lock:
+            if self.__size < self.__capacity:
+                return self.__slots[:self.__size]  # type: ignore[return-value]
+            else:
+                return self.__slots[self.__next:] + self.__slots[:self.__next]  # type: ignore[operator]
+
+    # Up to `limit` reports (all of them when `None`) matching `predicate`, from the oldest to the newest (or the other way around when `descending`), whose timestamps are within `[first_timestamp, last_timestamp]`.
+    # The timestamps are sorted, so both ends of the range are found with a binary search instead of a scan.
+    def select(self, first_timestamp: int, last_timestamp: Optional[int], limit: Optional[int], predicate: Callable[[dict[str, Any]], bool], descending: bool=False) -> list[dict[str, Any]]:
+        selected: list[dict[str, Any]] = []
+
+        with self.__lock:
+            oldest: int = (self.__next - self.__size) % self.__capacity
+            low: int = self.__bisect(oldest, first_timestamp)
+            high: int = self.__bisect(oldest, last_timestamp + 1) if last_timestamp is not None else self.__size
+
+            for position in (range(high - 1, low - 1, -1) if descending else range(low, high)):
+                report: dict[str, Any] = self.__slots[(oldest + position) % self.__capacity]  # type: ignore[assignment]
+
+                if predicate(report):
+                    selected.append(report)
+
+                    if limit is not None and len(selected) >= limit:
+                        break
+
+        return selected
+
+    # The position (from the oldest report) of the first report whose timestamp is at least `timestamp`.
+    def __bisect(self, oldest: int, timestamp: int) -> int:
+        low, high = 0, self.__size
+
+        while low < high:
+            middle: int = (low + high) // 2
+
+            if self.__slots[(oldest + middle) % self.__capacity][ReportRingBuffer.TIMESTAMP_KEY] < timestamp:  # type: ignore[index]
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def get_capacity(self) -> int:
+        return self.__capacity
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__slots = [None] * self.__capacity
+            self.__next = 0
+            self.__size = 0
+            self.__last_timestamp = 0
@@ -0,0 +1,73 @@
+from random import Random
+from threading import Lock
+from typing import Any
+
+
+class ReportSampler():
+    # Keeps each report with the probability of its violated directive (CSP only), or else of its type (1.0 when not configured).
+    # The sampled reports carry their rate (`sample-rate`), and the dropped ones are counted, so that the real totals can still be estimated.
+    SAMPLE_RATE_KEY: str = "sample-rate"
+
+    def __init__(self, rates: dict[str, float], directive_rates: dict[str, float]) -> None:
+        for name, rate in (rates | directive_rates).items():
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(f"The sampling rate of {name} must be between 0 and 1, not {rate}.")
+
+        self.__rates: dict[str, float] = rates
+        self.__directive_rates: dict[str, float] = directive_rates
+        self.__random: Random = Random()
+        self.__lock: Lock = Lock()
+        self.__kept: dict[str, int] = {}
+        self.__dropped: dict[str, int] = {}
+        self.__dropped_by_directive: dict[str, dict[str, int]] = {}
+
+    def sample(self, report_type: str, reports: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        type_rate: float = self.__rates.get(report_type, 1.0)
+        directive_rates: dict[str, float] = self.__directive_rates if report_type == "csp" else {}
+
+        # Nothing to draw: the common case costs a dictionary lookup.
+        if type_rate >= 1.0 and not directive_rates:
+            self.__count(report_type, kept=len(reports), dropped={})
+
+            return reports
+
+        report_key: str = f"{report_type}-report"
+        kept: list[dict[str, Any]] = []
+        dropped: dict[str, int] = {}
+
+        for report in reports:
+            directive: Any = report[report_key].get("violated-directive")
+            directive = directive if isinstance(directive, str) else ""
+            rate: float = directive_rates.get(directive, type_rate)
+
+            if rate >= 1.0:
+                kept.append(report)
+            elif self.__random.random() < rate:
+                report[ReportSampler.SAMPLE_RATE_KEY] = rate
+                kept.append(report)
+            else:
+                dropped[directive] = dropped.get(directive, 0) + 1
+
+        self.__count(report_type, kept=len(kept), dropped=dropped)
+
+        return kept
+
+    def __count(self, report_type: str, kept: int, dropped: dict[str, int]) -> None:
+        with self.__lock:
+            self.__kept[report_type] = self.__kept.get(report_type, 0) + kept
+            self.__dropped[report_type] = self.__dropped.get(report_type, 0) + sum(dropped.values())
+
+            by_directive: dict[str, int] = self.__dropped_by_directive.setdefault(report_type, {})
+
+            for directive, count in dropped.items():
+                by_directive[directive] = by_directive.get(directive, 0) + count
+
+    def get_stats(self, report_type: str) -> dict[str, Any]:
+        with self.__lock:
+            return {
+                "rate": self.__rates.get(report_type, 1.0),
+                "directive_rates": dict(self.__directive_rates) if report_type == "csp" else {},
+                "kept": self.__kept.get(report_type, 0),
+                "dropped": self.__dropped.get(report_type, 0),
+                "dropped_by_directive": dict(self.__dropped_by_directive.get(report_type, {}))
+            }
@@ -1,17 +1,25 @@
+from django.conf import settings
+
+from .report_ring_buffer import ReportRingBuffer
+from .reports_query import ReportsQuery
+from .report_aggregation import ReportAggregates
+
 from typing import Any, Optional
 
 
 # TODO: use a database in production.
 class ReportsLogs():
-    csp_reports: list[dict[str, Any]] = []
-    coop_reports: list[dict[str, Any]] = []
-    coep_reports: list[dict[str, Any]] = []
-    MAX_LENGTH: int = 100
+    csp_reports: ReportRingBuffer = ReportRingBuffer(capacity=settings.REPORTS_LOGS_CAPACITY)
+    coop_reports: ReportRingBuffer = ReportRingBuffer(capacity=settings.REPORTS_LOGS_CAPACITY)
+    coep_reports: ReportRingBuffer = ReportRingBuffer(capacity=settings.REPORTS_LOGS_CAPACITY)
+    csp_aggregates: ReportAggregates = ReportAggregates(capacity=settings.REPORTS_AGGREGATES_CAPACITY)
+    coop_aggregates: ReportAggregates = ReportAggregates(capacity=settings.REPORTS_AGGREGATES_CAPACITY)
+    coep_aggregates: ReportAggregates = ReportAggregates(capacity=settings.REPORTS_AGGREGATES_CAPACITY)
 
     @staticmethod
     def add_csp_report(report: Optional[dict[str, Any]]) -> bool:
-        if report is not None and ReportsLogs.__csp_report_interesting(report):
-            ReportsLogs.__append_and_shift(report, ReportsLogs.csp_reports)
+        if report is not None:
+            ReportsLogs.csp_reports.append(report)
 
             return True
         else:
@@ -19,8 +27,8 @@ class ReportsLogs():
 
     @staticmethod
     def add_coop_report(report: Optional[dict[str, Any]]) -> bool:
-        if report is not None and ReportsLogs.__coop_report_interesting(report):
-            ReportsLogs.__append_and_shift(report, ReportsLogs.coop_reports)
+        if report is not None:
+            ReportsLogs.coop_reports.append(report)
 
             return True
         else:
@@ -28,48 +36,80 @@ class ReportsLogs():
 
     @staticmethod
     def add_coep_report(report: Optional[dict[str, Any]]) -> bool:
-        if report is not None and ReportsLogs.__coep_report_interesting(report):
-            ReportsLogs.__append_and_shift(report, ReportsLogs.coep_reports)
+        if report is not None:
+            ReportsLogs.coep_reports.append(report)
 
             return True
         else:
             return False
 
+    @staticmethod
+    def add_csp_reports(reports: list[dict[str, Any]]) -> int:
+        return ReportsLogs.__extend(ReportsLogs.csp_reports, reports)
+
+    @staticmethod
+    def add_coop_reports(reports: list[dict[str, Any]]) -> int:
+        return ReportsLogs.__extend(ReportsLogs.coop_reports, reports)
+
+    @staticmethod
+    def add_coep_reports(reports: list[dict[str, Any]]) -> int:
+        return ReportsLogs.__extend(ReportsLogs.coep_reports, reports)
+
     @staticmethod
     def get_csp_reports() -> list[dict[str, Any]]:
-        return ReportsLogs.csp_reports
+        return ReportsLogs.csp_reports.snapshot()
 
     @staticmethod
     def get_coop_reports() -> list[dict[str, Any]]:
-        return ReportsLogs.coop_reports
+        return ReportsLogs.coop_reports.snapshot()
 
     @staticmethod
     def get_coep_reports() -> list[dict[str, Any]]:
-        return ReportsLogs.coep_reports
+        return ReportsLogs.coep_reports.snapshot()
+
+    @staticmethod
+    def query_csp_reports(query: ReportsQuery) -> list[dict[str, Any]]:
+        return ReportsLogs.__query(ReportsLogs.csp_reports, query)
 
     @staticmethod
-    def __csp_report_interesting(report: dict[str, Any]) -> bool:
-        return not ReportsLogs.__is_csp_report_caused_by_extension(report)
+    def query_coop_reports(query: ReportsQuery) -> list[dict[str, Any]]:
+        return ReportsLogs.__query(ReportsLogs.coop_reports, query)
 
     @staticmethod
-    def __coop_report_interesting(report: dict[str, Any]) -> bool:
-        return True # TODO: filter out uninteresting reports.
+    def query_coep_reports(query: ReportsQuery) -> list[dict[str, Any]]:
+        return ReportsLogs.__query(ReportsLogs.coep_reports, query)
 
     @staticmethod
-    def __coep_report_interesting(report: dict[str, Any]) -> bool:
-        return True # TODO: filter out uninteresting reports.
+    def __query(source: ReportRingBuffer, query: ReportsQuery) -> list[dict[str, Any]]:
+        return source.select(first_timestamp=query.get_first_timestamp(), last_timestamp=query.get_last_timestamp(), limit=query.get_limit(), predicate=query.matches, descending=query.is_descending())
 
     @staticmethod
-    def __is_csp_report_caused_by_extension(report: dict[str, Any]) -> bool:
-        csp_report_key: str = "csp-report"
-        source_file_key: str = "source-file"
-        moz_extension: str = "moz-extension"
+    def add_csp_aggregates(aggregates: list[dict[str, Any]]) -> set[str]:
+        return ReportsLogs.csp_aggregates.merge(aggregates)
 
-        return csp_report_key in report and source_file_key in report[csp_report_key] and report[csp_report_key][source_file_key] == moz_extension
+    @staticmethod
+    def add_coop_aggregates(aggregates: list[dict[str, Any]]) -> set[str]:
+        return ReportsLogs.coop_aggregates.merge(aggregates)
+
+    @staticmethod
+    def add_coep_aggregates(aggregates: list[dict[str, Any]]) -> set[str]:
+        return ReportsLogs.coep_aggregates.merge(aggregates)
+
+    @staticmethod
+    def get_csp_aggregates(limit: Optional[int]=None) -> list[dict[str, Any]]:
+        return ReportsLogs.csp_aggregates.snapshot(limit)
+
+    @staticmethod
+    def get_coop_aggregates(limit: Optional[int]=None) -> list[dict[str, Any]]:
+        return ReportsLogs.coop_aggregates.snapshot(limit)
+
+    @staticmethod
+    def get_coep_aggregates(limit: Optional[int]=None) -> list[dict[str, Any]]:
+        return ReportsLogs.coep_aggregates.snapshot(limit)
 
     @staticmethod
-    def __append_and_shift(report: dict[str, Any], sink: list[dict[str, Any]]) -> None:
-        sink.append(report)
+    def __extend(sink: ReportRingBuffer, reports: list[dict[str, Any]]) -> int:
+        # A single lock acquisition for the whole batch.
+        sink.extend(reports)
 
-        if len(sink) > ReportsLogs.MAX_LENGTH:
-            sink.pop(0)
+        return len(reports)
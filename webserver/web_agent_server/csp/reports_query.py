@@ -0,0 +1,117 @@
+from django.http import QueryDict
+
+from typing import Any, Optional
+from time import time_ns
+
+
+class ReportsQuery():
+    # The filterable fields of the inner report (e.g., `report["csp-report"]["violated-directive"]`), each one also being the query parameter.
+    FILTER_FIELDS: tuple[str, ...] = ("violated-directive", "blocked-uri", "document-uri")
+    TIMESTAMP_KEY: str = "timestamp"
+    ORDERS: tuple[str, ...] = ("asc", "desc")
+
+    # The timestamps are the ones given by the store when the reports are written, in nanoseconds.
+    # `after` is the (exclusive) pagination cursor, `since` and `until` are the (inclusive) time range, and `limit` is `None` for every matching report.
+    # `descending` returns the newest matching reports first, instead of the oldest.
+    def __init__(self, report_type: str, after: Optional[int]=None, since: Optional[int]=None, until: Optional[int]=None, limit: Optional[int]=None, filters: Optional[dict[str, str]]=None, descending: bool=False) -> None:
+        self.__report_type: str = report_type
+        self.__after: Optional[int] = after
+        self.__since: Optional[int] = since
+        self.__until: Optional[int] = until
+        self.__limit: Optional[int] = limit
+        self.__filters: dict[str, str] = filters or {}
+        self.__descending: bool = descending
+
+    # Returns `None` when the query string is invalid. The reports stamped less than `lag` nanoseconds ago are left out (see the README).
+    @staticmethod
+    def from_query_dict(report_type: str, query: QueryDict, default_limit: Optional[int], max_limit: Optional[int], newest_first: bool=True, lag: int=0) -> Optional["ReportsQuery"]:
+        try:
+            after: Optional[int] = ReportsQuery.__parse_timestamp(query.get("after"))
+            since: Optional[int] = ReportsQuery.__parse_timestamp(query.get("since"))
+            until: Optional[int] = ReportsQuery.__parse_timestamp(query.get("until"))
+            limit: Optional[int] = int(query["limit"]) if "limit" in query else default_limit
+        except ValueError:
+            return None
+
+        if limit is not None and (limit <= 0 or (max_limit is not None and limit > max_limit)):
+            return None
+
+        order: Optional[str] = query.get("order")
+
+        # The `next` cursor of a page is its newest report: a page of the newest reports after `after` would skip the older ones.
+        if (order is not None and order not in ReportsQuery.ORDERS) or (order == "desc" and after is not None):
+            return None
+
+        if lag > 0:
+            until = min(until, time_ns() - lag) if until is not None else time_ns() - lag
+
+        filters: dict[str, str] = {field: query[field] for field in ReportsQuery.FILTER_FIELDS if field in query}
+        descending: bool = order == "desc" if order is not None else newest_first and after is None
+
+        return ReportsQuery(report_type=report_type, after=after, since=since, until=until, limit=limit, filters=filters, descending=descending)
+
+    @staticmethod
+    def __parse_timestamp(value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+
+        timestamp: int = int(value)
+
+        if timestamp < 0:
+            raise ValueError(f"Negative timestamp: {timestamp}.")
+
+        return timestamp
+
+    def get_report_type(self) -> str:
+        return self.__report_type
+
+    def get_after(self) -> Optional[int]:
+        return self.__after
+
+    def get_limit(self) -> Optional[int]:
+        return self.__limit
+
+    def is_descending(self) -> bool:
+        return self.__descending
+
+    # The same query, from another cursor, and for another number of reports (e.g., the next page of a stream).
+    def with_page(self, after: Optional[int], limit: Optional[int]) -> "ReportsQuery":
+        return ReportsQuery(report_type=self.__report_type, after=after, since=self.__since, until=self.__until, limit=limit, filters=self.__filters, descending=self.__descending)
+
+    # The cursor from which to read the reports newer than `reports` (the result of this query): the newest timestamp, whatever the order.
+    def get_next_cursor(self, reports: list[dict[str, Any]]) -> Optional[int]:
+        if not reports:
+            return self.__after
+
+        return reports[0 if self.__descending else -1][ReportsQuery.TIMESTAMP_KEY]
+
+    # The smallest matching timestamp, so that the stores can seek to it instead of scanning from the oldest report.
+    def get_first_timestamp(self) -> int:
+        return max(self.__after + 1 if self.__after is not None else 0, self.__since if self.__since is not None else 0)
+
+    def get_last_timestamp(self) -> Optional[int]:
+        return self.__until
+
+    def matches(self, report: dict[str, Any]) -> bool:
+        if not self.__filters:
+            return True
+
+        inner_report: Any = report.get(f"{self.__report_type}-report")
+
+        return isinstance(inner_report, dict) and all(inner_report.get(field) == value for field, value in self.__filters.items())
+
+    def get_mongo_filter(self) -> dict[str, Any]:
+        mongo_filter: dict[str, Any] = {f"{self.__report_type}-report.{field}": value for field, value in self.__filters.items()}
+        timestamp_range: dict[str, int] = {"$gte": self.get_first_timestamp()}
+
+        if self.__until is not None:
+            timestamp_range["$lte"] = self.__until
+
+        mongo_filter[ReportsQuery.TIMESTAMP_KEY] = timestamp_range
+
+        return mongo_filter
+
+    # The indexes that serve `get_mongo_filter` (each filter, then the timestamp for the range and the sort), as `create_index` keys.
+    @staticmethod
+    def get_mongo_indexes(report_type: str) -> list[list[tuple[str, int]]]:
+        return [[(f"{report_type}-report.{field}", 1), (ReportsQuery.TIMESTAMP_KEY, 1)] for field in ReportsQuery.FILTER_FIELDS]
@@ -0,0 +1,129 @@
+from django.conf import settings
+
+from .reports import ReportsLogs
+from .reports_query import ReportsQuery
+from .report_aggregation import ReportAggregator
+from webserver.web_agent_server.metrics.stage_timer import StageTimer
+
+from typing import Any, Optional, Coroutine
+from threading import Lock, local
+from asyncio import AbstractEventLoop, new_event_loop
+from asgiref.sync import sync_to_async, iscoroutinefunction
+
+
+class ReportsStore():
+    REPORT_TYPES: tuple[str, ...] = ("csp", "coop", "coep")
+
+    __backend: Optional[Any] = None
+    __backend_is_async: bool = False
+    __lock: Lock = Lock()
+    # The event loop of each thread that calls an async backend synchronously (i.e., the ingestion writer), kept so that its database client is reused.
+    __thread_loops: local = local()
+
+    # Either `ReportsLogs` (in memory), a `MongoManager` or an `AsyncMongoManager`, depending on `settings.REPORTS_STORE`.
+    @staticmethod
+    def get_backend() -> Any:
+        if ReportsStore.__backend is None:
+            with ReportsStore.__lock:
+                if ReportsStore.__backend is None:
+                    backend: Any = ReportsStore.__create_backend(settings.REPORTS_STORE)
+
+                    ReportsStore.__backend_is_async = iscoroutinefunction(getattr(backend, f"get_{ReportsStore.REPORT_TYPES[0]}_reports"))
+                    ReportsStore.__backend = backend
+
+        return ReportsStore.__backend
+
+    @staticmethod
+    def is_backend_async() -> bool:
+        ReportsStore.get_backend()
+
+        return ReportsStore.__backend_is_async
+
+    @staticmethod
+    def __create_backend(name: str) -> Any:
+        if name == "memory":
+            return ReportsLogs
+        elif name == "mongo":
+            # Imported here, so that pymongo is only needed when it is actually used.
+            from webserver.web_agent_server.database.mongo_manager import MongoManager
+
+            return MongoManager.get_instance()
+        elif name == "mongo-async":
+            from webserver.web_agent_server.database.async_mongo_manager import AsyncMongoManager
+
+            return AsyncMongoManager.get_instance()
+        else:
+            raise ValueError(f"Unknown reports store: {name}.")
+
+    # Closes what the backend has bound to the running event loop (i.e., the database client of an `AsyncMongoManager`), before the loop itself is closed.
+    @staticmethod
+    async def aclose() -> None:
+        if ReportsStore.__backend is not None and ReportsStore.__backend_is_async:
+            await ReportsStore.__backend.close()
+
+    # Must not be called from a running event loop when the backend is async (use the `a*` methods there).
+    # Every report is counted in the aggregates of its fingerprint, but, unless `settings.REPORTS_STORE_DUPLICATES`, only the first report of each fingerprint is stored.
+    @staticmethod
+    def add_reports(report_type: str, reports: list[dict[str, Any]], received: Optional[list[int]]=None) -> int:
+        aggregates: list[dict[str, Any]] = ReportAggregator.aggregate(report_type, reports, received)
+        new_fingerprints: set[str] = ReportsStore.__call(f"add_{report_type}_aggregates", aggregates)
+
+        if not settings.REPORTS_STORE_DUPLICATES:
+            reports = [aggregate["sample"] for aggregate in aggregates if aggregate["fingerprint"] in new_fingerprints]
+
+        return ReportsStore.__call(f"add_{report_type}_reports", reports)
+
+    @staticmethod
+    def get_reports(report_type: str) -> list[dict[str, Any]]:
+        return ReportsStore.__call(f"get_{report_type}_reports")
+
+    @staticmethod
+    def query_reports(query: ReportsQuery) -> list[dict[str, Any]]:
+        return ReportsStore.__call(f"query_{query.get_report_type()}_reports", query)
+
+    @staticmethod
+    def get_aggregates(report_type: str, limit: Optional[int]=None) -> list[dict[str, Any]]:
+        return ReportsStore.__call(f"get_{report_type}_aggregates", limit)
+
+    @staticmethod
+    async def aget_reports(report_type: str) -> list[dict[str, Any]]:
+        return await ReportsStore.__acall(f"get_{report_type}_reports")
+
+    @staticmethod
+    async def aquery_reports(query: ReportsQuery) -> list[dict[str, Any]]:
+        return await ReportsStore.__acall(f"query_{query.get_report_type()}_reports", query)
+
+    @staticmethod
+    async def aget_aggregates(report_type: str, limit: Optional[int]=None) -> list[dict[str, Any]]:
+        return await ReportsStore.__acall(f"get_{report_type}_aggregates", limit)
+
+    @staticmethod
+    def __call(method: str, *args: Any) -> Any:
+        with StageTimer.stage(f"store-{method}"):
+            result: Any = getattr(ReportsStore.get_backend(), method)(*args)
+
+            return ReportsStore.__run_in_thread_loop(result) if ReportsStore.__backend_is_async else result
+
+    # The in-memory store never blocks, and the async backend is awaited as is, but the blocking database calls are moved to a thread,
+    # so that they do not stall the event loop.
+    @staticmethod
+    async def __acall(method: str, *args: Any) -> Any:
+        backend: Any = ReportsStore.get_backend()
+
+        with StageTimer.stage(f"store-{method}"):
+            if backend is ReportsLogs:
+                return getattr(backend, method)(*args)
+            elif ReportsStore.__backend_is_async:
+                return await getattr(backend, method)(*args)
+            else:
+                return await sync_to_async(getattr(backend, method), thread_sensitive=False)(*args)
+
+    @staticmethod
+    def __run_in_thread_loop(coroutine: Coroutine[Any, Any, Any]) -> Any:
+        loop: Optional[AbstractEventLoop] = getattr(ReportsStore.__thread_loops, "loop", None)
+
+        if loop is None or loop.is_closed():
+            loop = new_event_loop()
+            ReportsStore.__thread_loops.loop = loop
+
+        return loop.run_until_complete(coroutine)
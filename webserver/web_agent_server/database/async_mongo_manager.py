@@ -0,0 +1,229 @@
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.asynchronous.collection import AsyncCollection
+
+from .mongo_manager import MongoManager
+from .mongo_reports_documents import MongoReportsDocuments
+from webserver.web_agent_server.csp.reports_query import ReportsQuery
+
+from typing import Any, Dict, Optional, cast
+from threading import Lock
+from os import getpid
+from asyncio import AbstractEventLoop, Lock as AsyncLock, get_running_loop
+from weakref import WeakKeyDictionary
+
+
+class AsyncMongoManager():
+    # Same operations, metadata and retention strategies as `MongoManager`, but on pymongo's asyncio API, so that the event loop never waits on the database.
+
+    __instance: Optional["AsyncMongoManager"] = None
+    __instance_lock: Lock = Lock()
+
+    # Both arguments can be injected, otherwise they are loaded from the metadata file. As with `MongoManager`, nothing is read nor connected here.
+    def __init__(self, client: Optional[AsyncMongoClient[Dict[str, Any]]]=None, db_data: Optional[dict[str, str|int]]=None) -> None:
+        self.__db_data: Optional[dict[str, str|int]] = db_data
+        self.__injected_client: Optional[AsyncMongoClient[Dict[str, Any]]] = client
+        # An `AsyncMongoClient` is bound to the event loop it is first used on: each loop (e.g., the server's, the ingestion writer's) gets its own client, and an injected one serves a single loop.
+        self.__clients: WeakKeyDictionary[AbstractEventLoop, AsyncMongoClient[Dict[str, Any]]] = WeakKeyDictionary()
+        self.__collections: WeakKeyDictionary[AbstractEventLoop, dict[str, AsyncCollection[Dict[str, Any]]]] = WeakKeyDictionary()
+        self.__provisioning_locks: WeakKeyDictionary[AbstractEventLoop, AsyncLock] = WeakKeyDictionary()
+        self.__provisioned: bool = False
+        self.__documents: MongoReportsDocuments = MongoReportsDocuments()
+        self.__pid: int = getpid()
+
+    @staticmethod
+    def get_instance() -> "AsyncMongoManager":
+        if AsyncMongoManager.__instance is None:
+            with AsyncMongoManager.__instance_lock:
+                if AsyncMongoManager.__instance is None:
+                    AsyncMongoManager.__instance = AsyncMongoManager()
+
+        return AsyncMongoManager.__instance
+
+    def __get_db_data(self) -> dict[str, str|int]:
+        if self.__db_data is None:
+            self.__db_data = MongoManager.load_db_data()
+
+        return self.__db_data
+
+    def __create_client(self) -> AsyncMongoClient[Dict[str, Any]]:
+        try:
+            return AsyncMongoClient(**MongoManager.get_client_arguments(self.__get_db_data()))
+        except Exception:
+            raise ConnectionError("Error connecting to the database.")
+
+    async def get_client(self) -> AsyncMongoClient[Dict[str, Any]]:
+        loop: AbstractEventLoop = get_running_loop()
+
+        # The clients of the parent process must not be used after a fork.
+        if self.__pid != getpid():
+            self.__clients = WeakKeyDictionary()
+            self.__collections = WeakKeyDictionary()
+            self.__provisioning_locks = WeakKeyDictionary()
+            self.__pid = getpid()
+
+        client: Optional[AsyncMongoClient[Dict[str, Any]]] = self.__clients.get(loop)
+
+        if client is None:
+            if self.__injected_client is not None and len(self.__clients) > 0:
+                raise RuntimeError("The injected client is already bound to another event loop.")
+
+            client = self.__injected_client if self.__injected_client is not None else self.__create_client()
+            self.__clients[loop] = client
+            self.__collections[loop] = {}
+
+        if not self.__provisioned:
+            await self.__provision_collections(client, self.__provisioning_locks.setdefault(loop, AsyncLock()))
+
+        return client
+
+    async def __provision_collections(self, client: AsyncMongoClient[Dict[str, Any]], lock: AsyncLock) -> None:
+        async with lock:
+            if self.__provisioned:
+                return
+
+            db_data: dict[str, str|int] = self.__get_db_data()
+            database: AsyncDatabase[Dict[str, Any]] = client[cast(str, db_data["db_name"])]
+            retention: str = MongoReportsDocuments.get_retention(db_data)
+
+            for key in MongoReportsDocuments.COLLECTION_KEYS:
+                name: str = cast(str, db_data[key])
+
+                if retention == "capped":
+                    await self.__provision_capped_collection(database, name)
+
+                await database[name].create_indexes(MongoReportsDocuments.get_report_indexes(key, db_data))
+
+            for key in MongoReportsDocuments.AGGREGATES_COLLECTION_KEYS:
+                await database[cast(str, db_data[key])].create_indexes(MongoReportsDocuments.get_aggregates_indexes(db_data))
+
+            self.__provisioned = True
+
+    async def __provision_capped_collection(self, database: AsyncDatabase[Dict[str, Any]], name: str) -> None:
+        options: dict[str, Any] = MongoReportsDocuments.get_capped_options(self.__get_db_data())
+
+        if name not in await database.list_collection_names():
+            await database.create_collection(name, **options)
+        elif not (await database[name].options()).get("capped", False):
+            await database.command("convertToCapped", name, size=options["size"])
+
+    async def __get_collection(self, key: str) -> AsyncCollection[Dict[str, Any]]:
+        client: AsyncMongoClient[Dict[str, Any]] = await self.get_client()
+        collections: dict[str, AsyncCollection[Dict[str, Any]]] = self.__collections[get_running_loop()]
+        collection: Optional[AsyncCollection[Dict[str, Any]]] = collections.get(key)
+
+        if collection is None:
+            db_data: dict[str, str|int] = self.__get_db_data()
+            collection = client[cast(str, db_data["db_name"])][cast(str, db_data[key])]
+            collections[key] = collection
+
+        return collection
+
+    async def get_csp_reports_collection(self) -> AsyncCollection[Dict[str, Any]]:
+        return await self.__get_collection("csp_reports_collection")
+
+    async def get_coop_reports_collection(self) -> AsyncCollection[Dict[str, Any]]:
+        return await self.__get_collection("coop_reports_collection")
+
+    async def get_coep_reports_collection(self) -> AsyncCollection[Dict[str, Any]]:
+        return await self.__get_collection("coep_reports_collection")
+
+    async def get_csp_aggregates_collection(self) -> AsyncCollection[Dict[str, Any]]:
+        return await self.__get_collection("csp_aggregates_collection")
+
+    async def get_coop_aggregates_collection(self) -> AsyncCollection[Dict[str, Any]]:
+        return await self.__get_collection("coop_aggregates_collection")
+
+    async def get_coep_aggregates_collection(self) -> AsyncCollection[Dict[str, Any]]:
+        return await self.__get_collection("coep_aggregates_collection")
+
+    async def add_csp_report(self, report: dict[str, Any]) -> None:
+        await self.__add_report(report, await self.get_csp_reports_collection())
+
+    async def add_coop_report(self, report: dict[str, Any]) -> None:
+        await self.__add_report(report, await self.get_coop_reports_collection())
+
+    async def add_coep_report(self, report: dict[str, Any]) -> None:
+        await self.__add_report(report, await self.get_coep_reports_collection())
+
+    async def add_csp_reports(self, reports: list[dict[str, Any]]) -> int:
+        return await self.__add_reports(reports, await self.get_csp_reports_collection())
+
+    async def add_coop_reports(self, reports: list[dict[str, Any]]) -> int:
+        return await self.__add_reports(reports, await self.get_coop_reports_collection())
+
+    async def add_coep_reports(self, reports: list[dict[str, Any]]) -> int:
+        return await self.__add_reports(reports, await self.get_coep_reports_collection())
+
+    async def __add_reports(self, reports: list[Dict[str, Any]], collection: AsyncCollection[Dict[str, Any]]) -> int:
+        if not reports:
+            return 0
+
+        for report in reports:
+            self.__documents.stamp_report(report)
+
+        return len((await collection.insert_many(reports, ordered=False)).inserted_ids)
+
+    async def __add_report(self, report: Dict[str, Any], collection: AsyncCollection[Dict[str, Any]]) -> None:
+        await collection.insert_one(self.__documents.stamp_report(report))
+
+    async def get_csp_reports(self) -> list[Dict[str, Any]]:
+        return await self.__get_reports(await self.get_csp_reports_collection())
+
+    async def get_coop_reports(self) -> list[Dict[str, Any]]:
+        return await self.__get_reports(await self.get_coop_reports_collection())
+
+    async def get_coep_reports(self) -> list[Dict[str, Any]]:
+        return await self.__get_reports(await self.get_coep_reports_collection())
+
+    async def __get_reports(self, collection: AsyncCollection[Dict[str, Any]]) -> list[Dict[str, Any]]:
+        return await collection.find({}, MongoReportsDocuments.REPORT_PROJECTION).sort(MongoReportsDocuments.get_reports_sort()).limit(cast(int, self.__get_db_data()["max_reports"])).to_list()
+
+    async def add_csp_aggregates(self, aggregates: list[dict[str, Any]]) -> set[str]:
+        return await self.__add_aggregates(aggregates, await self.get_csp_aggregates_collection())
+
+    async def add_coop_aggregates(self, aggregates: list[dict[str, Any]]) -> set[str]:
+        return await self.__add_aggregates(aggregates, await self.get_coop_aggregates_collection())
+
+    async def add_coep_aggregates(self, aggregates: list[dict[str, Any]]) -> set[str]:
+        return await self.__add_aggregates(aggregates, await self.get_coep_aggregates_collection())
+
+    # One round-trip per batch: each aggregate is upserted, and the fingerprints that were not known yet are the upserted ones.
+    async def __add_aggregates(self, aggregates: list[Dict[str, Any]], collection: AsyncCollection[Dict[str, Any]]) -> set[str]:
+        if not aggregates:
+            return set()
+
+        result: Any = await collection.bulk_write(MongoReportsDocuments.get_aggregate_updates(aggregates), ordered=False)
+
+        return MongoReportsDocuments.get_new_fingerprints(result)
+
+    async def get_csp_aggregates(self, limit: Optional[int]=None) -> list[Dict[str, Any]]:
+        return await self.__get_aggregates(await self.get_csp_aggregates_collection(), limit)
+
+    async def get_coop_aggregates(self, limit: Optional[int]=None) -> list[Dict[str, Any]]:
+        return await self.__get_aggregates(await self.get_coop_aggregates_collection(), limit)
+
+    async def get_coep_aggregates(self, limit: Optional[int]=None) -> list[Dict[str, Any]]:
+        return await self.__get_aggregates(await self.get_coep_aggregates_collection(), limit)
+
+    async def __get_aggregates(self, collection: AsyncCollection[Dict[str, Any]], limit: Optional[int]) -> list[Dict[str, Any]]:
+        return [MongoReportsDocuments.to_aggregate(document) for document in await collection.find({}, MongoReportsDocuments.AGGREGATE_PROJECTION).sort(MongoReportsDocuments.get_aggregates_sort()).limit(MongoReportsDocuments.get_cursor_limit(limit)).to_list()]
+
+    async def query_csp_reports(self, query: ReportsQuery) -> list[Dict[str, Any]]:
+        return await self.__query_reports(await self.get_csp_reports_collection(), query)
+
+    async def query_coop_reports(self, query: ReportsQuery) -> list[Dict[str, Any]]:
+        return await self.__query_reports(await self.get_coop_reports_collection(), query)
+
+    async def query_coep_reports(self, query: ReportsQuery) -> list[Dict[str, Any]]:
+        return await self.__query_reports(await self.get_coep_reports_collection(), query)
+
+    async def __query_reports(self, collection: AsyncCollection[Dict[str, Any]], query: ReportsQuery) -> list[Dict[str, Any]]:
+        return await collection.find(query.get_mongo_filter(), MongoReportsDocuments.REPORT_PROJECTION).sort(MongoReportsDocuments.get_query_sort(query)).limit(MongoReportsDocuments.get_cursor_limit(query.get_limit())).to_list()
+
+    # Only closes the client of the running event loop: the other clients are closed with their loop.
+    async def close(self) -> None:
+        client: Optional[AsyncMongoClient[Dict[str, Any]]] = self.__clients.pop(get_running_loop(), None)
+
+        if client is not None and client is not self.__injected_client:
+            await client.close()
@@ -1,51 +1,177 @@
 from pymongo import MongoClient
 from pymongo.database import Database
 from pymongo.collection import Collection
-from typing import Any, Dict, cast
+
+from .mongo_reports_documents import MongoReportsDocuments
+from webserver.web_agent_server.csp.reports_query import ReportsQuery
+
+from typing import Any, Dict, Optional, cast
 from json import load
-from time import time_ns
-from pyoptional.pyoptional import PyOptional
+from threading import Lock
+from os import getpid
 
 
 class MongoManager():
-    def __init__(self) -> None:
-        self.__db_data: dict[str, str|int] = MongoManager.__load_db_data()
-        self.__client: MongoClient[Dict[str, Any]] = self.__create_client()
+    # The optional metadata keys, mapped to the `MongoClient` options they set, with their default values.
+    CLIENT_OPTIONS: dict[str, tuple[str, Any]] = {
+        "max_pool_size": ("maxPoolSize", 100),
+        "min_pool_size": ("minPoolSize", 0),
+        "max_idle_time_ms": ("maxIdleTimeMS", None),
+        "connect_timeout_ms": ("connectTimeoutMS", 5000),
+        "server_selection_timeout_ms": ("serverSelectionTimeoutMS", 5000),
+        "socket_timeout_ms": ("socketTimeoutMS", None),
+        "write_concern_w": ("w", 1),
+        "write_concern_j": ("journal", False)
+    }
+
+    __instance: Optional["MongoManager"] = None
+    __instance_lock: Lock = Lock()
+
+    # Both arguments can be injected (e.g., a `mongomock.MongoClient`), otherwise they are loaded from the metadata file.
+    # Nothing is read nor connected here: it all happens on first use, so the server starts even when the database is down.
+    def __init__(self, client: Optional[MongoClient[Dict[str, Any]]]=None, db_data: Optional[dict[str, str|int]]=None) -> None:
+        self.__db_data: Optional[dict[str, str|int]] = db_data
+        self.__injected_client: Optional[MongoClient[Dict[str, Any]]] = client
+        self.__client: Optional[MongoClient[Dict[str, Any]]] = None
+        self.__client_pid: int = -1
+        self.__collections: dict[str, Collection[Dict[str, Any]]] = {}
+        self.__provisioned: bool = False
+        self.__documents: MongoReportsDocuments = MongoReportsDocuments()
+        self.__lock: Lock = Lock()
+
+    # One manager per process, so that all the requests share the same connection pool.
+    @staticmethod
+    def get_instance() -> "MongoManager":
+        if MongoManager.__instance is None:
+            with MongoManager.__instance_lock:
+                if MongoManager.__instance is None:
+                    MongoManager.__instance = MongoManager()
+
+        return MongoManager.__instance
 
     @staticmethod
-    def __load_db_data() -> dict[str, str|int]:
+    def load_db_data() -> dict[str, str|int]:
         try:
             with open("db_data.json", "r") as file:
                 return load(file)
         except Exception:
             raise IOError("Error loading the database metadata.")
 
+    def __get_db_data(self) -> dict[str, str|int]:
+        if self.__db_data is None:
+            self.__db_data = MongoManager.load_db_data()
+
+        return self.__db_data
+
+    # The keyword arguments of both `MongoClient` and `AsyncMongoClient`.
+    @staticmethod
+    def get_client_arguments(db_data: dict[str, str|int]) -> dict[str, Any]:
+        options: dict[str, Any] = {}
+
+        for key, (option, default) in MongoManager.CLIENT_OPTIONS.items():
+            value: Any = db_data.get(key, default)
+
+            if value is not None:
+                options[option] = value
+
+        try:
+            with open(cast(str, db_data["db_password_file"]), "r") as file:
+                password: str = file.read()
+        except Exception:
+            raise ConnectionError("Error connecting to the database.")
+
+        return {
+            "host": cast(str, db_data["hostname"]),
+            "port": cast(int, db_data["port"]),
+            "username": cast(str, db_data["username"]),
+            "password": password,
+            "authMechanism": cast(str, "SCRAM-SHA-256"),
+            **options
+        }
+
     def __create_client(self) -> MongoClient[Dict[str, Any]]:
         try:
-            return MongoClient(
-                host=cast(str, self.__db_data["hostname"]),
-                port=cast(int, self.__db_data["port"]),
-                username=cast(str, self.__db_data["username"]),
-                password=open(cast(str, self.__db_data["db_password_file"]), "r").read(),
-                authMechanism=cast(str, "SCRAM-SHA-256")
-            )
+            return MongoClient(**MongoManager.get_client_arguments(self.__get_db_data()))
         except Exception:
             raise ConnectionError("Error connecting to the database.")
 
+    def __provision_collections(self, client: MongoClient[Dict[str, Any]]) -> None:
+        db_data: dict[str, str|int] = self.__get_db_data()
+        database: Database[Dict[str, Any]] = client[cast(str, db_data["db_name"])]
+        retention: str = MongoReportsDocuments.get_retention(db_data)
+
+        for key in MongoReportsDocuments.COLLECTION_KEYS:
+            name: str = cast(str, db_data[key])
+
+            if retention == "capped":
+                self.__provision_capped_collection(database, name)
+
+            database[name].create_indexes(MongoReportsDocuments.get_report_indexes(key, db_data))
+
+        for key in MongoReportsDocuments.AGGREGATES_COLLECTION_KEYS:
+            database[cast(str, db_data[key])].create_indexes(MongoReportsDocuments.get_aggregates_indexes(db_data))
+
+    def __provision_capped_collection(self, database: Database[Dict[str, Any]], name: str) -> None:
+        options: dict[str, Any] = MongoReportsDocuments.get_capped_options(self.__get_db_data())
+
+        if name not in database.list_collection_names():
+            database.create_collection(name, **options)
+        elif not database[name].options().get("capped", False):
+            # `convertToCapped` cannot set a maximum number of documents: only the size bounds the collections created before this change.
+            database.command("convertToCapped", name, size=options["size"])
+
+    # A `MongoClient` must not be shared across a fork: a daphne worker forked from a process that already used the database gets its own client.
     def get_client(self) -> MongoClient[Dict[str, Any]]:
-        return self.__client
+        client: Optional[MongoClient[Dict[str, Any]]] = self.__client
+
+        if client is not None and self.__client_pid == getpid() and self.__provisioned:
+            return client
+
+        with self.__lock:
+            if self.__client is None or self.__client_pid != getpid():
+                self.__client = self.__injected_client if self.__injected_client is not None else self.__create_client()
+                self.__client_pid = getpid()
+                self.__collections = {}
+
+            # The collections are provisioned on the server, so once per manager is enough, even across forks.
+            # When the database is unreachable, the client is kept, and the provisioning is attempted again on the next call.
+            if not self.__provisioned:
+                self.__provision_collections(self.__client)
+                self.__provisioned = True
+
+            return self.__client
 
     def get_database(self) -> Database[Dict[str, Any]]:
-        return self.__client[cast(str, self.__db_data["db_name"])]
+        return self.get_client()[cast(str, self.__get_db_data()["db_name"])]
+
+    def __get_collection(self, key: str) -> Collection[Dict[str, Any]]:
+        client: MongoClient[Dict[str, Any]] = self.get_client()
+        collection: Optional[Collection[Dict[str, Any]]] = self.__collections.get(key)
+
+        if collection is None:
+            db_data: dict[str, str|int] = self.__get_db_data()
+            collection = client[cast(str, db_data["db_name"])][cast(str, db_data[key])]
+            self.__collections[key] = collection
+
+        return collection
 
     def get_csp_reports_collection(self) -> Collection[Dict[str, Any]]:
-        return self.get_database()[cast(str, self.__db_data["csp_reports_collection"])]
+        return self.__get_collection("csp_reports_collection")
 
     def get_coop_reports_collection(self) -> Collection[Dict[str, Any]]:
-        return self.get_database()[cast(str, self.__db_data["coop_reports_collection"])]
+        return self.__get_collection("coop_reports_collection")
 
     def get_coep_reports_collection(self) -> Collection[Dict[str, Any]]:
-        return self.get_database()[cast(str, self.__db_data["coep_reports_collection"])]
+        return self.__get_collection("coep_reports_collection")
+
+    def get_csp_aggregates_collection(self) -> Collection[Dict[str, Any]]:
+        return self.__get_collection("csp_aggregates_collection")
+
+    def get_coop_aggregates_collection(self) -> Collection[Dict[str, Any]]:
+        return self.__get_collection("coop_aggregates_collection")
+
+    def get_coep_aggregates_collection(self) -> Collection[Dict[str, Any]]:
+        return self.__get_collection("coep_aggregates_collection")
 
     def add_csp_report(self, report: dict[str, Any]) -> None:
         self.__add_report(report, self.get_csp_reports_collection())
@@ -56,15 +182,27 @@ class MongoManager():
     def add_coep_report(self, report: dict[str, Any]) -> None:
         self.__add_report(report, self.get_coep_reports_collection())
 
-    def __add_report(self, report: Dict[str, Any], collection: Collection[Dict[str, Any]]) -> None:
-        report["timestamp"] = time_ns()
+    def add_csp_reports(self, reports: list[dict[str, Any]]) -> int:
+        return self.__add_reports(reports, self.get_csp_reports_collection())
+
+    def add_coop_reports(self, reports: list[dict[str, Any]]) -> int:
+        return self.__add_reports(reports, self.get_coop_reports_collection())
 
-        if collection.count_documents({}) >= cast(int, self.__db_data["max_reports"]):
-            oldest: PyOptional[Dict[str, Any]] = PyOptional.of_nullable(collection.find_one({}, sort=[("timestamp", 1)]))
+    def add_coep_reports(self, reports: list[dict[str, Any]]) -> int:
+        return self.__add_reports(reports, self.get_coep_reports_collection())
 
-            oldest.if_present(lambda doc: collection.delete_one({"_id": doc["_id"]}))
+    # The retention is enforced by the server (see `__provision_collections`), so each write is a single round-trip.
+    def __add_reports(self, reports: list[Dict[str, Any]], collection: Collection[Dict[str, Any]]) -> int:
+        if not reports:
+            return 0
 
-        collection.insert_one(report)
+        for report in reports:
+            self.__documents.stamp_report(report)
+
+        return len(collection.insert_many(reports, ordered=False).inserted_ids)
+
+    def __add_report(self, report: Dict[str, Any], collection: Collection[Dict[str, Any]]) -> None:
+        collection.insert_one(self.__documents.stamp_report(report))
 
     def get_csp_reports(self) -> list[Dict[str, Any]]:
         return self.__get_reports(self.get_csp_reports_collection())
@@ -76,7 +214,54 @@ class MongoManager():
         return self.__get_reports(self.get_coep_reports_collection())
 
     def __get_reports(self, collection: Collection[Dict[str, Any]]) -> list[Dict[str, Any]]:
-        return list(collection.find({}, {"_id": 0}).sort("timestamp", -1).limit(cast(int, self.__db_data["max_reports"])))
+        return list(collection.find({}, MongoReportsDocuments.REPORT_PROJECTION).sort(MongoReportsDocuments.get_reports_sort()).limit(cast(int, self.__get_db_data()["max_reports"])))
+
+    def add_csp_aggregates(self, aggregates: list[dict[str, Any]]) -> set[str]:
+        return self.__add_aggregates(aggregates, self.get_csp_aggregates_collection())
+
+    def add_coop_aggregates(self, aggregates: list[dict[str, Any]]) -> set[str]:
+        return self.__add_aggregates(aggregates, self.get_coop_aggregates_collection())
+
+    def add_coep_aggregates(self, aggregates: list[dict[str, Any]]) -> set[str]:
+        return self.__add_aggregates(aggregates, self.get_coep_aggregates_collection())
+
+    # One round-trip per batch: each aggregate is upserted, and the fingerprints that were not known yet are the upserted ones.
+    def __add_aggregates(self, aggregates: list[Dict[str, Any]], collection: Collection[Dict[str, Any]]) -> set[str]:
+        if not aggregates:
+            return set()
+
+        result: Any = collection.bulk_write(MongoReportsDocuments.get_aggregate_updates(aggregates), ordered=False)
+
+        return MongoReportsDocuments.get_new_fingerprints(result)
+
+    def get_csp_aggregates(self, limit: Optional[int]=None) -> list[Dict[str, Any]]:
+        return self.__get_aggregates(self.get_csp_aggregates_collection(), limit)
+
+    def get_coop_aggregates(self, limit: Optional[int]=None) -> list[Dict[str, Any]]:
+        return self.__get_aggregates(self.get_coop_aggregates_collection(), limit)
+
+    def get_coep_aggregates(self, limit: Optional[int]=None) -> list[Dict[str, Any]]:
+        return self.__get_aggregates(self.get_coep_aggregates_collection(), limit)
+
+    def __get_aggregates(self, collection: Collection[Dict[str, Any]], limit: Optional[int]) -> list[Dict[str, Any]]:
+        return [MongoReportsDocuments.to_aggregate(document) for document in collection.find({}, MongoReportsDocuments.AGGREGATE_PROJECTION).sort(MongoReportsDocuments.get_aggregates_sort()).limit(MongoReportsDocuments.get_cursor_limit(limit))]
+
+    def query_csp_reports(self, query: ReportsQuery) -> list[Dict[str, Any]]:
+        return self.__query_reports(self.get_csp_reports_collection(), query)
+
+    def query_coop_reports(self, query: ReportsQuery) -> list[Dict[str, Any]]:
+        return self.__query_reports(self.get_coop_reports_collection(), query)
+
+    def query_coep_reports(self, query: ReportsQuery) -> list[Dict[str, Any]]:
+        return self.__query_reports(self.get_coep_reports_collection(), query)
+
+    def __query_reports(self, collection: Collection[Dict[str, Any]], query: ReportsQuery) -> list[Dict[str, Any]]:
+        return list(collection.find(query.get_mongo_filter(), MongoReportsDocuments.REPORT_PROJECTION).sort(MongoReportsDocuments.get_query_sort(query)).limit(MongoReportsDocuments.get_cursor_limit(query.get_limit())))
 
     def close(self) -> None:
-        self.__client.close()
+        with self.__lock:
+            if self.__client is not None and self.__client_pid == getpid():
+                self.__client.close()
+
+            self.__client = None
+            self.__collections = {}
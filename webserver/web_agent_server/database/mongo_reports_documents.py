@@ -0,0 +1,108 @@
+from pymongo import IndexModel, UpdateOne, ASCENDING, DESCENDING
+
+from webserver.web_agent_server.csp.reports_query import ReportsQuery
+
+from typing import Any, Dict, Optional, cast
+from time import time_ns
+from datetime import datetime, timezone
+from threading import Lock
+
+
+class MongoReportsDocuments():
+    # Everything about the reports collections that does not touch the database (indexes, documents, filters, projections), shared by `MongoManager` and `AsyncMongoManager`.
+    # "capped": each collection is a capped collection of at most `max_reports` documents (and `max_reports_size` bytes), so the server drops the oldest reports itself.
+    # "ttl": the reports expire `reports_ttl` seconds after being written (e.g., for mongomock, which does not support capped collections).
+    RETENTION_STRATEGIES: tuple[str, ...] = ("capped", "ttl")
+    COLLECTION_KEYS: tuple[str, ...] = ("csp_reports_collection", "coop_reports_collection", "coep_reports_collection")
+    AGGREGATES_COLLECTION_KEYS: tuple[str, ...] = ("csp_aggregates_collection", "coop_aggregates_collection", "coep_aggregates_collection")
+    REPORT_PROJECTION: dict[str, int] = {"_id": 0, "created_at": 0}
+    # The aggregates are updated in place, so they cannot live in capped collections: those not seen for `aggregates_ttl` seconds expire instead.
+    AGGREGATES_TTL: int = 30 * 24 * 3600
+    AGGREGATE_PROJECTION: dict[str, int] = {"last_seen_at": 0, "sample._id": 0, "sample.created_at": 0}
+
+    def __init__(self) -> None:
+        self.__last_timestamp: int = 0
+        self.__lock: Lock = Lock()
+
+    @staticmethod
+    def get_retention(db_data: dict[str, str|int]) -> str:
+        retention: str = cast(str, db_data.get("retention", "capped"))
+
+        if retention not in MongoReportsDocuments.RETENTION_STRATEGIES:
+            raise ValueError(f"Unknown retention strategy: {retention}.")
+
+        return retention
+
+    # The `create_collection` options of a capped reports collection.
+    @staticmethod
+    def get_capped_options(db_data: dict[str, str|int]) -> dict[str, Any]:
+        return {"capped": True, "size": cast(int, db_data["max_reports_size"]), "max": cast(int, db_data["max_reports"])}
+
+    # The indexes of the reports collection of `key`: the expiry (for the "ttl" retention strategy), the timestamp, and the ones that serve `ReportsQuery.get_mongo_filter`.
+    @staticmethod
+    def get_report_indexes(key: str, db_data: dict[str, str|int]) -> list[IndexModel]:
+        indexes: list[IndexModel] = [IndexModel([(ReportsQuery.TIMESTAMP_KEY, ASCENDING)])]
+
+        if MongoReportsDocuments.get_retention(db_data) == "ttl":
+            indexes.append(IndexModel("created_at", expireAfterSeconds=cast(int, db_data["reports_ttl"])))
+
+        return indexes + [IndexModel(index) for index in ReportsQuery.get_mongo_indexes(key.split("_")[0])]
+
+    # The expiry of the aggregates needs a date: `last_seen_at` is `last_seen`, as a date.
+    @staticmethod
+    def get_aggregates_indexes(db_data: dict[str, str|int]) -> list[IndexModel]:
+        return [IndexModel([("count", DESCENDING)]), IndexModel("last_seen_at", expireAfterSeconds=cast(int, db_data.get("aggregates_ttl", MongoReportsDocuments.AGGREGATES_TTL)))]
+
+    def stamp_report(self, report: Dict[str, Any]) -> Dict[str, Any]:
+        # Strictly increasing, so that the timestamps can be used as pagination cursors.
+        with self.__lock:
+            self.__last_timestamp = max(time_ns(), self.__last_timestamp + 1)
+            report[ReportsQuery.TIMESTAMP_KEY] = self.__last_timestamp
+
+        # Only used by the "ttl" retention strategy: TTL indexes need a date.
+        report["created_at"] = datetime.now(timezone.utc)
+
+        return report
+
+    # One upsert per aggregate, so that a whole batch is a single `bulk_write`.
+    @staticmethod
+    def get_aggregate_updates(aggregates: list[Dict[str, Any]]) -> list[UpdateOne]:
+        return [
+            UpdateOne(
+                {"_id": aggregate["fingerprint"]},
+                {
+                    "$inc": {"count": aggregate["count"]},
+                    "$min": {"first_seen": aggregate["first_seen"]},
+                    "$max": {"last_seen": aggregate["last_seen"], "last_seen_at": datetime.fromtimestamp(aggregate["last_seen"] / 1e9, timezone.utc)},
+                    "$setOnInsert": {"sample": aggregate["sample"]}
+                },
+                upsert=True
+            ) for aggregate in aggregates
+        ]
+
+    # The fingerprints that were not known yet are the `_id`s of the upserted aggregates.
+    @staticmethod
+    def get_new_fingerprints(result: Any) -> set[str]:
+        return set(result.upserted_ids.values())
+
+    # Same layout as the in-memory aggregates.
+    @staticmethod
+    def to_aggregate(document: Dict[str, Any]) -> Dict[str, Any]:
+        return {"fingerprint": document.pop("_id"), **document}
+
+    @staticmethod
+    def get_aggregates_sort() -> list[tuple[str, int]]:
+        return [("count", DESCENDING)]
+
+    @staticmethod
+    def get_reports_sort() -> list[tuple[str, int]]:
+        return [(ReportsQuery.TIMESTAMP_KEY, DESCENDING)]
+
+    @staticmethod
+    def get_query_sort(query: ReportsQuery) -> list[tuple[str, int]]:
+        return [(ReportsQuery.TIMESTAMP_KEY, DESCENDING if query.is_descending() else ASCENDING)]
+
+    # `limit(0)` means no limit.
+    @staticmethod
+    def get_cursor_limit(limit: Optional[int]) -> int:
+        return limit or 0
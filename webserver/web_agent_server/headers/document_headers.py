@@ -8,7 +8,11 @@ from webserver.web_agent_server.headers.headers import Headers
 class DocumentHeaders(Headers):
     @staticmethod
     def get_headers(request: HttpRequest, report_to: bool=False, report_uri: bool=True) -> dict[str, Any]:
-        return Headers.get_common_headers(request=request) | {
+        return DocumentHeaders.build_headers(safari=Headers.is_safari(request=request), report_to=report_to, report_uri=report_uri)
+
+    @staticmethod
+    def build_headers(safari: bool, report_to: bool=False, report_uri: bool=True) -> dict[str, Any]:
+        return Headers.build_common_headers(safari=safari) | {
             "Cross-Origin-Opener-Policy": f"same-origin;{Headers.get_coop_report_directive(report_to=report_to, report_uri=report_uri)}",
             "Cross-Origin-Resource-Policy": "same-origin",
             "Cross-Origin-Embedder-Policy": f"require-corp;{Headers.get_coep_report_directive(report_to=report_to, report_uri=report_uri)}",
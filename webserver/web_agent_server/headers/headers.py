@@ -8,24 +8,36 @@ from json import dumps
 
 
 class Headers():
+    SERVER: str = "Web-Agent"
+
     @staticmethod
     def get_common_headers(request: HttpRequest) -> dict[str, Any]:
+        return Headers.build_common_headers(safari=Headers.is_safari(request=request))
+
+    # Everything but the Safari-specific headers depends only on the settings, so the result can be computed once and reused.
+    @staticmethod
+    def build_common_headers(safari: bool) -> dict[str, Any]:
         return {
             "X-Content-Type-Options": "nosniff",
             "X-Frame-Options": "SAMEORIGIN",
             "Permissions-Policy": "accelerometer=(), autoplay=(), camera=(), cross-origin-isolated=(), display-capture=(), document-domain=(), encrypted-media=(), fullscreen=(), geolocation=(), gyroscope=(), magnetometer=(), microphone=(), midi=(), payment=(), picture-in-picture=(), publickey-credentials-get=(), screen-wake-lock=(), serial=(), sync-xhr=(), usb=(), xr-spatial-tracking=()",
             "Referrer-Policy": "same-origin",
-            "Server": "Web-Agent",
+            "Server": Headers.SERVER,
             "Strict-Transport-Security": "max-age=63072000; includeSubDomains; preload"
-        } | Headers.__get_x_xss_protection_if_safari(request=request) | Headers.__get_report_to_if_necessary()
+        } | Headers.__get_x_xss_protection_if_safari(safari=safari) | Headers.__get_report_to_if_necessary()
+
+    @staticmethod
+    def is_safari(request: HttpRequest) -> bool:
+        relevant_headers_names: list[str] = ["HTTP_USER_AGENT", "HTTP_SEC_CH_UA", "HTTP_SEC_CH_UA_FULL_VERSION_LIST"]
+
+        return any("Safari" in request.META.get(header, "") for header in relevant_headers_names)
 
     # TODO: remove this once safari drops support for X-XSS-Protection.
     @staticmethod
-    def __get_x_xss_protection_if_safari(request: HttpRequest) -> dict[str, Any]:
+    def __get_x_xss_protection_if_safari(safari: bool) -> dict[str, Any]:
         x_xss_protection: dict[str, str] = {"X-XSS-Protection": "1; mode=block"}
-        relevant_headers_names: list[str] = ["HTTP_USER_AGENT", "HTTP_SEC_CH_UA", "HTTP_SEC_CH_UA_FULL_VERSION_LIST"]
 
-        if any("Safari" in request.META.get(header, "") for header in relevant_headers_names):
+        if safari:
             return x_xss_protection
         else:
             return {}
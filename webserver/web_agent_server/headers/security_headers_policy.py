@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from webserver.web_agent_server.headers.headers import Headers
+from webserver.web_agent_server.headers.document_headers import DocumentHeaders
+from webserver.web_agent_server.headers.static_subresources_headers import StaticSubResourcesHeaders
+
+from typing import Any
+
+
+class SecurityHeadersPolicy():
+    # The security headers of each response, for `SecurityHeadersMiddleware` and `FastPathMiddleware`: every variant (sub-resource or document, Safari or not) is built once.
+    def __init__(self) -> None:
+        self.__static_url: str = settings.STATIC_URL
+        # Indexed by the "is Safari" flag.
+        self.__document_headers: tuple[tuple[tuple[str, str], ...], ...] = tuple(
+            SecurityHeadersPolicy.__to_items(DocumentHeaders.build_headers(safari=safari, report_to=settings.REPORT_TO_ACTIVE, report_uri=not settings.REPORT_TO_ACTIVE)) for safari in (False, True)
+        )
+        self.__static_headers: tuple[tuple[tuple[str, str], ...], ...] = tuple(
+            SecurityHeadersPolicy.__to_items(StaticSubResourcesHeaders.build_headers(safari=safari)) for safari in (False, True)
+        )
+
+    def is_static_subresource(self, path: str) -> bool:
+        return path.startswith(self.__static_url) or path == "/favicon.ico"
+
+    def get_header_items(self, request: HttpRequest) -> tuple[tuple[str, str], ...]:
+        headers: tuple[tuple[tuple[str, str], ...], ...] = self.__static_headers if self.is_static_subresource(request.path_info) else self.__document_headers
+
+        return headers[Headers.is_safari(request=request)]
+
+    @staticmethod
+    def apply_headers(response: HttpResponse, headers: tuple[tuple[str, str], ...]) -> HttpResponse:
+        for header, value in headers:
+            response[header] = value
+
+        return response
+
+    # Ready-to-apply `(header, value)` pairs.
+    @staticmethod
+    def __to_items(headers: dict[str, Any]) -> tuple[tuple[str, str], ...]:
+        return tuple((header, str(value)) for header, value in headers.items())
@@ -10,7 +10,11 @@ class StaticSubResourcesHeaders(Headers):
 
     @staticmethod
     def get_headers(request: HttpRequest, report_to: bool=False, report_uri: bool=True) -> dict[str, Any]:
-        return Headers.get_common_headers(request=request) | {
+        return StaticSubResourcesHeaders.build_headers(safari=Headers.is_safari(request=request), report_to=report_to, report_uri=report_uri)
+
+    @staticmethod
+    def build_headers(safari: bool, report_to: bool=False, report_uri: bool=True) -> dict[str, Any]:
+        return Headers.build_common_headers(safari=safari) | {
             "Access-Control-Allow-Origin": "*",
             "Cross-Origin-Resource-Policy": "cross-origin",
             "Timing-Allow-Origin": "*",
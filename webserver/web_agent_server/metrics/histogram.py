@@ -0,0 +1,36 @@
+from bisect import bisect_left
+from threading import Lock
+from typing import Any
+
+
+class Histogram():
+    # Upper bounds of the buckets, in seconds (the last bucket, `+Inf`, is implicit).
+    DEFAULT_BUCKETS: tuple[float, ...] = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: tuple[float, ...]=DEFAULT_BUCKETS) -> None:
+        if list(buckets) != sorted(set(buckets)):
+            raise ValueError(f"The buckets must be strictly increasing, not {buckets}.")
+
+        self.__buckets: tuple[float, ...] = buckets
+        self.__counts: list[int] = [0] * (len(buckets) + 1)
+        self.__sum: float = 0.0
+        self.__lock: Lock = Lock()
+
+    # The bucket is found before taking the lock, which then only guards two additions.
+    def observe(self, value: float) -> None:
+        index: int = bisect_left(self.__buckets, value)
+
+        with self.__lock:
+            self.__counts[index] += 1
+            self.__sum += value
+
+    def get_buckets(self) -> tuple[float, ...]:
+        return self.__buckets
+
+    # The counts are per bucket, not cumulative.
+    def snapshot(self) -> dict[str, Any]:
+        with self.__lock:
+            counts: list[int] = list(self.__counts)
+            total: float = self.__sum
+
+        return {"buckets": list(self.__buckets), "counts": counts, "count": sum(counts), "sum": total}
@@ -0,0 +1,43 @@
+from .histogram import Histogram
+
+from threading import Lock
+from typing import Optional
+
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class MetricsRegistry():
+    # The counters and histograms updated on the hot path, keyed by their name and labels (e.g., `("route", "static"), ("status", "304")`).
+    # An update takes an uncontended lock for a dictionary update, and the histograms have a lock each, so that they never wait for one another.
+    __counters: dict[tuple[str, Labels], int] = {}
+    __histograms: dict[tuple[str, Labels], Histogram] = {}
+    __lock: Lock = Lock()
+
+    @staticmethod
+    def increment(name: str, labels: Labels=(), value: int=1) -> None:
+        key: tuple[str, Labels] = (name, labels)
+
+        with MetricsRegistry.__lock:
+            MetricsRegistry.__counters[key] = MetricsRegistry.__counters.get(key, 0) + value
+
+    @staticmethod
+    def observe(name: str, labels: Labels, value: float) -> None:
+        key: tuple[str, Labels] = (name, labels)
+        histogram: Optional[Histogram] = MetricsRegistry.__histograms.get(key)
+
+        if histogram is None:
+            with MetricsRegistry.__lock:
+                histogram = MetricsRegistry.__histograms.setdefault(key, Histogram())
+
+        histogram.observe(value)
+
+    @staticmethod
+    def get_counters() -> dict[tuple[str, Labels], int]:
+        with MetricsRegistry.__lock:
+            return dict(MetricsRegistry.__counters)
+
+    @staticmethod
+    def get_histograms() -> dict[tuple[str, Labels], Histogram]:
+        with MetricsRegistry.__lock:
+            return dict(MetricsRegistry.__histograms)
@@ -0,0 +1,60 @@
+from .metrics_registry import Labels
+
+from typing import Any
+
+
+class PrometheusExporter():
+    # The text exposition format (version 0.0.4): https://prometheus.io/docs/instrumenting/exposition_formats/
+    CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+    # `labels` are added to every sample (e.g., the process that exports them).
+    def __init__(self, labels: Labels=()) -> None:
+        self.__labels: Labels = labels
+        self.__lines: list[str] = []
+
+    def add_metric(self, name: str, metric_type: str, help: str, samples: dict[Labels, float]) -> None:
+        self.__add_header(name, metric_type, help)
+
+        for labels, value in samples.items():
+            self.__lines.append(f"{name}{PrometheusExporter.__format_labels((*self.__labels, *labels))} {PrometheusExporter.__format_value(value)}")
+
+    # The snapshots are those of `Histogram`, whose counts are per bucket: Prometheus wants them cumulative.
+    def add_histogram(self, name: str, help: str, snapshots: dict[Labels, dict[str, Any]]) -> None:
+        self.__add_header(name, "histogram", help)
+
+        for labels, snapshot in snapshots.items():
+            cumulative: int = 0
+            labels = (*self.__labels, *labels)
+
+            for bound, count in zip([*snapshot["buckets"], float("inf")], snapshot["counts"]):
+                cumulative += count
+
+                self.__lines.append(f"{name}_bucket{PrometheusExporter.__format_labels((*labels, ('le', PrometheusExporter.__format_value(bound))))} {cumulative}")
+
+            self.__lines.append(f"{name}_sum{PrometheusExporter.__format_labels(labels)} {PrometheusExporter.__format_value(snapshot['sum'])}")
+            self.__lines.append(f"{name}_count{PrometheusExporter.__format_labels(labels)} {snapshot['count']}")
+
+    def render(self) -> str:
+        return "".join(f"{line}\n" for line in self.__lines)
+
+    def __add_header(self, name: str, metric_type: str, help: str) -> None:
+        self.__lines.append(f"# HELP {name} {help}")
+        self.__lines.append(f"# TYPE {name} {metric_type}")
+
+    @staticmethod
+    def __format_labels(labels: Labels) -> str:
+        if not labels:
+            return ""
+
+        return "{" + ",".join(f'{name}="{PrometheusExporter.__escape(value)}"' for name, value in labels) + "}"
+
+    @staticmethod
+    def __escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    @staticmethod
+    def __format_value(value: float) -> str:
+        if value == float("inf"):
+            return "+Inf"
+        else:
+            return repr(value) if isinstance(value, float) else str(value)
@@ -0,0 +1,155 @@
+from .histogram import Histogram
+
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Iterator, Optional
+from asgiref.sync import iscoroutinefunction
+
+
+class StageTimings():
+    # The stages of a request nest (a middleware calls the next one, which calls the view, which calls the store): they are kept on a stack,
+    # and each one only gets its exclusive time, i.e., the time when it is on top of the stack.
+    def __init__(self) -> None:
+        self.__start: float = perf_counter()
+        self.__total: Optional[float] = None
+        self.__stack: list[list[Any]] = []
+        self.__durations: dict[str, float] = {}
+
+    def push(self, name: str) -> None:
+        now: float = perf_counter()
+
+        if self.__stack:
+            self.__pause(self.__stack[-1], now)
+
+        self.__stack.append([name, now])
+
+    def pop(self) -> None:
+        now: float = perf_counter()
+
+        self.__pause(self.__stack.pop(), now)
+
+        if self.__stack:
+            self.__stack[-1][1] = now
+
+    def __pause(self, stage: list[Any], now: float) -> None:
+        self.__durations[stage[0]] = self.__durations.get(stage[0], 0.0) + now - stage[1]
+
+    # In seconds.
+    def get_durations(self) -> dict[str, float]:
+        return self.__durations
+
+    def stop(self) -> None:
+        self.__total = perf_counter() - self.__start
+
+    def get_total(self) -> float:
+        return perf_counter() - self.__start if self.__total is None else self.__total
+
+
+class StageTimer():
+    TOTAL_STAGE: str = "total"
+
+    # The timings of the request being served, if any: the stages timed outside of a request (e.g., by the ingestion writer) only go to the histograms.
+    __current: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+    __histograms: dict[str, Histogram] = {}
+    __lock: Lock = Lock()
+
+    @staticmethod
+    def start() -> Token[Optional[StageTimings]]:
+        return StageTimer.__current.set(StageTimings())
+
+    # Records the exclusive time of each stage, and the total, into the histograms (unless not `record`, e.g., for the warm-up requests).
+    @staticmethod
+    def finish(token: Token[Optional[StageTimings]], record: bool=True) -> StageTimings:
+        timings: Optional[StageTimings] = StageTimer.__current.get()
+
+        StageTimer.__current.reset(token)
+
+        assert timings is not None
+
+        timings.stop()
+
+        if not record:
+            return timings
+
+        for name, duration in timings.get_durations().items():
+            StageTimer.observe(name, duration)
+
+        StageTimer.observe(StageTimer.TOTAL_STAGE, timings.get_total())
+
+        return timings
+
+    @staticmethod
+    @contextmanager
+    def stage(name: str) -> Iterator[None]:
+        timings: Optional[StageTimings] = StageTimer.__current.get()
+
+        if timings is not None:
+            timings.push(name)
+
+            try:
+                yield
+            finally:
+                timings.pop()
+        else:
+            start: float = perf_counter()
+
+            try:
+                yield
+            finally:
+                StageTimer.observe(name, perf_counter() - start)
+
+    # Times every call of `handler` (e.g., the next middleware of the chain) as the `name` stage, keeping it sync or async.
+    # The stack is used directly, rather than `stage`, as these wrappers run a dozen times per request.
+    @staticmethod
+    def wrap(name: str, handler: Callable[..., Any]) -> Callable[..., Any]:
+        current: ContextVar[Optional[StageTimings]] = StageTimer.__current
+
+        if iscoroutinefunction(handler):
+            async def async_timed_handler(*args: Any, **kwargs: Any) -> Any:
+                timings: Optional[StageTimings] = current.get()
+
+                if timings is None:
+                    with StageTimer.stage(name):
+                        return await handler(*args, **kwargs)
+
+                timings.push(name)
+
+                try:
+                    return await handler(*args, **kwargs)
+                finally:
+                    timings.pop()
+
+            return async_timed_handler
+        else:
+            def timed_handler(*args: Any, **kwargs: Any) -> Any:
+                timings: Optional[StageTimings] = current.get()
+
+                if timings is None:
+                    with StageTimer.stage(name):
+                        return handler(*args, **kwargs)
+
+                timings.push(name)
+
+                try:
+                    return handler(*args, **kwargs)
+                finally:
+                    timings.pop()
+
+            return timed_handler
+
+    @staticmethod
+    def observe(name: str, duration: float) -> None:
+        histogram: Optional[Histogram] = StageTimer.__histograms.get(name)
+
+        if histogram is None:
+            with StageTimer.__lock:
+                histogram = StageTimer.__histograms.setdefault(name, Histogram())
+
+        histogram.observe(duration)
+
+    @staticmethod
+    def get_histograms() -> dict[str, Histogram]:
+        with StageTimer.__lock:
+            return dict(StageTimer.__histograms)
@@ -0,0 +1,35 @@
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.conf import settings
+
+from webserver.web_agent_server.metrics.stage_timer import StageTimer
+
+from typing import Any, Optional
+
+
+class PrerenderedPageResponse(HttpResponse):
+    # Marker class: the page is already rendered, nonce included.
+    pass
+
+
+class PrerenderedPage():
+    # Cannot appear in a rendered template (nor be escaped by it), so it marks exactly where the nonce goes.
+    NONCE_PLACEHOLDER: str = "\x00"
+
+    # The template is rendered once, without a request: the only per-response value is the nonce, spliced into the parts of the page.
+    def __init__(self, template: str, context: Optional[dict[str, Any]]=None) -> None:
+        content: str = render_to_string(template_name=template, context={**(context or {}), "nonce_value": PrerenderedPage.NONCE_PLACEHOLDER})
+
+        self.__parts: list[bytes] = content.encode(settings.DEFAULT_CHARSET).split(PrerenderedPage.NONCE_PLACEHOLDER.encode(settings.DEFAULT_CHARSET))
+
+    def render(self, nonce: str) -> bytes:
+        return nonce.encode(settings.DEFAULT_CHARSET).join(self.__parts)
+
+    def get_response(self, nonce: str, status: int=200) -> PrerenderedPageResponse:
+        with StageTimer.stage("page"):
+            content: bytes = self.render(nonce)
+            response: PrerenderedPageResponse = PrerenderedPageResponse(content=content, status=status)
+
+        response["Content-Length"] = str(len(content))
+
+        return response
@@ -1,139 +1,439 @@
-from django.http import HttpRequest, HttpResponse, JsonResponse, HttpResponseNotModified, FileResponse
-from django.template.response import TemplateResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.static import was_modified_since
 from django.conf import settings
-from django.utils._os import safe_join
-from django.utils.http import http_date
 
-from json import loads
+from json import dumps
 from posixpath import normpath
+from urllib.parse import urlsplit, SplitResult
+from math import ceil
 from pathlib import Path
-from mimetypes import guess_type
-from typing import Any, Type
+from typing import Any, Optional, AsyncIterator
 
 from webserver.web_agent_server.headers.headers import Headers
-from .csp.reports import ReportsLogs
+from webserver.web_agent_server.assets.static_assets import StaticAsset, StaticAssetsStore
+from webserver.web_agent_server.assets.static_responses import StaticAssetResponse, PathSendResponse, StaticFileStreamingResponse, ByteRanges
+from webserver.web_agent_server.pages.prerendered_page import PrerenderedPage
+from webserver.middleware.csp_manager import CSPMiddleware
+from .csp.reports_store import ReportsStore
+from .csp.reports_query import ReportsQuery
+from .csp.report_ingestion import ReportIngestionQueue
+from .csp.report_parser import ReportParser
+from .csp.rate_limiter import TokenBucketRateLimiter
+from .csp.report_sampler import ReportSampler
+from .csp.report_filter import ReportFilter
+from .metrics.metrics_registry import MetricsRegistry, Labels
+from .metrics.prometheus_exporter import PrometheusExporter
+from .metrics.stage_timer import StageTimer
+
+
+STATIC_ASSETS: StaticAssetsStore = StaticAssetsStore(
+    mounts=[
+        (settings.STATIC_URL, Path(settings.STATICFILES_DIRS[0])),
+        ("/favicon.ico", Path(settings.STATICFILES_DIRS[0], "images", "favicon.ico"))
+    ],
+    max_in_memory_size=settings.STATIC_ASSETS_MAX_IN_MEMORY_SIZE,
+    max_compressible_size=settings.STATIC_ASSETS_MAX_COMPRESSIBLE_SIZE,
+    rescan_interval=settings.STATIC_ASSETS_RESCAN_INTERVAL,
+    cache_control=settings.STATIC_ASSETS_CACHE_CONTROL,
+    immutable_name_pattern=settings.STATIC_ASSETS_IMMUTABLE_NAME_PATTERN
+)
+
+REPORTS_QUEUE: ReportIngestionQueue = ReportIngestionQueue(
+    sink=ReportsStore.add_reports,
+    max_size=settings.REPORTS_QUEUE_MAX_SIZE,
+    batch_size=settings.REPORTS_QUEUE_BATCH_SIZE,
+    flush_interval=settings.REPORTS_QUEUE_FLUSH_INTERVAL
+)
+
+REPORTS_IP_RATE_LIMITER: TokenBucketRateLimiter = TokenBucketRateLimiter.create(
+    rate=settings.REPORTS_RATE_LIMIT_IP_RATE,
+    burst=settings.REPORTS_RATE_LIMIT_IP_BURST,
+    max_keys=settings.REPORTS_RATE_LIMIT_MAX_KEYS,
+    cache_alias=settings.REPORTS_RATE_LIMIT_CACHE
+)
+
+REPORTS_ORIGIN_RATE_LIMITER: TokenBucketRateLimiter = TokenBucketRateLimiter.create(
+    rate=settings.REPORTS_RATE_LIMIT_ORIGIN_RATE,
+    burst=settings.REPORTS_RATE_LIMIT_ORIGIN_BURST,
+    max_keys=settings.REPORTS_RATE_LIMIT_MAX_KEYS,
+    cache_alias=settings.REPORTS_RATE_LIMIT_CACHE
+)
+
+REPORTS_NOISE_FILTER: ReportFilter = ReportFilter(rules=settings.REPORTS_NOISE_RULES, field_aliases=ReportParser.FIELD_ALIASES)
+
+REPORTS_SAMPLER: ReportSampler = ReportSampler(rates=settings.REPORTS_SAMPLING_RATES, directive_rates=settings.REPORTS_DIRECTIVE_SAMPLING_RATES)
+
+# The pages are rendered once, at startup: each response only splices its nonce in, without the template engine.
+INDEX_PAGE: PrerenderedPage = PrerenderedPage(template="index.html")
+
+ERROR_PAGES: dict[str, PrerenderedPage] = {
+    error: PrerenderedPage(template="error.html", context={"error": error}) for error in (
+        "400 Bad Request", "403 Forbidden", "404 Not Found", "406 Not Acceptable", "408 Request Timeout", "500 Internal Server Error"
+    )
+}
+
+
+async def index(request: HttpRequest) -> HttpResponse:
+    return INDEX_PAGE.get_response(nonce=__get_nonce(request))
 
+# We don't need to check for CSRF tokens here because this page is meant to be public for research purposes.
+@csrf_exempt
+async def csp_endpoint(request: HttpRequest) -> JsonResponse | HttpResponse:
+    return await __reporting_endpoint(request=request, report_type="csp")
 
-def index(request: HttpRequest) -> HttpResponse:
-    return TemplateResponse(request=request, template="index.html", context={"nonce_value": "{nonce_value}"})
+@csrf_exempt
+async def coep_endpoint(request: HttpRequest) -> JsonResponse | HttpResponse:
+    return await __reporting_endpoint(request=request, report_type="coep")
 
-# We don't need to check for CSRF tokens here because this page is meant to be public for research purposes.
 @csrf_exempt
-def csp_endpoint(request: HttpRequest) -> JsonResponse | HttpResponse:
+async def coop_endpoint(request: HttpRequest) -> JsonResponse | HttpResponse:
+    return await __reporting_endpoint(request=request, report_type="coop")
+
+async def __reporting_endpoint(request: HttpRequest, report_type: str) -> JsonResponse | HttpResponse:
     if request.method == "GET":
-        return JsonResponse({"reports": ReportsLogs.get_csp_reports()})
-    elif request.method == "POST" and __validate_report(request.body, "csp-report"):
-        result: bool = ReportsLogs.add_csp_report(loads(request.body))
+        return await __query_reports(request, report_type)
+    elif request.method == "POST":
+        # The cheapest checks first: a flood is turned away before its body is even parsed.
+        if not await REPORTS_IP_RATE_LIMITER.aallow(__get_client_address(request) or request.META.get("REMOTE_ADDR") or ""):
+            return __too_many_requests(REPORTS_IP_RATE_LIMITER)
+
+        body: Optional[bytes] = __read_body(request)
+
+        if body is None:
+            return HttpResponse(status=413)
+
+        # Either a single legacy report, or a Reporting API batch.
+        reports: Optional[list[dict[str, Any]]] = ReportParser.parse(report_type, body, REPORTS_NOISE_FILTER)
+
+        if reports is None:
+            return handler403(request=request)
+
+        reports = REPORTS_SAMPLER.sample(report_type, reports)
 
-        return JsonResponse({"result": result})
+        if not await __allow_origins(report_type, reports):
+            MetricsRegistry.increment("reports", (("type", report_type), ("outcome", "rate_limited")), len(reports))
+
+            return __too_many_requests(REPORTS_ORIGIN_RATE_LIMITER)
+
+        # The reports are written to the store later, in a batch.
+        if REPORTS_QUEUE.enqueue_many(report_type, reports):
+            MetricsRegistry.increment("reports", (("type", report_type), ("outcome", "accepted")), len(reports))
+
+            return HttpResponse(status=204)
+        else:
+            MetricsRegistry.increment("reports", (("type", report_type), ("outcome", "dropped")), len(reports))
+
+            return __service_unavailable()
     else:
         return handler403(request=request)
 
-@csrf_exempt
-def coep_endpoint(request: HttpRequest) -> JsonResponse | HttpResponse:
-    if request.method == "GET":
-        return JsonResponse({"reports": ReportsLogs.get_coep_reports()})
-    elif request.method == "POST" and __validate_report(request.body, "coep-report"):
-        result: bool = ReportsLogs.add_coep_report(loads(request.body))
+async def __query_reports(request: HttpRequest, report_type: str) -> JsonResponse | StreamingHttpResponse | HttpResponse:
+    stream: bool = request.GET.get("format") == "ndjson" or "application/x-ndjson" in request.META.get("HTTP_ACCEPT", "")
+    query: Optional[ReportsQuery] = ReportsQuery.from_query_dict(
+        report_type=report_type,
+        query=request.GET,
+        default_limit=None if stream else settings.REPORTS_QUERY_DEFAULT_LIMIT,
+        max_limit=None if stream else settings.REPORTS_QUERY_MAX_LIMIT,
+        newest_first=not stream,
+        lag=int(settings.REPORTS_QUERY_LAG * 1e9)
+    )
+
+    # The streams are read one page after another, from the oldest report: they cannot start from the newest.
+    if query is None or (stream and query.is_descending()):
+        return handler400(request=request)
+
+    # How many reports were discarded as noise, and kept and dropped by the sampling and by the ingestion queue.
+    if request.GET.get("view") == "stats":
+        return JsonResponse({"noise": REPORTS_NOISE_FILTER.get_stats(report_type), "sampling": REPORTS_SAMPLER.get_stats(report_type), "queue": REPORTS_QUEUE.get_stats()})
+
+    # The counters of each distinct violation (`?view=aggregates`), the most frequent first.
+    if request.GET.get("view") == "aggregates":
+        return JsonResponse({"aggregates": await ReportsStore.aget_aggregates(report_type, query.get_limit())})
+
+    if stream:
+        return StreamingHttpResponse(streaming_content=__stream_reports(query), content_type="application/x-ndjson")
+
+    reports: list[dict[str, Any]] = await ReportsStore.aquery_reports(query)
+    after: Optional[int] = query.get_next_cursor(reports)
+
+    # The cursor is a string, because the timestamps (in nanoseconds) do not fit in a JavaScript number.
+    return JsonResponse({"reports": reports, "next": str(after) if after is not None else None})
+
+async def __stream_reports(query: ReportsQuery) -> AsyncIterator[bytes]:
+    # One report per line, read from the store one page at a time, so that neither the store nor the server ever holds the whole result.
+    after: Optional[int] = query.get_after()
+    remaining: Optional[int] = query.get_limit()
+
+    while remaining is None or remaining > 0:
+        page_size: int = settings.REPORTS_QUERY_MAX_LIMIT if remaining is None else min(remaining, settings.REPORTS_QUERY_MAX_LIMIT)
+        reports: list[dict[str, Any]] = await ReportsStore.aquery_reports(query.with_page(after=after, limit=page_size))
+
+        if reports:
+            yield "".join(f"{dumps(report, separators=(',', ':'))}\n" for report in reports).encode("utf-8")
+
+        if len(reports) < page_size:
+            return
+
+        after = reports[-1][ReportsQuery.TIMESTAMP_KEY]
+
+        if remaining is not None:
+            remaining -= len(reports)
+
+# The nearest address of `X-Forwarded-For` that is not one of `settings.TRUSTED_PROXIES`, or `None` when the request was forwarded by an untrusted proxy.
+def __get_client_address(request: HttpRequest) -> Optional[str]:
+    remote_address: Optional[str] = request.META.get("REMOTE_ADDR")
+    forwarded_for: Optional[str] = request.META.get("HTTP_X_FORWARDED_FOR")
+
+    if forwarded_for is None:
+        return remote_address
+
+    if remote_address not in settings.TRUSTED_PROXIES:
+        return None
+
+    for address in reversed(forwarded_for.split(",")):
+        address = address.strip()
+
+        if address not in settings.TRUSTED_PROXIES:
+            return address or None
+
+    return remote_address
+
+def __get_content_length(request: HttpRequest) -> int:
+    try:
+        return int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return 0
+
+# `None` when the body is bigger than `REPORTS_MAX_BODY_SIZE`: at most one byte more is read, even without `Content-Length` (e.g., chunked).
+def __read_body(request: HttpRequest) -> Optional[bytes]:
+    if __get_content_length(request) > settings.REPORTS_MAX_BODY_SIZE:
+        return None
+
+    body: bytes = request.read(settings.REPORTS_MAX_BODY_SIZE + 1)
 
-        return JsonResponse({"result": result})
+    return body if len(body) <= settings.REPORTS_MAX_BODY_SIZE else None
+
+# One token per report, from the bucket of the origin of its document, so that a single page stuck in a violation loop cannot flood the store.
+async def __allow_origins(report_type: str, reports: list[dict[str, Any]]) -> bool:
+    costs: dict[str, int] = {}
+
+    for report in reports:
+        document_uri: Any = report[f"{report_type}-report"].get("document-uri")
+        origin: str = ""
+
+        if isinstance(document_uri, str):
+            try:
+                parts: SplitResult = urlsplit(document_uri)
+                origin = f"{parts.scheme}://{parts.netloc}"
+            except ValueError:
+                pass
+
+        costs[origin] = costs.get(origin, 0) + 1
+
+    return await REPORTS_ORIGIN_RATE_LIMITER.aallow_all(costs)
+
+def __too_many_requests(rate_limiter: TokenBucketRateLimiter) -> HttpResponse:
+    # No template: this response must stay cheap, since it is what a flood gets.
+    response: HttpResponse = HttpResponse(status=429)
+
+    response["Retry-After"] = str(ceil(1 / rate_limiter.get_rate()))
+
+    return response
+
+def __service_unavailable() -> HttpResponse:
+    response: HttpResponse = HttpResponse(status=503)
+
+    response["Retry-After"] = "60"
+
+    return response
+
+# Not meant for the public: only the addresses of `settings.METRICS_ALLOWED_ADDRESSES` (e.g., a local Prometheus) are answered.
+async def metrics(request: HttpRequest) -> HttpResponse:
+    if __get_client_address(request) not in settings.METRICS_ALLOWED_ADDRESSES:
+        return handler404(request=request)
+
+    return HttpResponse(content=__render_metrics(), content_type=PrometheusExporter.CONTENT_TYPE)
+
+# Each worker process (see `launcher`) has metrics of its own, and any of them can answer a scrape: the `worker` label keeps their series apart.
+def __render_metrics() -> str:
+    exporter: PrometheusExporter = PrometheusExporter(labels=(("worker", settings.METRICS_WORKER_LABEL),))
+    counters: dict[tuple[str, Labels], int] = MetricsRegistry.get_counters()
+    histograms: dict[tuple[str, Labels], Any] = MetricsRegistry.get_histograms()
+    requests: dict[Labels, float] = {labels: value for (name, labels), value in counters.items() if name == "requests"}
+    static_requests: list[tuple[Labels, float]] = [(labels, value) for labels, value in requests.items() if ("route", "static") in labels]
+    static_total: float = sum(value for _, value in static_requests)
+    static_not_modified: float = sum(value for labels, value in static_requests if ("status", "304") in labels)
+    queue_stats: dict[str, int] = REPORTS_QUEUE.get_stats()
+    reports: dict[Labels, float] = {labels: value for (name, labels), value in counters.items() if name == "reports"}
+
+    # The reports discarded before they could be counted by the view: the noise, and those not drawn by the sampling.
+    for report_type in ReportsStore.REPORT_TYPES:
+        reports[(("type", report_type), ("outcome", "filtered"))] = REPORTS_NOISE_FILTER.get_stats(report_type)["discarded"]
+        reports[(("type", report_type), ("outcome", "sampled_out"))] = REPORTS_SAMPLER.get_stats(report_type)["dropped"]
+
+    exporter.add_metric("webagent_requests_total", "counter", "Requests served, per route and status.", requests)
+    exporter.add_histogram("webagent_request_duration_seconds", "Time to serve a request, per route.", {labels: histogram.snapshot() for (name, labels), histogram in histograms.items() if name == "request_duration"})
+    exporter.add_metric("webagent_static_not_modified_ratio", "gauge", "Share of the static file requests answered with 304 Not Modified.", {(): static_not_modified / static_total if static_total else 0.0})
+    exporter.add_metric("webagent_blocked_requests_total", "counter", "Requests blocked by AllowRequestsMiddleware.", {(): counters.get(("blocked_requests", ()), 0)})
+    exporter.add_metric("webagent_reports_total", "counter", "Reports received, per type and outcome (accepted, filtered, sampled_out, rate_limited or dropped).", reports)
+    exporter.add_metric("webagent_reports_queue_pending", "gauge", "Reports waiting to be written to the store.", {(): queue_stats["pending"]})
+    exporter.add_metric("webagent_reports_written_total", "counter", "Reports written to the store (flushed), or lost to a store failure (failed).", {
+        (("outcome", "flushed"),): queue_stats["flushed"], (("outcome", "failed"),): queue_stats["failed"]
+    })
+    # The store operations (e.g., `store-add_csp_reports`, the writes of the ingestion queue) are stages too.
+    exporter.add_histogram("webagent_stage_duration_seconds", "Exclusive time spent in each stage: middlewares, views, pages and store operations.", {
+        (("stage", name),): histogram.snapshot() for name, histogram in StageTimer.get_histograms().items()
+    })
+
+    return exporter.render()
+
+async def static_files(request: HttpRequest) -> HttpResponse | StreamingHttpResponse:
+    return __serve_static_file(request, normpath(request.path))
+
+def __serve_static_file(request: HttpRequest, url: str) -> HttpResponse | StreamingHttpResponse:
+    asset: Optional[StaticAsset] = STATIC_ASSETS.get(url)
+
+    if asset is None:
+        if STATIC_ASSETS.is_directory(url):
+            return handler403(request=request)
+        else:
+            return handler404(request=request)
+
+    ranges: Optional[list[tuple[int, int]]] = __get_requested_ranges(request, asset)
+
+    # Ranges are always served from the uncompressed content.
+    encoding: Optional[str] = asset.select_encoding(request.META.get("HTTP_ACCEPT_ENCODING", "")) if ranges is None else None
+
+    if __is_not_modified(request, asset):
+        response: HttpResponse | StreamingHttpResponse = HttpResponseNotModified()
+    elif ranges is not None and len(ranges) == 0:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = ByteRanges.get_unsatisfied_content_range(asset.get_size())
     else:
-        return handler403(request=request)
+        response = __build_static_response(request, asset, encoding, ranges)
 
-@csrf_exempt
-def coop_endpoint(request: HttpRequest) -> JsonResponse | HttpResponse:
-    if request.method == "GET":
-        return JsonResponse({"reports": ReportsLogs.get_coop_reports()})
-    elif request.method == "POST" and __validate_report(request.body, "coop-report"):
-        result: bool = ReportsLogs.add_coop_report(loads(request.body))
+        if encoding:
+            response["Content-Encoding"] = encoding
+        elif asset.get_mime_encoding():
+            response["Content-Encoding"] = asset.get_mime_encoding()
 
-        return JsonResponse({"result": result})
+    response["ETag"] = asset.get_etag(encoding)
+    response["Last-Modified"] = asset.get_last_modified()
+    response["Cache-Control"] = asset.get_cache_control()
+    response["Accept-Ranges"] = "bytes"
+
+    if asset.has_variants():
+        response["Vary"] = "Accept-Encoding"
+
+    return response
+
+def __is_not_modified(request: HttpRequest, asset: StaticAsset) -> bool:
+    if_none_match: Optional[str] = request.META.get("HTTP_IF_NONE_MATCH")
+
+    # When both are present, `If-None-Match` takes precedence over `If-Modified-Since` (RFC 9110, section 13.1.3).
+    if if_none_match is not None:
+        return asset.matches_if_none_match(if_none_match)
     else:
-        return handler403(request=request)
+        return not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), asset.get_mtime())
 
-def static_files(request: HttpRequest) -> HttpResponse | FileResponse:
-    path: str = normpath(request.path).lstrip("/")
-    fullpath: Path = Path(safe_join(settings.STATICFILES_DIRS[0].replace("/static", ""), path))
+def __get_requested_ranges(request: HttpRequest, asset: StaticAsset) -> Optional[list[tuple[int, int]]]:
+    range_header: Optional[str] = request.META.get("HTTP_RANGE")
 
-    return __serve_static_file(request, fullpath)
+    if range_header is None or request.method != "GET":
+        return None
 
-def __serve_static_file(request: HttpRequest, fullpath: Path) -> HttpResponse | FileResponse:
-    if fullpath.is_dir():
-        return handler403(request=request)
+    # A stale `If-Range` validator means that the client wants the whole (new) content instead of the ranges (RFC 9110, section 13.1.5).
+    if_range: Optional[str] = request.META.get("HTTP_IF_RANGE")
 
-    if not fullpath.exists():
-        return handler404(request=request)
+    if if_range is not None and if_range.strip() not in (asset.get_etag(), asset.get_last_modified()):
+        return None
 
-    statobj = fullpath.stat()
+    return ByteRanges.parse(range_header, asset.get_size())
 
-    if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), statobj.st_mtime):
-        return HttpResponseNotModified()
+def __build_static_response(request: HttpRequest, asset: StaticAsset, encoding: Optional[str], ranges: Optional[list[tuple[int, int]]]) -> HttpResponse | StreamingHttpResponse:
+    if ranges is not None:
+        return __build_partial_static_response(asset, ranges)
 
-    content_type, encoding = guess_type(str(fullpath))
-    content_type = content_type or "application/octet-stream"
-    response = FileResponse(fullpath.open("rb"), content_type=content_type)
+    content: Optional[bytes] = asset.get_content() if encoding is None else asset.get_variant(encoding)
 
-    response["Last-Modified"] = http_date(statobj.st_mtime)
+    if content is not None:
+        response: HttpResponse = StaticAssetResponse(content=content, content_type=asset.get_content_type())
 
-    if encoding:
-        response["Content-Encoding"] = encoding
+        response["Content-Length"] = str(len(content))
 
-    return response
+        return response
 
-def favicon(request: HttpRequest) -> HttpResponse | FileResponse:
-    path: str = normpath(request.path).lstrip("/")
-    fullpath: Path = Path(safe_join(settings.STATICFILES_DIRS[0], "images", path))
+    # Too big to be kept in memory: either the server sends the file itself, or it is streamed from the disk.
+    path: Optional[Path] = asset.get_path() if encoding is None else asset.get_variant_path(encoding)
 
-    return __serve_static_file(request, fullpath)
+    assert path is not None
 
-def __validate_report(request_body: bytes, mandatory_report_key: str, allowed_inner_dict_values_types: list[Type[Any]]=[str, int]) -> bool:
-    try:
-        report: dict[Any, Any] = {**loads(request_body)}
+    if __supports_pathsend(request):
+        return PathSendResponse(path=path, size=path.stat().st_size, content_type=asset.get_content_type())
+    else:
+        return StaticFileStreamingResponse(path=path, segments=[(0, path.stat().st_size)], content_type=asset.get_content_type())
 
-        if mandatory_report_key not in report:
-            return False
+def __build_partial_static_response(asset: StaticAsset, ranges: list[tuple[int, int]]) -> HttpResponse | StreamingHttpResponse:
+    size: int = asset.get_size()
+    content: Optional[bytes] = asset.get_content()
 
-        if not isinstance(report[mandatory_report_key], dict):
-            return False
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        content_type: str = asset.get_content_type()
+        segments: list[bytes | tuple[int, int]] = [(start, end - start + 1)]
+    else:
+        content_type, segments = ByteRanges.build_multipart(ranges, size, asset.get_content_type())
 
-        inner_report: dict[Any, Any] = report[mandatory_report_key]
+    if content is not None:
+        body: bytes = b"".join(segment if isinstance(segment, bytes) else content[segment[0]:segment[0] + segment[1]] for segment in segments)
+        response: HttpResponse | StreamingHttpResponse = StaticAssetResponse(content=body, content_type=content_type, status=206)
 
-        if any(not isinstance(key, str) for key in inner_report.keys()):
-            return False
+        response["Content-Length"] = str(len(body))
+    else:
+        response = StaticFileStreamingResponse(path=asset.get_path(), segments=segments, content_type=content_type, status=206)
 
-        if any(not isinstance(value, tuple(allowed_inner_dict_values_types)) for value in inner_report.values()):
-            return False
+    if len(ranges) == 1:
+        response["Content-Range"] = ByteRanges.get_content_range(ranges[0][0], ranges[0][1], size)
 
-        return True
-    except Exception:
-        return False
+    return response
 
-def handler400(request: HttpRequest, _: Exception=Exception()) -> TemplateResponse:
+def __supports_pathsend(request: HttpRequest) -> bool:
+    # Only ASGI requests have a scope, and only some ASGI servers advertise the extension.
+    return PathSendResponse.PATHSEND_EXTENSION in (getattr(request, "scope", {}).get("extensions") or {})
+
+async def favicon(request: HttpRequest) -> HttpResponse | StreamingHttpResponse:
+    return __serve_static_file(request, normpath(request.path))
+
+# Same as `handler404`, but for the catch-all route, so that it does not need a thread when the request is served asynchronously.
+async def not_found(request: HttpRequest) -> HttpResponse:
+    return handler404(request=request)
+
+def handler400(request: HttpRequest, _: Exception=Exception()) -> HttpResponse:
     return __http_code(request=request, code=403, error="400 Bad Request")
 
-def handler403(request: HttpRequest, _: Exception=Exception()) -> TemplateResponse:
+def handler403(request: HttpRequest, _: Exception=Exception()) -> HttpResponse:
     return __http_code(request=request, code=403, error="403 Forbidden")
 
-def handler404(request: HttpRequest, _: Exception=Exception()) -> TemplateResponse:
+def handler404(request: HttpRequest, _: Exception=Exception()) -> HttpResponse:
     return __http_code(request=request, code=404, error="404 Not Found")
 
-def handler406(request: HttpRequest, _: Exception=Exception()) -> TemplateResponse:
+def handler406(request: HttpRequest, _: Exception=Exception()) -> HttpResponse:
     return __http_code(request=request, code=404, error="406 Not Acceptable")
 
-def handler408(request: HttpRequest, _: Exception=Exception()) -> TemplateResponse:
+def handler408(request: HttpRequest, _: Exception=Exception()) -> HttpResponse:
     return __http_code(request=request, code=404, error="408 Request Timeout")
 
-def handler500(request: HttpRequest, _: Exception=Exception()) -> TemplateResponse:
+def handler500(request: HttpRequest, _: Exception=Exception()) -> HttpResponse:
     return __http_code(request=request, code=500, error="500 Internal Server Error")
 
-def __http_code(request: HttpRequest, code: int, error: str) -> TemplateResponse:
-    response: TemplateResponse = TemplateResponse(request=request, template="error.html", context={"nonce_value": "{nonce_value}", "error": error})
-
-    response.status_code = code
+def __http_code(request: HttpRequest, code: int, error: str) -> HttpResponse:
+    response: HttpResponse = ERROR_PAGES[error].get_response(nonce=__get_nonce(request), status=code)
 
-    response["Server"] = Headers.get_common_headers(request=request)["Server"]
+    response["Server"] = Headers.SERVER
 
     return response
 
+# The requests blocked before `CSPMiddleware` have no nonce.
+def __get_nonce(request: HttpRequest) -> str:
+    return getattr(request, CSPMiddleware.NONCE_ATTRIBUTE, "")
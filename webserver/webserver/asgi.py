@@ -1,8 +1,61 @@
 import os
+import django
 
-from django.core.asgi import get_asgi_application
 from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.conf import settings
+
+from webserver.web_agent_server.assets.static_responses import PathSendResponse
+from webserver.web_agent_server.metrics.stage_timer import StageTimer
+
+from typing import Any, Awaitable, Callable, Optional
+import sys
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "webserver.webserver.settings")
 
-application: ASGIHandler = get_asgi_application()
+
+class WebAgentASGIHandler(ASGIHandler):
+    # The versions whose `load_middleware` names each handler of the chain "middleware <path>", and wraps it with `convert_exception_to_response` (i.e., `__wrapped__`).
+    STAGE_TIMING_DJANGO_VERSIONS: tuple[tuple[int, int], ...] = ((4, 2), (5, 0), (5, 1), (5, 2))
+
+    def __init__(self) -> None:
+        self.__stage_timing: bool = settings.REQUEST_TIMING_ACTIVE and django.VERSION[:2] in WebAgentASGIHandler.STAGE_TIMING_DJANGO_VERSIONS
+
+        if settings.REQUEST_TIMING_ACTIVE and not self.__stage_timing:
+            print(f"WARNING: the middlewares and the view are not timed as stages with Django {django.get_version()}.", file=sys.stderr, flush=True)
+
+        super().__init__()
+
+    # Django calls this, while it builds the middleware chain, with the handler that each middleware is given: the next middleware (or the view), which is then timed as a stage.
+    def adapt_method_mode(self, is_async: bool, method: Callable[..., Any], method_is_async: Optional[bool]=None, debug: bool=False, name: Optional[str]=None) -> Callable[..., Any]:
+        adapted_method: Callable[..., Any] = super().adapt_method_mode(is_async, method, method_is_async, debug=debug, name=name)
+
+        if not self.__stage_timing or name is None or not name.startswith("middleware "):
+            return adapted_method
+
+        # The handlers of the chain wrap either a middleware or `_get_response_async` (the URL resolver and the view). Anything else is left untimed, rather than mislabelled.
+        wrapped: Any = getattr(method, "__wrapped__", None)
+
+        if wrapped is None:
+            return adapted_method
+
+        stage: str = "view" if getattr(wrapped, "__self__", None) is self else type(wrapped).__name__
+
+        return StageTimer.wrap(stage, adapted_method)
+
+    async def send_response(self, response: HttpResponse, send: Callable[[dict[str, Any]], Awaitable[None]]) -> None:
+        if not isinstance(response, PathSendResponse):
+            return await super().send_response(response, send)
+
+        async def send_start_only(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                await send(message)
+
+        # Django takes care of the status and the headers, while the body is sent by the server (with a zero-copy `sendfile`, if possible).
+        await super().send_response(response, send_start_only)
+        await send({"type": PathSendResponse.PATHSEND_EXTENSION, "path": str(response.get_path())})
+
+
+django.setup(set_prefix=False)
+
+application: ASGIHandler = WebAgentASGIHandler()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+# Run from the repository root: `python3 -m webserver.webserver.launcher [--workers N] [--host 127.0.0.1] [--port 8000] [--reuse-port] [daphne options]` (see the README).
+
+from argparse import ArgumentParser
+from pathlib import Path
+from select import select
+from signal import signal, SIGHUP, SIGINT, SIGTERM
+from socket import socket, AF_INET, AF_INET6, SOCK_STREAM, SOL_SOCKET, SO_REUSEADDR
+from subprocess import Popen, TimeoutExpired
+from time import monotonic, sleep
+from types import FrameType
+from typing import Optional
+import os
+import sys
+
+
+REPOSITORY_ROOT: Path = Path(__file__).resolve().parents[2]
+WORKER_SLOT_VARIABLE: str = "WEB_AGENT_WORKER_SLOT"
+
+
+# The settings that keep in each worker what should be shared between the workers (see the README).
+def get_per_worker_state(workers: int, recycled: bool) -> list[str]:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "webserver.webserver.settings")
+    from django.conf import settings
+
+    problems: list[str] = []
+
+    if settings.REPORTS_STORE == "memory" and (workers > 1 or recycled):
+        problems.append(
+            "REPORTS_STORE is \"memory\": each worker keeps (and answers with) only the reports it received, and loses them when it is replaced (SIGHUP, --max-age). "
+            "Use \"mongo\" or \"mongo-async\"."
+        )
+
+    if settings.REPORTS_RATE_LIMIT_CACHE is None and workers > 1:
+        problems.append(f"REPORTS_RATE_LIMIT_CACHE is None: each worker has token buckets of its own, so the rate limits are {workers} times higher. Use a shared cache (e.g., Redis).")
+
+    return problems
+
+
+class WorkerSupervisor():
+    def __init__(self, workers: int, host: str, port: int, reuse_port: bool, backlog: int, ready_timeout: float, graceful_timeout: float, max_age: Optional[float], daphne_args: list[str]) -> None:
+        self.__workers: int = workers
+        self.__host: str = host
+        self.__port: int = port
+        self.__backlog: int = backlog
+        self.__ready_timeout: float = ready_timeout
+        self.__graceful_timeout: float = graceful_timeout
+        self.__max_age: Optional[float] = max_age
+        self.__daphne_args: list[str] = daphne_args
+        # Without `SO_REUSEPORT`, the socket is bound once, here, and inherited by every worker, which all accept from its queue.
+        self.__listener: Optional[socket] = None if reuse_port else WorkerSupervisor.__bind(host, port, backlog)
+        self.__processes: list[tuple[Popen[bytes], float]] = []
+        self.__stopping: bool = False
+        self.__recycling: bool = False
+
+    @staticmethod
+    def __bind(host: str, port: int, backlog: int) -> socket:
+        listener: socket = socket(AF_INET6 if ":" in host else AF_INET, SOCK_STREAM)
+
+        listener.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+        listener.bind((host, port))
+        listener.listen(backlog)
+        listener.set_inheritable(True)
+
+        return listener
+
+    def run(self) -> None:
+        signal(SIGHUP, self.__on_recycle)
+        signal(SIGINT, self.__on_stop)
+        signal(SIGTERM, self.__on_stop)
+
+        print(f"Starting {self.__workers} workers on {self.__host}:{self.__port}.", flush=True)
+
+        for slot in range(self.__workers):
+            self.__processes.append((self.__start_worker(slot), monotonic()))
+
+        while not self.__stopping:
+            if self.__recycling:
+                self.__recycling = False
+                self.__recycle([process for process, _ in self.__processes])
+
+            self.__restart_dead_workers()
+
+            if self.__max_age is not None:
+                self.__recycle([process for process, started in self.__processes if monotonic() - started > self.__max_age])
+
+            sleep(0.5)
+
+        self.__stop_all()
+
+    def __on_recycle(self, _: int, __: Optional[FrameType]) -> None:
+        self.__recycling = True
+
+    def __on_stop(self, _: int, __: Optional[FrameType]) -> None:
+        self.__stopping = True
+
+    # Returns once the worker is warmed up (or has failed to), so that a recycling never leaves fewer workers serving.
+    # The slot (from 0 to N - 1) is kept by the worker that replaces another, so that the metrics labelled with it stay bounded.
+    def __start_worker(self, slot: int) -> Popen[bytes]:
+        ready_read, ready_write = os.pipe()
+        socket_args: list[str] = ["--fd", str(self.__listener.fileno())] if self.__listener is not None else ["--reuse-port", self.__host, str(self.__port), "--backlog", str(self.__backlog)]
+        process: Popen[bytes] = Popen(
+            [sys.executable, "-m", "webserver.webserver.worker", *socket_args, "--ready-fd", str(ready_write), *self.__daphne_args],
+            cwd=REPOSITORY_ROOT,
+            env={**os.environ, WORKER_SLOT_VARIABLE: str(slot)},
+            pass_fds=[ready_write] + ([self.__listener.fileno()] if self.__listener is not None else [])
+        )
+
+        os.close(ready_write)
+
+        readable, _, _ = select([ready_read], [], [], self.__ready_timeout)
+
+        if not readable or os.read(ready_read, 1) != b"1":
+            print(f"Worker {process.pid} was not ready within {self.__ready_timeout} s.", flush=True)
+
+        os.close(ready_read)
+
+        return process
+
+    def __restart_dead_workers(self) -> None:
+        for index, (process, _) in enumerate(self.__processes):
+            if process.poll() is not None and not self.__stopping:
+                print(f"Worker {process.pid} exited with {process.returncode}: restarting it.", flush=True)
+
+                # Not in a tight loop, if it keeps failing at startup.
+                sleep(1.0)
+
+                self.__processes[index] = (self.__start_worker(index), monotonic())
+
+    def __recycle(self, processes: list[Popen[bytes]]) -> None:
+        for process in processes:
+            if self.__stopping:
+                return
+
+            index: int = [current for current, _ in self.__processes].index(process)
+
+            self.__processes[index] = (self.__start_worker(index), monotonic())
+
+            print(f"Worker {process.pid} replaced by {self.__processes[index][0].pid}.", flush=True)
+
+            self.__stop_worker(process)
+
+    # daphne stops listening on `SIGTERM`, and finishes the requests it is serving.
+    def __stop_worker(self, process: Popen[bytes]) -> None:
+        process.terminate()
+
+        try:
+            process.wait(timeout=self.__graceful_timeout)
+        except TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def __stop_all(self) -> None:
+        print("Stopping the workers.", flush=True)
+
+        for process, _ in self.__processes:
+            process.terminate()
+
+        deadline: float = monotonic() + self.__graceful_timeout
+
+        for process, _ in self.__processes:
+            try:
+                process.wait(timeout=max(0.0, deadline - monotonic()))
+            except TimeoutExpired:
+                process.kill()
+                process.wait()
+
+        if self.__listener is not None:
+            self.__listener.close()
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="Serves Web-Agent with several pre-warmed daphne workers on the same port. Unknown options are passed to daphne.")
+
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--reuse-port", action="store_true", help="Give each worker its own socket with SO_REUSEPORT (Linux, BSD), rather than one shared socket.")
+    parser.add_argument("--backlog", type=int, default=1024)
+    parser.add_argument("--ready-timeout", type=float, default=60.0, help="How long a new worker may take to warm up, in seconds.")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0, help="How long a stopped worker may take to finish its requests, in seconds.")
+    parser.add_argument("--max-age", type=float, help="Replace each worker after this many seconds.")
+    parser.add_argument("--allow-per-worker-state", action="store_true", help="Start even though the settings keep the reports or the rate limits in each worker (see the README).")
+
+    args, daphne_args = parser.parse_known_args()
+
+    if args.workers < 1:
+        parser.error("At least one worker is needed.")
+
+    problems: list[str] = get_per_worker_state(args.workers, args.max_age is not None)
+
+    if problems and args.workers > 1 and not args.allow_per_worker_state:
+        parser.error(" ".join(problems) + " Or start with --allow-per-worker-state.")
+
+    for problem in problems:
+        print(f"WARNING: {problem}", file=sys.stderr, flush=True)
+
+    WorkerSupervisor(
+        workers=args.workers,
+        host=args.host,
+        port=args.port,
+        reuse_port=args.reuse_port,
+        backlog=args.backlog,
+        ready_timeout=args.ready_timeout,
+        graceful_timeout=args.graceful_timeout,
+        max_age=args.max_age,
+        daphne_args=daphne_args
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from pathlib import Path
 from secrets import token_urlsafe
+from typing import Any, Optional
 
 import os
 
@@ -59,15 +60,17 @@ INSTALLED_APPS: list[str] = [
 
 # Middleware
 MIDDLEWARE: list[str] = [
+    "webserver.middleware.server_timing.ServerTimingMiddleware",
     "webserver.middleware.allow_requests.AllowRequestsMiddleware",
     "webserver.middleware.cookie_flags.CookieFlagsMiddleware",
     "webserver.middleware.csp_manager.CSPMiddleware",
-    "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
-    "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "webserver.middleware.fast_path.FastPathMiddleware",
+    "webserver.middleware.inline_async.InlineSecurityMiddleware",
+    "webserver.middleware.inline_async.InlineSessionMiddleware",
+    "webserver.middleware.inline_async.InlineCommonMiddleware",
+    "webserver.middleware.inline_async.InlineCsrfViewMiddleware",
+    "webserver.middleware.inline_async.InlineAuthenticationMiddleware",
+    "webserver.middleware.inline_async.InlineMessageMiddleware",
     "webserver.middleware.security_headers.SecurityHeadersMiddleware",
     "webserver.middleware.internal_errors_handler.InternalServerErrorMiddleware"
 ]
@@ -127,9 +130,47 @@ USE_TZ: bool = True
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [os.path.join(WEB_AGENT_DIR, "static")]
 
+# Static assets are scanned when the server starts, and kept in memory (along with their gzip/brotli variants) up to this size in bytes.
+STATIC_ASSETS_MAX_IN_MEMORY_SIZE: int = 2 * 1024 * 1024
+
+# Text-based assets up to this size in bytes are compressed when scanned, even if the uncompressed content is too big to be kept in memory.
+STATIC_ASSETS_MAX_COMPRESSIBLE_SIZE: int = 32 * 1024 * 1024
+
+# How often (in seconds) the static assets are rescanned for changes. `0` disables the rescanning.
+STATIC_ASSETS_RESCAN_INTERVAL: float = 5.0
+
+# `Cache-Control` for the static assets. The browsers revalidate them with the `ETag`, which is cheap (`304 Not Modified`).
+STATIC_ASSETS_CACHE_CONTROL: str = "no-cache"
+
+# Assets whose file name matches this pattern (i.e., the content-hashed bundles produced by parcel) are served as immutable.
+# Set it to `None` to revalidate every asset.
+STATIC_ASSETS_IMMUTABLE_NAME_PATTERN: str | None = r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$"
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD: str = "django.db.models.BigAutoField"
 
+# Whether each request is timed, per stage (each middleware, the view, the pages and the store operations), into in-process histograms (see `StageTimer`).
+# The per-route request metrics of `METRICS_URL` depend on it as well.
+REQUEST_TIMING_ACTIVE: bool = True
+
+# Whether the stage timings are also sent to the browsers, in a `Server-Timing` header. They disclose how the server works, so they are opt-in.
+SERVER_TIMING_HEADER_ACTIVE: bool = False
+
+# The requests slower than this (in seconds) are logged with their stage timings. `None` disables the logging.
+REQUEST_TIMING_SLOW_THRESHOLD: Optional[float] = None
+
+# The metrics, in the Prometheus text format, are served at this URL to these addresses only.
+METRICS_URL: str = "/metrics"
+METRICS_ALLOWED_ADDRESSES: list[str] = ["127.0.0.1", "::1"]
+# The `worker` label of the metrics: the slot given by `launcher` to this worker process.
+METRICS_WORKER_LABEL: str = os.environ.get("WEB_AGENT_WORKER_SLOT", "0")
+
+# The reverse proxies whose `X-Forwarded-For` header gives the client's address (see the README).
+TRUSTED_PROXIES: list[str] = []
+
+# Whether the static files, the favicon and the reporting endpoints skip the session, CSRF, authentication and messages middlewares, and the URL resolver (see `FastPathMiddleware`).
+FAST_PATH_ACTIVE: bool = True
+
 # Endpoints for the Reporting API.
 REPORTING_ENDPOINTS: dict[str, str] = {
     "csp": "/csp-endpoint",
@@ -137,6 +178,68 @@ REPORTING_ENDPOINTS: dict[str, str] = {
     "coop": "/coop-endpoint"
 }
 
+# Where the reports are stored: "memory" (see `ReportsLogs`), "mongo" (see `MongoManager`), or "mongo-async" (see `AsyncMongoManager`, which does not block the event loop).
+REPORTS_STORE: str = "memory"
+
+# How many reports of each type (CSP, COOP, COEP) are kept by the in-memory store. The oldest reports are overwritten first.
+REPORTS_LOGS_CAPACITY: int = 100000
+
+# The reports are fingerprinted (see `ReportAggregator`) and counted per fingerprint, keeping the first and last time each one was seen.
+# Unless `REPORTS_STORE_DUPLICATES`, only the first report of each fingerprint is stored: the others only increment its counter.
+REPORTS_STORE_DUPLICATES: bool = True
+
+# How many fingerprints of each type are counted by the in-memory store. The least recently seen are evicted first.
+REPORTS_AGGREGATES_CAPACITY: int = 10000
+
+# The reports are queued by the reporting endpoints, and written to the store in batches by a background thread.
+# When the queue is full, new reports are dropped, and the endpoints answer `503 Service Unavailable`.
+REPORTS_QUEUE_MAX_SIZE: int = 10000
+REPORTS_QUEUE_BATCH_SIZE: int = 500
+REPORTS_QUEUE_FLUSH_INTERVAL: float = 1.0
+
+# The reporting endpoints are public: the bodies bigger than `REPORTS_MAX_BODY_SIZE` bytes are rejected (`413`) before being parsed.
+REPORTS_MAX_BODY_SIZE: int = 256 * 1024
+
+# Token buckets (`429` when empty): one per client IP address (a token per request), and one per origin of the reports' `document-uri` (a token per report).
+REPORTS_RATE_LIMIT_IP_RATE: float = 10.0
+REPORTS_RATE_LIMIT_IP_BURST: int = 100
+REPORTS_RATE_LIMIT_ORIGIN_RATE: float = 100.0
+REPORTS_RATE_LIMIT_ORIGIN_BURST: int = 1000
+# How many buckets each in-memory limiter keeps. The least recently used are forgotten first.
+REPORTS_RATE_LIMIT_MAX_KEYS: int = 100000
+# The alias of one of the `CACHES` to share the buckets between the worker processes, or `None` to keep them in the memory of each process.
+REPORTS_RATE_LIMIT_CACHE: Optional[str] = None
+
+# The reports discarded as noise (see `ReportFilter`) as soon as they are parsed: those whose `fields` start with one of the `prefixes`, or match one of the `patterns`.
+# The fields are named as in the legacy reports (e.g., `source-file`): the rules also apply to their Reporting API names (e.g., `sourceFile`).
+REPORTS_NOISE_RULES: list[dict[str, Any]] = [
+    # The scripts and styles injected by the browser extensions are rightly blocked, but they are not ours to fix.
+    {
+        "types": ["csp"],
+        "fields": ["source-file", "blocked-uri"],
+        "prefixes": ["moz-extension", "chrome-extension", "safari-extension", "safari-web-extension", "ms-browser-extension", "webkit-masked-url"],
+        "patterns": [r"^[a-z][a-z0-9+.-]*-extension:"]
+    },
+    # Neither documents nor resources of ours.
+    {
+        "types": ["csp"],
+        "fields": ["source-file", "blocked-uri"],
+        "prefixes": ["about:", "data:", "blob:", "chrome:", "resource:", "view-source:"]
+    }
+]
+
+# The probability of keeping a report, per type, and, for the CSP reports, per violated directive (which takes precedence), e.g. `{"img-src": 0.01}`.
+# A missing entry means 1.0. The kept reports carry their `sample-rate`, and the dropped ones are counted (`?view=stats`), so that the totals can be estimated.
+REPORTS_SAMPLING_RATES: dict[str, float] = {"csp": 1.0, "coop": 1.0, "coep": 1.0}
+REPORTS_DIRECTIVE_SAMPLING_RATES: dict[str, float] = {}
+
+# A GET on a reporting endpoint returns a page of `REPORTS_QUERY_DEFAULT_LIMIT` reports (up to `REPORTS_QUERY_MAX_LIMIT` with the `limit` parameter).
+# An NDJSON stream (`?format=ndjson`) has no default limit, and is read from the store by pages of `REPORTS_QUERY_MAX_LIMIT` reports.
+REPORTS_QUERY_DEFAULT_LIMIT: int = 100
+REPORTS_QUERY_MAX_LIMIT: int = 1000
+# The reads leave out the reports stamped less than `REPORTS_QUERY_LAG` seconds ago, so that the cursors do not pass the reports still being written (see the README).
+REPORTS_QUERY_LAG: float = 0.0 if REPORTS_STORE == "memory" else 5.0
+
 # If `False``, the `Report-To` header will not be sent, and all the `report-to` directives will be replaced by `report-uri` directives.
 REPORT_TO_ACTIVE: bool = True
 
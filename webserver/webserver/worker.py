@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+# A single daphne worker, started by `launcher`: it warms the application up before it accepts any connection, then serves it on the given socket.
+
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "webserver.webserver.settings")
+
+from webserver.webserver.asgi import application
+
+from django.core.handlers.asgi import ASGIHandler
+from django.conf import settings
+
+from webserver.middleware.server_timing import ServerTimingMiddleware
+from webserver.web_agent_server.csp.reports_store import ReportsStore
+from webserver.web_agent_server.views import STATIC_ASSETS
+
+from daphne.cli import CommandLineInterface
+
+from argparse import ArgumentParser
+from asyncio import run, sleep
+from socket import socket, AF_INET, AF_INET6, SOCK_STREAM, SOL_SOCKET, SO_REUSEADDR
+from time import perf_counter
+from typing import Any, Optional
+import sys
+
+
+APPLICATION_PATH: str = "webserver.webserver.asgi:application"
+WARM_UP_PATHS: list[str] = ["/", "/favicon.ico", "/warm-up-not-found"]
+
+
+# A few requests, straight to the ASGI application, warm up what importing it has not (e.g., the URL resolver, the caches, the reports store), without counting in the metrics.
+async def warm_up(handler: ASGIHandler) -> int:
+    paths: list[str] = WARM_UP_PATHS + STATIC_ASSETS.get_urls() + list(settings.REPORTING_ENDPOINTS.values())
+
+    try:
+        for path in paths:
+            await __request(handler, path)
+    finally:
+        # This event loop ends before daphne starts its own.
+        await ReportsStore.aclose()
+
+    return len(paths)
+
+
+async def __request(handler: ASGIHandler, path: str) -> None:
+    scope: dict[str, Any] = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"127.0.0.1")],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 0),
+        ServerTimingMiddleware.WARM_UP_SCOPE_KEY: True
+    }
+    request_sent: bool = False
+
+    async def receive() -> dict[str, Any]:
+        nonlocal request_sent
+
+        if request_sent:
+            # Nobody disconnects: just wait until Django cancels the listener.
+            await sleep(3600)
+
+        request_sent = True
+
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(_: dict[str, Any]) -> None:
+        pass
+
+    await handler(scope, receive, send)
+
+
+# With `SO_REUSEPORT`, each worker has its own listening socket on the same port, and the kernel spreads the new connections between them.
+def bind_reuse_port(host: str, port: int, backlog: int) -> socket:
+    # Imported here, as it does not exist on every platform (e.g., Windows).
+    from socket import SO_REUSEPORT
+
+    listener: socket = socket(AF_INET6 if ":" in host else AF_INET, SOCK_STREAM)
+
+    listener.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+    listener.setsockopt(SOL_SOCKET, SO_REUSEPORT, 1)
+    listener.bind((host, port))
+    listener.listen(backlog)
+    listener.setblocking(False)
+
+    return listener
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="A Web-Agent worker (see `launcher`).")
+
+    parser.add_argument("--fd", type=int, help="The inherited listening socket.")
+    parser.add_argument("--reuse-port", nargs=2, metavar=("HOST", "PORT"), help="Bind a socket of its own with SO_REUSEPORT instead.")
+    parser.add_argument("--backlog", type=int, default=1024)
+    parser.add_argument("--ready-fd", type=int, help="A pipe to write to once warmed up.")
+
+    args, daphne_args = parser.parse_known_args()
+    start: float = perf_counter()
+    requests: int = run(warm_up(application))
+    listener: Optional[socket] = None
+
+    print(f"Worker {os.getpid()} warmed up in {(perf_counter() - start) * 1e3:.0f} ms ({requests} requests).", flush=True)
+
+    if args.reuse_port is not None:
+        # Bound only now, so that the kernel does not hand connections to a worker that is still warming up.
+        listener = bind_reuse_port(args.reuse_port[0], int(args.reuse_port[1]), args.backlog)
+        fd: int = listener.fileno()
+    elif args.fd is not None:
+        fd = args.fd
+    else:
+        parser.error("Either --fd or --reuse-port is required.")
+
+    if args.ready_fd is not None:
+        os.write(args.ready_fd, b"1")
+        os.close(args.ready_fd)
+
+    CommandLineInterface().run([*daphne_args, "--fd", str(fd), APPLICATION_PATH])
+
+    if listener is not None:
+        listener.close()
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()